@@ -0,0 +1,167 @@
+/**
+ * ADB Connections - keeps ADB-over-TCP devices (remote clients on :5555) attached.
+ *
+ * Request handlers only call ensure(), which records that an endpoint is
+ * wanted and returns immediately; `adb connect` always runs in the background.
+ * A keepalive pass every few seconds then:
+ *   - health-checks connected endpoints against the (cached) `adb devices` list
+ *     and reconnects those that dropped or went offline
+ *   - retries dead endpoints with exponential backoff (2 s, 4 s, 8 s ... 5 min)
+ *     so an unreachable host costs one short connect attempt per backoff step
+ *     instead of a 30 s stall on every device poll
+ *   - disconnects endpoints nobody asked for in `idleMs`
+ */
+
+const DEFAULTS = {
+    keepaliveMs: 5000,          // how often the keepalive pass runs
+    connectTimeoutMs: 5000,     // `adb connect` to an unreachable host is cut short
+    baseBackoffMs: 2000,
+    maxBackoffMs: 5 * 60 * 1000,
+    idleMs: 10 * 60 * 1000      // forget endpoints no tab has polled for this long
+};
+
+class AdbConnectionManager {
+    /**
+     * @param {Object} deps { exec(command, timeout) -> { success, stdout, stderr },
+     *                        listDevices(binary) -> [{ id, status }], onChange(entry) }
+     * @param {Object} [opts] see DEFAULTS
+     */
+    constructor({ exec, listDevices, onChange = () => {} }, opts = {}) {
+        this.exec = exec;
+        this.listDevices = listDevices;
+        this.onChange = onChange;
+        this.opts = { ...DEFAULTS, ...opts };
+        this.endpoints = new Map(); // "<binary> <host:port>" -> entry
+        this.timer = null;
+        this.passRunning = false;
+    }
+
+    start() {
+        if (this.timer) return;
+        this.timer = setInterval(() => this._keepalive(), this.opts.keepaliveMs);
+        this.timer.unref();
+    }
+
+    stop() {
+        clearInterval(this.timer);
+        this.timer = null;
+    }
+
+    /**
+     * Mark `endpoint` as wanted through `binary`; starts a background connect
+     * when it is not connected and not backing off. Never waits on the network.
+     */
+    ensure(binary, endpoint) {
+        const key = `${binary} ${endpoint}`;
+        let entry = this.endpoints.get(key);
+        if (!entry) {
+            entry = {
+                binary,
+                endpoint,
+                state: 'new',        // new | connecting | connected | down
+                failures: 0,
+                nextAttempt: 0,
+                lastError: '',
+                connectedAt: 0,
+                lastWanted: 0
+            };
+            this.endpoints.set(key, entry);
+        }
+        entry.lastWanted = Date.now();
+        if (entry.state !== 'connected' && entry.state !== 'connecting' && Date.now() >= entry.nextAttempt) {
+            this._connect(entry);
+        }
+        return entry.state;
+    }
+
+    async _connect(entry) {
+        entry.state = 'connecting';
+        const result = await this.exec(`${entry.binary} connect ${entry.endpoint}`, this.opts.connectTimeoutMs);
+        const text = `${result.stdout || ''} ${result.stderr || ''}`.toLowerCase();
+        // adb exits 0 even for "failed to connect" / "cannot connect", so the output decides
+        if (result.success && /\b(already )?connected to\b/.test(text)) {
+            if (entry.failures) console.log(`[ADB-TCP] ${entry.endpoint} reconnected after ${entry.failures} failed attempt(s)`);
+            entry.state = 'connected';
+            entry.failures = 0;
+            entry.nextAttempt = 0;
+            entry.lastError = '';
+            entry.connectedAt = Date.now();
+            this.onChange(entry);
+        } else {
+            this._markDown(entry, text.trim() || (result.error && result.error.killed ? 'timeout' : 'connect failed'));
+        }
+    }
+
+    _markDown(entry, reason) {
+        const wasConnected = entry.state === 'connected';
+        entry.state = 'down';
+        entry.failures++;
+        entry.lastError = reason;
+        const backoff = Math.min(this.opts.maxBackoffMs, this.opts.baseBackoffMs * 2 ** (entry.failures - 1));
+        // +-20% jitter so endpoints that died together do not retry in lockstep
+        entry.nextAttempt = Date.now() + Math.round(backoff * (0.8 + Math.random() * 0.4));
+        if (wasConnected) {
+            console.log(`[ADB-TCP] ${entry.endpoint} lost (${reason})`);
+            this.onChange(entry);
+        } else if (entry.failures === 1 || entry.failures % 10 === 0) {
+            console.log(`[ADB-TCP] ${entry.endpoint} unreachable (#${entry.failures}, next try in ${Math.round(backoff / 1000)}s): ${reason}`);
+        }
+    }
+
+    async _keepalive() {
+        if (this.passRunning) return;
+        this.passRunning = true;
+        try {
+            const now = Date.now();
+            const listed = new Map(); // binary -> Map<id, status>
+            for (const [key, entry] of this.endpoints) {
+                if (entry.state === 'connecting') continue;
+                if (now - entry.lastWanted > this.opts.idleMs) {
+                    this.endpoints.delete(key);
+                    if (entry.state === 'connected') {
+                        this.exec(`${entry.binary} disconnect ${entry.endpoint}`, this.opts.connectTimeoutMs);
+                        this.onChange(entry);
+                    }
+                    continue;
+                }
+                if (entry.state === 'connected') {
+                    if (!listed.has(entry.binary)) {
+                        const devices = await this.listDevices(entry.binary);
+                        listed.set(entry.binary, new Map(devices.map(d => [d.id, d.status])));
+                    }
+                    const status = listed.get(entry.binary).get(entry.endpoint);
+                    // 'unauthorized' is still attached (waiting for the RSA prompt); offline needs a fresh connect,
+                    // which adb refuses with "already connected" unless the stale transport is dropped first
+                    if (status === 'offline') {
+                        await this.exec(`${entry.binary} disconnect ${entry.endpoint}`, this.opts.connectTimeoutMs);
+                        this._markDown(entry, 'offline');
+                    } else if (!status) {
+                        this._markDown(entry, 'not listed by adb');
+                    }
+                }
+                if (entry.state !== 'connected' && now >= entry.nextAttempt) {
+                    this._connect(entry);
+                }
+            }
+        } catch (e) {
+            console.error('[ADB-TCP] Keepalive pass failed:', e.message);
+        } finally {
+            this.passRunning = false;
+        }
+    }
+
+    /** Snapshot for /api/adb/connections and metrics. */
+    list() {
+        return [...this.endpoints.values()].map(e => ({
+            binary: e.binary,
+            endpoint: e.endpoint,
+            state: e.state,
+            failures: e.failures,
+            lastError: e.lastError,
+            connectedAt: e.connectedAt || null,
+            nextAttempt: e.state === 'down' ? e.nextAttempt : null
+        }));
+    }
+}
+
+module.exports = { AdbConnectionManager };
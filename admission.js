@@ -0,0 +1,174 @@
+/**
+ * Admission - per-client, per-IP and per-device rate limiting for ADB-bound routes.
+ *
+ * Every ADB-bound request that is about to spawn adb draws tokens from up to
+ * three buckets: the client (X-Client-ID), the caller's IP address and the
+ * target serial. When a bucket is empty the request is not refused straight
+ * away. It reserves its tokens and waits until they refill, so bursts are
+ * smoothed out in arrival order. It is only rejected (429 + Retry-After) when
+ *   - its client or IP already has `maxQueued` requests waiting, or
+ *   - the wait would exceed `maxWaitMs`
+ * so a flooding script or stuck tab quickly gets 429s and cannot push the
+ * host's adb process count up for everyone else. The per-client bucket is
+ * what makes it fair between tabs; the IP bucket stops a script that sends a
+ * new X-Client-ID with every request from escaping its limit.
+ */
+
+const DEFAULTS = {
+    client: { rate: 10, burst: 30 },   // tokens/s and bucket size per client: a Run All is ~5 commands/s
+    ip: { rate: 30, burst: 60 },       // per caller address: all tabs of one machine together
+    serial: { rate: 20, burst: 40 },   // per device, shared by every client working on it
+    maxQueued: 10,                     // requests one client (or IP) may have waiting
+    maxWaitMs: 5000,                   // never park a request longer than this
+    idleMs: 10 * 60 * 1000             // forget buckets untouched this long
+};
+
+class TokenBucket {
+    constructor({ rate, burst }) {
+        this.rate = rate;
+        this.burst = burst;
+        this.tokens = burst;
+        this.updated = Date.now();
+    }
+
+    _refill(now) {
+        this.tokens = Math.min(this.burst, this.tokens + ((now - this.updated) / 1000) * this.rate);
+        this.updated = now;
+    }
+
+    /** ms until `cost` tokens are available, counting reservations already made. */
+    waitFor(cost, now = Date.now()) {
+        this._refill(now);
+        const missing = cost - this.tokens;
+        return missing <= 0 ? 0 : Math.ceil((missing / this.rate) * 1000);
+    }
+
+    /** Take `cost` tokens; may go negative, i.e. reserve future tokens. */
+    take(cost) {
+        this.tokens -= cost;
+    }
+}
+
+class AdmissionError extends Error {
+    constructor(scope, key, retryAfterMs, reason) {
+        super(`Rate limited (${scope} ${key}): ${reason}`);
+        this.scope = scope;
+        this.key = key;
+        this.retryAfterMs = retryAfterMs;
+    }
+}
+
+const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+
+class AdmissionController {
+    constructor(opts = {}) {
+        this.opts = { ...DEFAULTS, ...opts };
+        this.buckets = new Map(); // "client:<id>" / "ip:<address>" / "serial:<serial>" -> TokenBucket
+        this.stats = new Map();   // same keys -> { admitted, delayed, rejected, waitMs, queued, lastRejected }
+        this.timer = setInterval(() => this._sweep(), 60000);
+        this.timer.unref();
+    }
+
+    _bucket(key, limits) {
+        let bucket = this.buckets.get(key);
+        if (!bucket) {
+            bucket = new TokenBucket(limits);
+            this.buckets.set(key, bucket);
+        }
+        return bucket;
+    }
+
+    _stats(key) {
+        let s = this.stats.get(key);
+        if (!s) {
+            s = { admitted: 0, delayed: 0, rejected: 0, waitMs: 0, queued: 0, lastRejected: null };
+            this.stats.set(key, s);
+        }
+        return s;
+    }
+
+    _reject({ key, scope, id }, retryAfterMs, reason) {
+        const s = this._stats(key);
+        s.rejected++;
+        s.lastRejected = Date.now();
+        if (s.rejected === 1 || s.rejected % 100 === 0) {
+            console.warn(`[THROTTLE] ${scope} ${id} rejected (#${s.rejected}): ${reason}`);
+        }
+        throw new AdmissionError(scope, id, retryAfterMs, reason);
+    }
+
+    /**
+     * Resolves (after queueing, if needed) once the request may run; rejects
+     * with AdmissionError when it has to be turned away.
+     * @param {Object} who { client, ip, serial } - missing ones are not limited
+     * @param {number} [cost] tokens the request costs (a status poll runs several adb commands)
+     * @returns {Promise<number>} ms spent waiting
+     */
+    async admit({ client, ip, serial }, cost = 1) {
+        const now = Date.now();
+        const checks = [['client', client], ['ip', ip], ['serial', serial && serial.toLowerCase()]]
+            .filter(([, id]) => id)
+            .map(([scope, id]) => {
+                const key = `${scope}:${id}`;
+                const bucket = this._bucket(key, this.opts[scope]);
+                return { scope, id, key, bucket, stats: this._stats(key), wait: bucket.waitFor(cost, now) };
+            });
+        if (!checks.length) return 0;
+        const worst = checks.reduce((a, b) => (b.wait > a.wait ? b : a));
+        const wait = worst.wait;
+        // Queue bounds are per caller; a device's queue is bounded by the wait limit
+        const callers = checks.filter(c => c.scope !== 'serial');
+
+        if (wait > 0) {
+            const full = callers.find(c => c.stats.queued >= this.opts.maxQueued);
+            if (full) this._reject(full, wait, `${full.stats.queued} request(s) already waiting`);
+        }
+        if (wait > this.opts.maxWaitMs) this._reject(worst, wait, `would wait ${wait} ms`);
+
+        for (const c of checks) {
+            c.bucket.take(cost);
+            c.stats.admitted++;
+        }
+        if (wait === 0) return 0;
+
+        for (const c of callers) {
+            c.stats.delayed++;
+            c.stats.waitMs += wait;
+            c.stats.queued++;
+        }
+        try {
+            await sleep(wait);
+        } finally {
+            for (const c of callers) c.stats.queued--;
+        }
+        return wait;
+    }
+
+    _sweep() {
+        const cutoff = Date.now() - this.opts.idleMs;
+        for (const [key, bucket] of this.buckets) {
+            if (bucket.updated < cutoff && !this.stats.get(key)?.queued) {
+                this.buckets.delete(key);
+                this.stats.delete(key);
+            }
+        }
+    }
+
+    /** Per client / IP / device counters, most rejected first (GET /api/throttle). */
+    list() {
+        const now = Date.now();
+        return [...this.stats.entries()].map(([key, s]) => {
+            const bucket = this.buckets.get(key);
+            if (bucket) bucket._refill(now);
+            const [scope, ...rest] = key.split(':');
+            return {
+                scope,
+                id: rest.join(':'),
+                ...s,
+                tokens: bucket ? Math.round(bucket.tokens * 10) / 10 : null
+            };
+        }).sort((a, b) => b.rejected - a.rejected || b.delayed - a.delayed);
+    }
+}
+
+module.exports = { AdmissionController, AdmissionError, TokenBucket };
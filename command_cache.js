@@ -0,0 +1,110 @@
+/**
+ * Command Cache - read-through cache for idempotent device queries.
+ *
+ * Commands are classified as reads or writes:
+ *   - an explicit `access: "read" | "write"` on the catalog entry wins
+ *   - otherwise an sldd call whose verb starts with get/is
+ *     (`shell sldd telephony geticcid`) is a read
+ *   - everything else (set*, dial, reboot, chained shell, ...) is a write
+ *
+ * Reads are served from a short per-device cache, and concurrent identical
+ * reads share one ADB call (single-flight), so several users or a Run All
+ * pass clicking the same query do not hit the device again. Any write
+ * to a device drops that device's cached reads - a write can change what
+ * almost any query returns (radio power vs. isRadioOn, region vs. getnation),
+ * so no finer dependency map is kept.
+ */
+
+const DEFAULTS = {
+    ttlMs: 5000,       // long enough to absorb repeated clicks, short enough for live values (signal, call state)
+    maxEntries: 2000
+};
+
+const READ_VERB = /^(get|is)/i;
+
+/**
+ * 'read' or 'write' for an ADB command line (without the `adb -s <serial>` prefix).
+ * @param {string} command e.g. "shell sldd telephony getimei"
+ * @param {string} [access] catalog override
+ */
+const classify = (command, access) => {
+    if (access === 'read' || access === 'write') return access;
+    const text = String(command || '').trim();
+    if (/[;&|<>`$]/.test(text)) return 'write'; // chained or redirected shell: not provably a query
+    const m = text.match(/^shell\s+(?:\S*\/)?sldd\s+\S+\s+(\S+)/i);
+    return m && READ_VERB.test(m[1]) ? 'read' : 'write';
+};
+
+class CommandCache {
+    constructor(opts = {}) {
+        this.opts = { ...DEFAULTS, ...opts };
+        this.entries = new Map();    // "<device>\n<command>" -> { device, result, expires }
+        this.inflight = new Map();   // same key + "\n<generation>" -> Promise
+        this.generation = new Map(); // device -> bumped on every invalidation
+        this.stats = { hits: 0, misses: 0, coalesced: 0, invalidations: 0 };
+    }
+
+    /**
+     * Result of `run()` for `command` on `device` ("<binary>_<serial>"), from the
+     * cache or a shared in-flight call when possible.
+     * Resolves to { result, source: 'hit' | 'coalesced' | 'miss' }.
+     */
+    async read(device, command, run) {
+        const key = `${device}\n${command}`;
+        const cached = this.entries.get(key);
+        if (cached && cached.expires > Date.now()) {
+            this.stats.hits++;
+            return { result: cached.result, source: 'hit' };
+        }
+        // A read started before the last write must not be shared with one started after it
+        const generation = this.generation.get(device) || 0;
+        const flightKey = `${key}\n${generation}`;
+        const pending = this.inflight.get(flightKey);
+        if (pending) {
+            this.stats.coalesced++;
+            return { result: await pending, source: 'coalesced' };
+        }
+
+        this.stats.misses++;
+        const promise = Promise.resolve().then(run);
+        this.inflight.set(flightKey, promise);
+        try {
+            const result = await promise;
+            // Failed reads are not cached; neither is a read that raced with a write
+            if (result.success && (this.generation.get(device) || 0) === generation) {
+                this.entries.delete(key); // re-insert at the end: Map order doubles as LRU
+                this.entries.set(key, { device, result, expires: Date.now() + this.opts.ttlMs });
+                if (this.entries.size > this.opts.maxEntries) this.entries.delete(this.entries.keys().next().value);
+            }
+            return { result, source: 'miss' };
+        } finally {
+            this.inflight.delete(flightKey);
+        }
+    }
+
+    /** Would read() answer without running the command (fresh entry or a shared in-flight call)? */
+    has(device, command) {
+        const key = `${device}\n${command}`;
+        const cached = this.entries.get(key);
+        if (cached && cached.expires > Date.now()) return true;
+        return this.inflight.has(`${key}\n${this.generation.get(device) || 0}`);
+    }
+
+    /** Drop every cached read of `device`; reads still in flight are neither stored nor shared. */
+    invalidate(device) {
+        this.generation.set(device, (this.generation.get(device) || 0) + 1);
+        this.stats.invalidations++;
+        for (const [key, entry] of this.entries) {
+            if (entry.device === device) this.entries.delete(key);
+        }
+    }
+
+    status() {
+        const now = Date.now();
+        let live = 0;
+        for (const entry of this.entries.values()) if (entry.expires > now) live++;
+        return { entries: live, inflight: this.inflight.size, ttlMs: this.opts.ttlMs, ...this.stats };
+    }
+}
+
+module.exports = { CommandCache, classify };
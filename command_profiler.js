@@ -0,0 +1,210 @@
+/**
+ * Command Profiler - per-command latency history.
+ *
+ * Every execution is recorded into a fixed-size ring buffer per
+ * (model, command id, serial). Samples live in typed arrays (~20 bytes each),
+ * so thousands of commands x devices cost a few MB at most, and the whole
+ * state can be snapshotted to disk as base64 blobs.
+ */
+
+const fs = require('fs');
+
+const RING_SIZE = 256;
+
+class CommandRing {
+    constructor(size = RING_SIZE) {
+        this.size = size;
+        this.time = new Float64Array(size);       // epoch ms
+        this.duration = new Float32Array(size);   // ms
+        this.exitCode = new Int32Array(size);
+        this.outputBytes = new Uint32Array(size);
+        this.next = 0;
+        this.count = 0;
+        this.total = 0;                           // lifetime executions
+    }
+
+    push(time, duration, exitCode, outputBytes) {
+        const i = this.next;
+        this.time[i] = time;
+        this.duration[i] = duration;
+        this.exitCode[i] = exitCode;
+        this.outputBytes[i] = outputBytes;
+        this.next = (i + 1) % this.size;
+        this.count = Math.min(this.count + 1, this.size);
+        this.total++;
+    }
+
+    // Slot indices from oldest to newest
+    *slots() {
+        const start = this.count < this.size ? 0 : this.next;
+        for (let k = 0; k < this.count; k++) yield (start + k) % this.size;
+    }
+
+    toJSON() {
+        const b64 = (arr) => Buffer.from(arr.buffer, arr.byteOffset, arr.byteLength).toString('base64');
+        return {
+            size: this.size,
+            next: this.next,
+            count: this.count,
+            total: this.total,
+            time: b64(this.time),
+            duration: b64(this.duration),
+            exitCode: b64(this.exitCode),
+            outputBytes: b64(this.outputBytes)
+        };
+    }
+
+    // `older`'s samples followed by `newer`'s, keeping the newest `newer.size`
+    static merge(older, newer) {
+        const ring = new CommandRing(newer.size);
+        for (const r of [older, newer]) {
+            for (const i of r.slots()) ring.push(r.time[i], r.duration[i], r.exitCode[i], r.outputBytes[i]);
+        }
+        ring.total = older.total + newer.total;
+        return ring;
+    }
+
+    static fromJSON(data) {
+        const ring = new CommandRing(data.size);
+        const load = (Type, b64) => {
+            const buf = Buffer.from(b64, 'base64');
+            return new Type(buf.buffer.slice(buf.byteOffset, buf.byteOffset + buf.byteLength));
+        };
+        ring.time = load(Float64Array, data.time);
+        ring.duration = load(Float32Array, data.duration);
+        ring.exitCode = load(Int32Array, data.exitCode);
+        ring.outputBytes = load(Uint32Array, data.outputBytes);
+        ring.next = data.next;
+        ring.count = data.count;
+        ring.total = data.total;
+        return ring;
+    }
+}
+
+// Nearest-rank percentile of an ascending-sorted Float32Array
+const percentile = (sorted, p) => {
+    if (sorted.length === 0) return 0;
+    const rank = Math.ceil((p / 100) * sorted.length) - 1;
+    return sorted[Math.min(sorted.length - 1, Math.max(0, rank))];
+};
+
+class CommandProfiler {
+    constructor() {
+        this.rings = new Map(); // key(model, commandId, serial) -> { model, commandId, serial, ring }
+    }
+
+    // Labels are kept on the entry; the key is only for lookup (command labels may contain '|', e.g. "ps |")
+    static key(model, commandId, serial) {
+        return `${model || '-'}\u0000${commandId || '-'}\u0000${serial || '-'}`;
+    }
+
+    _entry(model, commandId, serial) {
+        const key = CommandProfiler.key(model, commandId, serial);
+        let entry = this.rings.get(key);
+        if (!entry) {
+            entry = { model: model || '-', commandId: commandId || '-', serial: serial || '-', ring: new CommandRing() };
+            this.rings.set(key, entry);
+        }
+        return entry;
+    }
+
+    record({ model, commandId, serial, duration, exitCode = 0, outputBytes = 0, time = Date.now() }) {
+        this._entry(model, commandId, serial).ring.push(time, duration, exitCode, outputBytes);
+    }
+
+    _matching(filter) {
+        const out = [];
+        for (const entry of this.rings.values()) {
+            if (filter.model && filter.model !== entry.model) continue;
+            if (filter.serial && filter.serial !== entry.serial) continue;
+            if (filter.commandId && filter.commandId !== entry.commandId) continue;
+            out.push(entry);
+        }
+        return out;
+    }
+
+    /**
+     * Latency summary per (model, command, serial).
+     * suggestedTimeoutMs is 3x p99 (min 2 s) once there are enough samples to trust it.
+     */
+    summary(filter = {}) {
+        return this._matching(filter).map(({ model, commandId, serial, ring }) => {
+            const durations = new Float32Array(ring.count);
+            let failures = 0;
+            let bytes = 0;
+            let lastTime = 0;
+            let k = 0;
+            for (const i of ring.slots()) {
+                durations[k++] = ring.duration[i];
+                if (ring.exitCode[i] !== 0) failures++;
+                bytes += ring.outputBytes[i];
+                lastTime = ring.time[i];
+            }
+            durations.sort();
+            const p99 = percentile(durations, 99);
+            return {
+                model,
+                commandId,
+                serial,
+                samples: ring.count,
+                total: ring.total,
+                p50: Math.round(percentile(durations, 50)),
+                p95: Math.round(percentile(durations, 95)),
+                p99: Math.round(p99),
+                max: Math.round(durations[durations.length - 1] || 0),
+                failureRate: ring.count ? failures / ring.count : 0,
+                avgOutputBytes: ring.count ? Math.round(bytes / ring.count) : 0,
+                lastRun: lastTime,
+                suggestedTimeoutMs: ring.count >= 20 ? Math.max(2000, Math.ceil(p99 * 3 / 1000) * 1000) : null
+            };
+        });
+    }
+
+    /**
+     * The slowest individual invocations still held in the rings.
+     */
+    slowest(filter = {}, limit = 20) {
+        const all = [];
+        for (const { model, commandId, serial, ring } of this._matching(filter)) {
+            for (const i of ring.slots()) {
+                all.push({
+                    model,
+                    commandId,
+                    serial,
+                    time: ring.time[i],
+                    duration: Math.round(ring.duration[i]),
+                    exitCode: ring.exitCode[i],
+                    outputBytes: ring.outputBytes[i]
+                });
+            }
+        }
+        return all.sort((a, b) => b.duration - a.duration).slice(0, limit);
+    }
+
+    async save(file) {
+        const data = {};
+        for (const [key, { model, commandId, serial, ring }] of this.rings) data[key] = { model, commandId, serial, ...ring.toJSON() };
+        const tmp = `${file}.tmp`;
+        await fs.promises.writeFile(tmp, JSON.stringify(data), 'utf8');
+        await fs.promises.rename(tmp, file);
+    }
+
+    async load(file) {
+        let data;
+        try {
+            data = JSON.parse(await fs.promises.readFile(file, 'utf8'));
+        } catch (e) {
+            if (e.code !== 'ENOENT') console.error('[PROFILER] Failed to load timing history:', e.message);
+            return;
+        }
+        // Commands that already ran while the file was loading go after the history on disk
+        for (const { model, commandId, serial, ...saved } of Object.values(data)) {
+            const key = CommandProfiler.key(model, commandId, serial);
+            const loaded = CommandRing.fromJSON(saved);
+            const fresh = this.rings.get(key);
+            this.rings.set(key, { model, commandId, serial, ring: fresh ? CommandRing.merge(loaded, fresh.ring) : loaded });
+        }
+    }
+}
+
+module.exports = { CommandProfiler };
@@ -10,6 +10,8 @@ from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
 import os
 
+from pptx_compact import compact, format_report
+
 # ─── Colors ───────────────────────────────────────────────────────────
 BG_DARK     = RGBColor(0x0F, 0x11, 0x1A)
 BG_CARD     = RGBColor(0x1A, 0x1D, 0x2E)
@@ -660,4 +662,5 @@ add_multi_text(slide, Inches(7.2), Inches(4.5), Inches(5.3), Inches(2.5),
 output_path = r"D:\OnlineSanity\Telephony_Manager_Demo.pptx"
 prs.save(output_path)
 print(f"\nPresentation saved to: {output_path}")
+print(f"Compacted: {format_report(compact(output_path))}")
 print(f"Slides: {len(prs.slides)}")
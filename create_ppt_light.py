@@ -10,6 +10,8 @@ from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
 import os
 
+from pptx_compact import compact, format_report
+
 # ─── Light Theme Colors ──────────────────────────────────────────────
 BG_WHITE    = RGBColor(0xF8, 0xF9, 0xFC)
 BG_CARD     = RGBColor(0xFF, 0xFF, 0xFF)
@@ -672,4 +674,5 @@ add_multi_text(slide, Inches(7.2), Inches(4.5), Inches(5.3), Inches(2.5),
 output_path = r"D:\OnlineSanity\Telephony_Manager_Demo_Light.pptx"
 prs.save(output_path)
 print(f"Presentation saved to: {output_path}")
+print(f"Compacted: {format_report(compact(output_path))}")
 print(f"Slides: {len(prs.slides)}")
@@ -0,0 +1,366 @@
+"""
+Telephony Manager - Sanity Results Report Generator
+Builds a dark-theme results deck from accumulated results (see
+results_analytics.py): a title slide with overall numbers, one slide per
+model, a "stability" slide ranking the flakiest commands and, with --dlt,
+the DLT log excerpt around the latest failure of each top offender.
+
+Slides are cached: each slide's input data (plus this script's source) is
+hashed and the rendered slide XML is kept in .report_cache/. On the next run
+only slides whose inputs changed are rebuilt; the rest are re-attached from
+the cache. Pass --no-cache to force a full build.
+
+Usage:
+    python create_report.py results/ --out Sanity_Report.pptx
+    python create_report.py results/ regression_report_toyota_*.csv --dlt dlt_captures/<serial>/
+    python create_report.py results/ --html public/report.html
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from pptx import Presentation
+from pptx.util import Inches, Pt
+from pptx.dml.color import RGBColor
+from pptx.enum.text import PP_ALIGN
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.oxml import parse_xml
+from lxml import etree
+
+from pptx_compact import compact, format_report
+from results_analytics import build_report_model
+
+# ─── Colors (same palette as create_ppt.py) ──────────────────────────
+BG_DARK     = RGBColor(0x0F, 0x11, 0x1A)
+BG_CARD     = RGBColor(0x1A, 0x1D, 0x2E)
+BG_CARD2    = RGBColor(0x14, 0x16, 0x22)
+ACCENT      = RGBColor(0x6C, 0x5C, 0xE7)
+ACCENT2     = RGBColor(0x00, 0xD2, 0xFF)
+GREEN       = RGBColor(0x00, 0xE6, 0x76)
+RED         = RGBColor(0xFF, 0x44, 0x44)
+ORANGE      = RGBColor(0xFF, 0xA5, 0x02)
+WHITE       = RGBColor(0xFF, 0xFF, 0xFF)
+LIGHT_GRAY  = RGBColor(0xBB, 0xBB, 0xCC)
+MUTED       = RGBColor(0x88, 0x88, 0xAA)
+BORDER      = RGBColor(0x33, 0x33, 0x44)
+
+MAX_ROWS = 12  # command rows per model slide
+CACHE_DIR = '.report_cache'
+CACHE_MAX_AGE = 14 * 86400  # unused cache entries are pruned after two weeks
+
+
+def set_bg(slide, color=BG_DARK):
+    fill = slide.background.fill
+    fill.solid()
+    fill.fore_color.rgb = color
+
+
+def add_shape(slide, left, top, width, height, fill_color=BG_CARD, border_color=None, shape=MSO_SHAPE.ROUNDED_RECTANGLE):
+    s = slide.shapes.add_shape(shape, left, top, width, height)
+    s.fill.solid()
+    s.fill.fore_color.rgb = fill_color
+    if border_color:
+        s.line.color.rgb = border_color
+        s.line.width = Pt(1.5)
+    else:
+        s.line.fill.background()
+    return s
+
+
+def add_text(slide, left, top, width, height, text, size=18, color=WHITE, bold=False, align=PP_ALIGN.LEFT, font_name='Segoe UI'):
+    txBox = slide.shapes.add_textbox(left, top, width, height)
+    tf = txBox.text_frame
+    tf.word_wrap = True
+    p = tf.paragraphs[0]
+    p.text = text
+    p.font.size = Pt(size)
+    p.font.color.rgb = color
+    p.font.bold = bold
+    p.font.name = font_name
+    p.alignment = align
+    return txBox
+
+
+def add_lines(slide, left, top, width, height, lines, size=10, color=LIGHT_GRAY, font_name='Consolas'):
+    txBox = slide.shapes.add_textbox(left, top, width, height)
+    tf = txBox.text_frame
+    tf.word_wrap = False
+    for i, line in enumerate(lines):
+        p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+        p.text = line
+        p.font.size = Pt(size)
+        p.font.color.rgb = color
+        p.font.name = font_name
+    return txBox
+
+
+def new_slide(prs, title):
+    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
+    set_bg(slide)
+    add_shape(slide, Inches(0), Inches(0), Inches(13.33), Inches(0.06), ACCENT, shape=MSO_SHAPE.RECTANGLE)
+    add_text(slide, Inches(0.6), Inches(0.3), Inches(12), Inches(0.7), title, 30, WHITE, True)
+    add_shape(slide, Inches(0.6), Inches(1.0), Inches(2), Inches(0.04), ACCENT)
+    return slide
+
+
+def rate_color(rate):
+    if rate >= 0.95:
+        return GREEN
+    return ORANGE if rate >= 0.7 else RED
+
+
+def fmt_time(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M') if ts else '—'
+
+
+def add_rate_bar(slide, left, top, width, height, rate):
+    """Horizontal pass/fail bar: green share = pass rate."""
+    add_shape(slide, left, top, width, height, RED, shape=MSO_SHAPE.RECTANGLE)
+    if rate > 0:
+        add_shape(slide, left, top, int(width * rate), height, GREEN, shape=MSO_SHAPE.RECTANGLE)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Slides
+# ═══════════════════════════════════════════════════════════════════════
+
+def add_title_slide(prs, report):
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    set_bg(slide)
+    add_shape(slide, Inches(0), Inches(0), Inches(13.33), Inches(0.06), ACCENT, shape=MSO_SHAPE.RECTANGLE)
+    add_text(slide, Inches(1), Inches(1.6), Inches(11), Inches(1),
+             "SANITY RESULTS REPORT", 48, WHITE, True, PP_ALIGN.CENTER)
+    period = report['period']
+    subtitle = f"{fmt_time(period[0])}  →  {fmt_time(period[1])}" if period else "No results yet"
+    add_text(slide, Inches(1), Inches(2.7), Inches(11), Inches(0.8), subtitle, 24, ACCENT2, False, PP_ALIGN.CENTER)
+
+    cards = [
+        ("Samples", f"{report['samples']:,}", WHITE),
+        ("Pass Rate", f"{report['pass_rate']:.1%}", rate_color(report['pass_rate'])),
+        ("Models", str(len(report['models'])), WHITE),
+        ("Flaky Commands", str(sum(1 for r in report['offenders'] if r['flips'])), ORANGE),
+    ]
+    for i, (label, value, color) in enumerate(cards):
+        left = Inches(1.2 + i * 2.8)
+        add_shape(slide, left, Inches(4.0), Inches(2.5), Inches(1.5), BG_CARD, BORDER)
+        add_text(slide, left, Inches(4.15), Inches(2.5), Inches(0.7), value, 30, color, True, PP_ALIGN.CENTER)
+        add_text(slide, left, Inches(4.9), Inches(2.5), Inches(0.4), label, 13, MUTED, False, PP_ALIGN.CENTER)
+
+    add_shape(slide, Inches(0), Inches(6.5), Inches(13.33), Inches(1), BG_CARD2, shape=MSO_SHAPE.RECTANGLE)
+    add_text(slide, Inches(1), Inches(6.65), Inches(11.3), Inches(0.6),
+             f"Generated {report['generated']}  |  Telephony Manager", 13, MUTED, False, PP_ALIGN.RIGHT)
+
+
+def add_model_slide(prs, model, data):
+    slide = new_slide(prs, f"{model.upper()}  —  Command Results")
+
+    add_shape(slide, Inches(0.5), Inches(1.4), Inches(3.4), Inches(5.5), BG_CARD, BORDER)
+    summary = [
+        ("Pass Rate", f"{data['pass_rate']:.1%}", rate_color(data['pass_rate'])),
+        ("Runs", str(data['runs']), WHITE),
+        ("Samples", f"{data['samples']:,}", WHITE),
+        ("Commands", str(len(data['commands'])), WHITE),
+    ]
+    for i, (label, value, color) in enumerate(summary):
+        y = Inches(1.6 + i * 1.3)
+        add_text(slide, Inches(0.8), y, Inches(2.9), Inches(0.6), value, 28, color, True)
+        add_text(slide, Inches(0.8), y + Inches(0.6), Inches(2.9), Inches(0.4), label, 12, MUTED)
+
+    add_shape(slide, Inches(4.2), Inches(1.4), Inches(8.6), Inches(5.5), BG_CARD, BORDER)
+    headers = [("Command", 0.0), ("Samples", 3.6), ("Pass", 4.6), ("Flips", 7.3)]
+    for text, dx in headers:
+        add_text(slide, Inches(4.4 + dx), Inches(1.5), Inches(1.5), Inches(0.35), text, 11, MUTED, True)
+
+    # Worst first: lowest pass rate, then most flips
+    rows = sorted(data['commands'], key=lambda r: (r['pass_rate'], -r['flips']))[:MAX_ROWS]
+    for i, r in enumerate(rows):
+        y = Inches(1.95 + i * 0.4)
+        add_text(slide, Inches(4.4), y, Inches(3.5), Inches(0.35), r['command'][:40], 11, WHITE)
+        add_text(slide, Inches(8.0), y, Inches(0.9), Inches(0.35), str(r['samples']), 11, LIGHT_GRAY)
+        add_rate_bar(slide, Inches(9.0), y + Inches(0.08), Inches(1.8), Inches(0.18), r['pass_rate'])
+        add_text(slide, Inches(10.85), y, Inches(0.8), Inches(0.35), f"{r['pass_rate']:.0%}", 11, rate_color(r['pass_rate']))
+        add_text(slide, Inches(11.7), y, Inches(0.9), Inches(0.35), str(r['flips']), 11, ORANGE if r['flips'] else MUTED)
+    if len(data['commands']) > MAX_ROWS:
+        add_text(slide, Inches(4.4), Inches(6.5), Inches(8), Inches(0.3),
+                 f"+ {len(data['commands']) - MAX_ROWS} more commands (all passing or less frequent)", 10, MUTED)
+
+
+def add_stability_slide(prs, report):
+    slide = new_slide(prs, "STABILITY  —  Flakiest Commands")
+
+    add_shape(slide, Inches(0.5), Inches(1.4), Inches(8.3), Inches(5.5), BG_CARD, BORDER)
+    add_text(slide, Inches(0.8), Inches(1.5), Inches(7.8), Inches(0.4),
+             "Ranked by flip rate (pass ↔ fail between consecutive runs)", 13, MUTED)
+    offenders = report['offenders'][:10]
+    if not offenders:
+        add_text(slide, Inches(0.8), Inches(3.5), Inches(7.8), Inches(0.6), "No failing commands 🎉", 22, GREEN, True, PP_ALIGN.CENTER)
+    for i, r in enumerate(offenders):
+        y = Inches(2.0 + i * 0.48)
+        add_text(slide, Inches(0.8), y, Inches(1.3), Inches(0.4), r['model'], 11, MUTED)
+        add_text(slide, Inches(2.0), y, Inches(3.2), Inches(0.4), r['command'][:34], 12, WHITE, True)
+        # Flip rate bar (orange) on a muted track
+        add_shape(slide, Inches(5.3), y + Inches(0.1), Inches(1.8), Inches(0.2), BG_CARD2, shape=MSO_SHAPE.RECTANGLE)
+        if r['flip_rate'] > 0:
+            add_shape(slide, Inches(5.3), y + Inches(0.1), int(Inches(1.8) * min(1.0, r['flip_rate'])), Inches(0.2),
+                      ORANGE, shape=MSO_SHAPE.RECTANGLE)
+        add_text(slide, Inches(7.15), y, Inches(1.6), Inches(0.4),
+                 f"{r['flip_rate']:.0%} flip · {r['pass_rate']:.0%} pass", 10, rate_color(r['pass_rate']))
+
+    # Failure rate by hour of day
+    add_shape(slide, Inches(9.1), Inches(1.4), Inches(3.8), Inches(5.5), BG_CARD, BORDER)
+    add_text(slide, Inches(9.3), Inches(1.5), Inches(3.4), Inches(0.4), "Failures by hour of day", 13, MUTED)
+    hours = report['failure_by_hour']
+    top, height = Inches(2.1), Inches(4.2)
+    row_h = int(height / 24)
+    for h, rate in enumerate(hours):
+        y = top + row_h * h
+        add_text(slide, Inches(9.3), y - Inches(0.06), Inches(0.5), row_h, f"{h:02d}", 7, MUTED)
+        if rate:
+            add_shape(slide, Inches(9.8), y + int(row_h * 0.15), max(1, int(Inches(2.8) * rate)), int(row_h * 0.7),
+                      rate_color(1 - rate), shape=MSO_SHAPE.RECTANGLE)
+
+
+def add_dlt_slide(prs, offender, lines):
+    slide = new_slide(prs, f"DLT  —  {offender['command']} ({offender['model']})")
+    add_text(slide, Inches(0.6), Inches(1.15), Inches(12), Inches(0.4),
+             f"Window around last failure at {fmt_time(offender['last_failure'])}", 13, MUTED)
+    add_shape(slide, Inches(0.5), Inches(1.6), Inches(12.3), Inches(5.5), BG_CARD2, BORDER)
+    add_lines(slide, Inches(0.7), Inches(1.7), Inches(11.9), Inches(5.3), lines or ['(no DLT messages in window)'], 9)
+
+
+def add_dlt_slides(prs, report, capture, span, top, cache):
+    from dlt_parser import open_capture, excerpt_lines  # numpy/mmap only needed with --dlt
+
+    signature = capture_signature(capture)
+    files = None
+    try:
+        for offender in [r for r in report['offenders'] if r['last_failure']][:top]:
+            def build(offender=offender):
+                nonlocal files
+                files = files or open_capture(capture)  # only parsed if some DLT slide changed
+                t = offender['last_failure']
+                add_dlt_slide(prs, offender, excerpt_lines(files, t - span / 2, t + span / 2, limit=36))
+            cache.render(prs, 'dlt', [offender['model'], offender['command'], offender['last_failure'], span, signature], build)
+    finally:
+        for f in files or []:
+            f.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Slide cache
+# ═══════════════════════════════════════════════════════════════════════
+
+class SlideCache:
+    """Rendered slide XML keyed by a hash of the slide's inputs and this script's source."""
+
+    def __init__(self, directory=CACHE_DIR, enabled=True):
+        self.directory = directory
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        with open(os.path.abspath(__file__), 'rb') as f:
+            self.code_hash = hashlib.sha256(f.read()).hexdigest()
+        if enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, kind, data):
+        payload = json.dumps([kind, data], sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(self.code_hash.encode('ascii') + payload).hexdigest()[:32]
+
+    def render(self, prs, kind, data, build):
+        """Re-attach the cached slide for (kind, data) or call build() and cache its slide."""
+        if not self.enabled:
+            build()
+            self.misses += 1
+            return
+        path = os.path.join(self.directory, f"{self.key(kind, data)}.xml")
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                cached = parse_xml(f.read())
+            slide = prs.slides.add_slide(prs.slide_layouts[6])
+            el = slide._element
+            for child in list(el):
+                el.remove(child)
+            for child in list(cached):
+                el.append(child)
+            os.utime(path)
+            self.hits += 1
+            return
+        build()
+        self.misses += 1
+        slide = prs.slides[-1]
+        # Only self-contained slides (no images / links besides the layout) can be replayed from XML
+        if len(slide.part.rels) == 1:
+            tmp = f"{path}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(etree.tostring(slide._element))
+            os.replace(tmp, path)
+
+    def prune(self, max_age=CACHE_MAX_AGE):
+        if not self.enabled:
+            return
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.directory):
+            full = os.path.join(self.directory, name)
+            if os.path.getmtime(full) < cutoff:
+                os.remove(full)
+
+
+def capture_signature(capture):
+    """Names, sizes and mtimes of the DLT files behind --dlt (a new segment invalidates DLT slides)."""
+    paths = [capture] if os.path.isfile(capture) else sorted(
+        os.path.join(capture, f) for f in os.listdir(capture) if f.endswith('.dlt'))
+    return [(os.path.basename(p), os.path.getsize(p), int(os.path.getmtime(p))) for p in paths]
+
+
+def build_presentation(report, dlt=None, dlt_span=20.0, dlt_top=3, cache=None):
+    cache = cache or SlideCache(enabled=False)
+    prs = Presentation()
+    prs.slide_width = Inches(13.33)
+    prs.slide_height = Inches(7.5)
+    # The title carries the generation time, so it is always rebuilt (it is cheap)
+    add_title_slide(prs, report)
+    for model, data in sorted(report['models'].items()):
+        cache.render(prs, 'model', [model, data], lambda: add_model_slide(prs, model, data))
+    stability = {k: report[k] for k in ('offenders', 'failure_by_hour')}
+    cache.render(prs, 'stability', stability, lambda: add_stability_slide(prs, stability))
+    if dlt:
+        add_dlt_slides(prs, report, dlt, dlt_span, dlt_top, cache)
+    cache.prune()
+    return prs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the sanity results deck')
+    parser.add_argument('inputs', nargs='+', help='results/ dir, results_*.json, regression CSVs or results/log')
+    parser.add_argument('--out', default='Sanity_Report.pptx')
+    parser.add_argument('--top', type=int, default=10, help='offenders on the stability slide')
+    parser.add_argument('--dlt', help='DLT capture (.dlt or recorder directory) for failure excerpts')
+    parser.add_argument('--dlt-span', type=float, default=20.0, help='seconds of DLT around each failure')
+    parser.add_argument('--no-cache', action='store_true', help='rebuild every slide')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--no-compact', action='store_true', help='skip layout pruning / media dedup / max compression')
+    parser.add_argument('--max-px', type=int, default=1600, help='downscale embedded images beyond this size')
+    parser.add_argument('--html', help='also write the static HTML dashboard here (e.g. public/report.html)')
+    args = parser.parse_args()
+
+    report = build_report_model(args.inputs, args.top)
+    if args.html:
+        from report_html import write_html
+        write_html(report, args.html)
+        print(f"Dashboard written to {args.html}")
+    cache = SlideCache(args.cache_dir, enabled=not args.no_cache)
+    prs = build_presentation(report, args.dlt, args.dlt_span, cache=cache)
+    prs.save(args.out)
+    print(f"\nReport saved to: {args.out}")
+    if not args.no_compact:
+        print(f"Compacted: {format_report(compact(args.out, max_px=args.max_px))}")
+    print(f"Slides: {len(prs.slides)}  (cached: {cache.hits}, rebuilt: {cache.misses + 1})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+/**
+ * Device Identity - per-device facts that only change when the device reboots
+ * or a write command changes them.
+ *
+ * SW version (and with it BMW vs Toyota and the sldd path), IMEI and region
+ * are read once per boot and then served from here; /api/device-status only
+ * re-reads the dynamic state (SIM, service, radio). Each entry is tied to the
+ * kernel boot id, so a reboot - including one nobody asked this server for -
+ * invalidates it on the next poll. Writes made through the server
+ * (factorySetimei, set-region) drop the affected field straight away.
+ */
+
+// Regenerated by the kernel on every boot; one cheap `cat` per status poll
+const BOOT_ID_FILE = '/proc/sys/kernel/random/boot_id';
+
+/** The boot id in `cat` output, or '' - a shell error or banner on stdout is not one. */
+const parseBootId = (stdout) => {
+    const id = String(stdout || '').trim();
+    return /^[0-9a-f-]{36}$/i.test(id) ? id : '';
+};
+
+const BMW_SLDD = '/usr/bin/factory/sldd';
+
+const isBmwVersion = (swVersion) => !!swVersion && swVersion.includes('WAVE');
+
+/** sldd binary for a device running `swVersion` (BMW images keep it under /usr/bin/factory). */
+const slddFor = (swVersion) => (isBmwVersion(swVersion) ? BMW_SLDD : 'sldd');
+
+class DeviceIdentityCache {
+    constructor() {
+        this.entries = new Map(); // "<binary>_<serial>" -> { bootId, swVersion, imei, region, learnedAt }
+        this.generations = new Map(); // same key -> bumped by every forget()
+        this.reboots = 0;
+        this.invalidations = 0;
+    }
+
+    /**
+     * Facts for `key` learned during boot `bootId`; an entry from an earlier
+     * boot is dropped. Without a boot id (read failed) the last entry is
+     * returned as-is rather than forcing a full re-read of a struggling device.
+     */
+    get(key, bootId) {
+        const entry = this.entries.get(key);
+        if (!entry) return null;
+        if (bootId && entry.bootId !== bootId) {
+            this.entries.delete(key);
+            this.reboots++;
+            console.log(`[IDENTITY] ${key} rebooted - identity re-read`);
+            return null;
+        }
+        return entry;
+    }
+
+    /** Last known entry regardless of boot (e.g. to pick the sldd path for a write). */
+    peek(key) {
+        return this.entries.get(key) || null;
+    }
+
+    /** Bumped whenever facts of `key` are forgotten; take it before reading the device. */
+    generation(key) {
+        return this.generations.get(key) || 0;
+    }
+
+    /**
+     * Merge `facts` into the entry for `key` / `bootId`. Empty values are not stored.
+     * With `generation`, facts read before a write that has since been forgotten are dropped.
+     */
+    set(key, bootId, facts, generation) {
+        if (generation !== undefined && generation !== this.generation(key)) return null;
+        let entry = this.entries.get(key);
+        if (!entry || (bootId && entry.bootId !== bootId)) {
+            entry = { bootId, learnedAt: Date.now() };
+            this.entries.set(key, entry);
+        }
+        for (const [field, value] of Object.entries(facts)) {
+            if (value) entry[field] = value;
+        }
+        return entry;
+    }
+
+    /** A write changed some facts: forget `fields` (all of them when omitted). */
+    forget(key, fields) {
+        this.generations.set(key, this.generation(key) + 1);
+        const entry = this.entries.get(key);
+        if (!entry) return;
+        this.invalidations++;
+        if (!fields) {
+            this.entries.delete(key);
+            return;
+        }
+        for (const field of fields) delete entry[field];
+    }
+
+    list() {
+        return [...this.entries.entries()].map(([key, e]) => ({ key, ...e }));
+    }
+
+    stats() {
+        return { devices: this.entries.size, reboots: this.reboots, invalidations: this.invalidations };
+    }
+}
+
+module.exports = { DeviceIdentityCache, BOOT_ID_FILE, parseBootId, isBmwVersion, slddFor };
@@ -0,0 +1,337 @@
+"""
+Telephony Manager - DLT Storage File Parser
+Memory-maps DLT storage files (as written by DLT Viewer or the server's DLT
+recorder), locates every message with vectorized numpy scanning and builds a
+columnar index (offset, timestamp, ECU, APID, CTID, level) so windows and
+filters are resolved without touching the payload bytes. Messages are only
+decoded when they are actually iterated.
+
+Usage:
+    python dlt_parser.py capture.dlt --start 2026-02-02T08:37:00 --end 2026-02-02T08:37:30 --apid TELE
+    python dlt_parser.py dlt_captures/<serial>/ --around 2026-02-02T08:37:08 --out failure_window.dlt
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+STORAGE_MAGIC = b'DLT\x01'
+STORAGE_HEADER_SIZE = 16
+SCAN_CHUNK = 64 * 1024 * 1024  # bytes scanned per vectorized pass (bounds peak memory)
+
+# Standard header HTYP flags
+UEH = 0x01   # extended header present
+MSBF = 0x02  # payload is big endian
+WEID = 0x04  # ECU ID present
+WSID = 0x08  # session ID present
+WTMS = 0x10  # timestamp present
+
+LOG_LEVELS = {1: 'FATAL', 2: 'ERROR', 3: 'WARN', 4: 'INFO', 5: 'DEBUG', 6: 'VERBOSE'}
+
+INDEX_DTYPE = np.dtype([
+    ('offset', np.int64),   # start of storage header in the file
+    ('length', np.int32),   # storage header + message
+    ('time', np.float64),   # storage header timestamp (epoch seconds)
+    ('ecu', 'S4'),
+    ('apid', 'S4'),
+    ('ctid', 'S4'),
+    ('level', np.int8),     # log level for log messages, 0 otherwise
+])
+
+DltMessage = namedtuple('DltMessage', 'time ecu apid ctid level counter payload raw')
+
+
+def _gather(buf, starts, width):
+    """Gather `width` bytes at every offset in `starts` -> (n, width) uint8 array."""
+    return buf[starts[:, None] + np.arange(width)]
+
+
+def _as_id(block):
+    """(n, 4) uint8 -> S4 array with trailing NULs stripped by numpy."""
+    return np.ascontiguousarray(block).view('S4').ravel()
+
+
+def scan_offsets(buf):
+    """
+    Return the offsets of all storage headers in `buf` (a uint8 array).
+    Candidates are found with a vectorized magic-byte search; false positives
+    inside payloads are dropped by requiring the length chain to line up.
+    """
+    size = buf.size
+    candidates = []
+    for start in range(0, size, SCAN_CHUNK):
+        stop = min(size, start + SCAN_CHUNK + 3)
+        a = buf[start:stop]
+        if a.size < 4:
+            break
+        hit = (a[:-3] == 0x44) & (a[1:-2] == 0x4C) & (a[2:-1] == 0x54) & (a[3:] == 0x01)
+        candidates.append(np.flatnonzero(hit).astype(np.int64) + start)
+    if not candidates:
+        return np.empty(0, dtype=np.int64)
+    cand = np.unique(np.concatenate(candidates))
+    cand = cand[cand + STORAGE_HEADER_SIZE + 4 <= size]
+    if cand.size == 0:
+        return cand
+
+    std = cand + STORAGE_HEADER_SIZE
+    lengths = (buf[std + 2].astype(np.int64) << 8) | buf[std + 3]
+    nxt = std + lengths
+
+    # A real header is followed by another header (or EOF) and is itself the
+    # successor of a real header (or the first one in the file)
+    lands = np.isin(nxt, cand) | (nxt == size)
+    valid = cand[lands & (lengths >= 4)]
+    pointed = np.isin(valid, nxt[lands])
+    if valid.size:
+        pointed[0] = True
+    return valid[pointed]
+
+
+def build_index(buf):
+    """Build the columnar message index for a memory-mapped storage file."""
+    offsets = scan_offsets(buf)
+    index = np.zeros(offsets.size, dtype=INDEX_DTYPE)
+    if offsets.size == 0:
+        return index
+
+    storage = _gather(buf, offsets, STORAGE_HEADER_SIZE)
+    secs = storage[:, 4:8].copy().view('<u4').ravel().astype(np.float64)
+    usecs = storage[:, 8:12].copy().view('<i4').ravel().astype(np.float64)
+
+    std = offsets + STORAGE_HEADER_SIZE
+    htyp = buf[std]
+    lengths = (buf[std + 2].astype(np.int64) << 8) | buf[std + 3]
+
+    # ECU from the standard header when present, else from the storage header
+    ecu = _as_id(storage[:, 12:16])
+    has_ecu = (htyp & WEID) != 0
+    if has_ecu.any():
+        ecu[has_ecu] = _as_id(_gather(buf, std[has_ecu] + 4, 4))
+
+    ext = std + 4 + 4 * ((htyp & WEID) != 0) + 4 * ((htyp & WSID) != 0) + 4 * ((htyp & WTMS) != 0)
+    has_ext = ((htyp & UEH) != 0) & (ext + 10 <= std + lengths)
+
+    apid = np.zeros(offsets.size, dtype='S4')
+    ctid = np.zeros(offsets.size, dtype='S4')
+    level = np.zeros(offsets.size, dtype=np.int8)
+    if has_ext.any():
+        ext_block = _gather(buf, ext[has_ext], 10)
+        msin = ext_block[:, 0]
+        apid[has_ext] = _as_id(ext_block[:, 2:6])
+        ctid[has_ext] = _as_id(ext_block[:, 6:10])
+        is_log = ((msin >> 1) & 0x07) == 0
+        level[has_ext] = np.where(is_log, (msin >> 4) & 0x0F, 0)
+
+    index['offset'] = offsets
+    index['length'] = STORAGE_HEADER_SIZE + lengths
+    index['time'] = secs + usecs / 1e6
+    index['ecu'] = ecu
+    index['apid'] = apid
+    index['ctid'] = ctid
+    index['level'] = level
+    return index
+
+
+def _decode_verbose(payload, noar, big_endian):
+    """Decode the common verbose argument types (strings, ints, bools); stop on anything else."""
+    end = '>' if big_endian else '<'
+    parts = []
+    pos = 0
+    for _ in range(noar):
+        if pos + 4 > len(payload):
+            break
+        tinfo = struct.unpack_from(end + 'I', payload, pos)[0]
+        pos += 4
+        tyle = tinfo & 0x0F
+        size = {1: 1, 2: 2, 3: 4, 4: 8}.get(tyle, 0)
+        if tinfo & 0x200 or tinfo & 0x400:  # STRG / RAWD
+            n = struct.unpack_from(end + 'H', payload, pos)[0]
+            data = payload[pos + 2:pos + 2 + n]
+            pos += 2 + n
+            if tinfo & 0x200:
+                parts.append(data.rstrip(b'\x00').decode('utf-8', 'replace'))
+            else:
+                parts.append(data.hex())
+        elif tinfo & 0x10 and size:  # BOOL
+            parts.append(str(bool(payload[pos])))
+            pos += size
+        elif tinfo & 0x60 and size:  # SINT / UINT
+            fmt = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}[size]
+            if tinfo & 0x40:
+                fmt = fmt.upper()
+            parts.append(str(struct.unpack_from(end + fmt, payload, pos)[0]))
+            pos += size
+        else:
+            parts.append(payload[pos - 4:].hex())
+            break
+    return ' '.join(parts)
+
+
+class DltFile:
+    """A memory-mapped DLT storage file with a lazily built message index."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, 'rb')
+        size = os.fstat(self._fh.fileno()).st_size
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.buf = np.frombuffer(self._mm, dtype=np.uint8) if self._mm else np.empty(0, dtype=np.uint8)
+        self._index = None
+
+    def close(self):
+        self.buf = None
+        if self._mm:
+            self._mm.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = build_index(self.buf)
+        return self._index
+
+    def select(self, start=None, end=None, ecu=None, apid=None, ctid=None, max_level=None):
+        """Boolean mask of messages matching all given filters (times in epoch seconds)."""
+        idx = self.index
+        mask = np.ones(idx.size, dtype=bool)
+        if start is not None:
+            mask &= idx['time'] >= start
+        if end is not None:
+            mask &= idx['time'] <= end
+        for field, value in (('ecu', ecu), ('apid', apid), ('ctid', ctid)):
+            if value:
+                values = [value] if isinstance(value, str) else list(value)
+                mask &= np.isin(idx[field], [v.encode('ascii') for v in values])
+        if max_level is not None:
+            mask &= (idx['level'] > 0) & (idx['level'] <= max_level)
+        return mask
+
+    def messages(self, mask=None):
+        """Lazily decode the messages selected by `mask` (all messages if None)."""
+        idx = self.index if mask is None else self.index[mask]
+        mm = self._mm
+        for row in idx:
+            off = int(row['offset'])
+            raw = mm[off:off + int(row['length'])]
+            std = STORAGE_HEADER_SIZE
+            htyp = raw[std]
+            pos = std + 4 + 4 * bool(htyp & WEID) + 4 * bool(htyp & WSID) + 4 * bool(htyp & WTMS)
+            payload = raw[pos + 10:] if htyp & UEH else raw[pos:]
+            if htyp & UEH and raw[pos] & 0x01:
+                text = _decode_verbose(payload, raw[pos + 1], bool(htyp & MSBF))
+            else:
+                text = payload.hex()
+            yield DltMessage(
+                time=float(row['time']),
+                ecu=row['ecu'].decode('ascii', 'replace'),
+                apid=row['apid'].decode('ascii', 'replace'),
+                ctid=row['ctid'].decode('ascii', 'replace'),
+                level=LOG_LEVELS.get(int(row['level']), ''),
+                counter=raw[std + 1],
+                payload=text,
+                raw=raw,
+            )
+
+    def write(self, out, mask):
+        """Copy the selected messages verbatim into `out` (a binary file object) -> count."""
+        idx = self.index[mask]
+        mm = self._mm
+        for off, length in zip(idx['offset'].tolist(), idx['length'].tolist()):
+            out.write(mm[off:off + length])
+        return idx.size
+
+
+def open_capture(path):
+    """Open a storage file, or every segment of a recorder directory in time order."""
+    if os.path.isdir(path):
+        names = sorted((f for f in os.listdir(path) if f.endswith('.dlt')),
+                       key=lambda f: int(f[:-4]) if f[:-4].isdigit() else f)
+        return [DltFile(os.path.join(path, f)) for f in names]
+    return [DltFile(path)]
+
+
+def extract_window(files, start, end, **filters):
+    """Yield matching messages across one or more DltFile objects."""
+    for f in files:
+        if f.index.size == 0 or f.index['time'][-1] < start or f.index['time'][0] > end:
+            continue
+        yield from f.messages(f.select(start=start, end=end, **filters))
+
+
+def format_message(msg):
+    ts = datetime.fromtimestamp(msg.time).strftime('%H:%M:%S.%f')[:-3]
+    return f"{ts} {msg.ecu:<4} {msg.apid:<4} {msg.ctid:<4} {msg.level:<7} {msg.payload}"
+
+
+def excerpt_lines(files, start, end, limit=40, **filters):
+    """Formatted text lines for a window, capped at `limit` (for report slides)."""
+    lines = []
+    for msg in extract_window(files, start, end, **filters):
+        if len(lines) >= limit:
+            lines.append('...')
+            break
+        lines.append(format_message(msg))
+    return lines
+
+
+def parse_time(value):
+    """Epoch seconds/milliseconds or an ISO timestamp -> epoch seconds."""
+    try:
+        t = float(value)
+        return t / 1000 if t > 1e11 else t
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Filter and extract DLT storage captures')
+    parser.add_argument('capture', help='.dlt file or DLT recorder segment directory')
+    parser.add_argument('--start', help='window start (ISO or epoch)')
+    parser.add_argument('--end', help='window end (ISO or epoch)')
+    parser.add_argument('--around', help='center a window on this time (ISO or epoch)')
+    parser.add_argument('--span', type=float, default=30.0, help='window length in seconds for --around')
+    parser.add_argument('--ecu')
+    parser.add_argument('--apid', action='append')
+    parser.add_argument('--ctid', action='append')
+    parser.add_argument('--level', type=int, help='maximum log level (1=FATAL .. 6=VERBOSE)')
+    parser.add_argument('--out', help='write matching messages to this .dlt file')
+    parser.add_argument('--limit', type=int, default=200, help='messages to print when not writing')
+    args = parser.parse_args()
+
+    if args.around:
+        center = parse_time(args.around)
+        start, end = center - args.span / 2, center + args.span / 2
+    else:
+        start = parse_time(args.start) if args.start else float('-inf')
+        end = parse_time(args.end) if args.end else float('inf')
+    filters = dict(ecu=args.ecu, apid=args.apid, ctid=args.ctid, max_level=args.level)
+
+    files = open_capture(args.capture)
+    try:
+        if args.out:
+            count = 0
+            with open(args.out, 'wb') as out:
+                for f in files:
+                    count += f.write(out, f.select(start=start, end=end, **filters))
+            print(f"Wrote {count} messages to {args.out}")
+        else:
+            for line in excerpt_lines(files, start, end, limit=args.limit, **filters):
+                print(line)
+    finally:
+        for f in files:
+            f.close()
+
+
+if __name__ == '__main__':
+    main()
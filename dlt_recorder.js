@@ -0,0 +1,374 @@
+/**
+ * DLT Recorder - captures a device's DLT stream to disk.
+ *
+ * Each recorder holds its own TCP connection to an ADB-forwarded dlt-daemon
+ * port and writes every message, prefixed with a DLT storage header, into
+ * size-rotated segment files. A sparse timestamp -> offset index is written
+ * next to every segment so a time window can be located and replayed later
+ * without scanning (or buffering) the whole capture.
+ *
+ * Layout on disk:
+ *   <rootDir>/<serial>/<segmentStartMs>.dlt   DLT storage file (DLT Viewer compatible)
+ *   <rootDir>/<serial>/<segmentStartMs>.idx   "<timestampMs> <byteOffset>" per line
+ */
+
+const net = require('net');
+const fs = require('fs');
+const path = require('path');
+const { Readable } = require('stream');
+
+const STORAGE_MAGIC = Buffer.from('DLT\x01', 'latin1');
+const SERIAL_MAGIC = Buffer.from('DLS\x01', 'latin1');
+const STORAGE_HEADER_SIZE = 16;
+const READ_CHUNK = 256 * 1024;
+
+const DEFAULTS = {
+    segmentBytes: 16 * 1024 * 1024,  // rotate after 16 MB
+    maxSegments: 64,                 // keep at most ~1 GB per device
+    indexIntervalMs: 1000,           // one index entry per second...
+    indexIntervalBytes: 256 * 1024,  // ...or per 256 KB, whichever comes first
+    reconnectDelay: 2000
+};
+
+// Serials may contain ':' (ADB over TCP) which is not a valid path character on Windows
+const safeSerial = (serial) => String(serial || 'default').replace(/[^A-Za-z0-9._-]/g, '_');
+
+/**
+ * Build a 16-byte DLT storage header for a message received at `timestampMs`.
+ */
+const buildStorageHeader = (timestampMs, ecuId) => {
+    const header = Buffer.alloc(STORAGE_HEADER_SIZE);
+    STORAGE_MAGIC.copy(header, 0);
+    header.writeUInt32LE(Math.floor(timestampMs / 1000), 4);
+    header.writeInt32LE((timestampMs % 1000) * 1000, 8);
+    if (ecuId) ecuId.copy(header, 12, 0, 4);
+    return header;
+};
+
+/**
+ * Extract complete DLT messages from a TCP buffer.
+ * Returns { messages: Buffer[], rest: Buffer, skipped: number } where `skipped`
+ * counts bytes dropped while resynchronising on a corrupt stream.
+ */
+const splitMessages = (buffer) => {
+    const messages = [];
+    let offset = 0;
+    let skipped = 0;
+
+    while (buffer.length - offset >= 4) {
+        // Optional serial header some daemons prepend to every message
+        if (buffer.compare(SERIAL_MAGIC, 0, 4, offset, offset + 4) === 0) {
+            offset += 4;
+            continue;
+        }
+
+        const htyp = buffer[offset];
+        const len = buffer.readUInt16BE(offset + 2);
+        const version = (htyp >> 5) & 0x07;
+        if (version !== 1 || len < 4) {
+            offset++;
+            skipped++;
+            continue;
+        }
+        if (buffer.length - offset < len) break;
+
+        messages.push(buffer.subarray(offset, offset + len));
+        offset += len;
+    }
+
+    return { messages, rest: buffer.subarray(offset), skipped };
+};
+
+/**
+ * ECU ID of a standard-header message, if the WEID flag is set.
+ */
+const ecuIdOf = (message) => {
+    const htyp = message[0];
+    if ((htyp & 0x04) && message.length >= 8) return message.subarray(4, 8);
+    return null;
+};
+
+class DltRecorder {
+    /**
+     * @param {object} options
+     * @param {string} options.rootDir   Capture root directory
+     * @param {string} options.serial    Device serial (used as sub directory)
+     * @param {number} options.port      Local TCP port forwarded to the device's dlt-daemon
+     */
+    constructor(options) {
+        this.options = { ...DEFAULTS, ...options };
+        this.serial = options.serial;
+        this.port = options.port;
+        this.dir = path.join(options.rootDir, safeSerial(options.serial));
+
+        this.socket = null;
+        this.segment = null;      // { name, startMs, file, bytes, lastIndexMs, lastIndexBytes }
+        this.pending = Buffer.alloc(0);
+        this.active = false;
+        this.reconnectTimer = null;
+
+        this.stats = {
+            startedAt: null,
+            messages: 0,
+            bytes: 0,
+            skippedBytes: 0,
+            segmentsWritten: 0,
+            reconnects: 0,
+            connected: false
+        };
+    }
+
+    start() {
+        if (this.active) return;
+        this.active = true;
+        this.stats.startedAt = Date.now();
+        fs.mkdirSync(this.dir, { recursive: true });
+        this._connect();
+        console.log(`[DLT REC] Recording ${this.serial} (tcp:${this.port}) -> ${this.dir}`);
+    }
+
+    async stop() {
+        this.active = false;
+        clearTimeout(this.reconnectTimer);
+        if (this.socket) this.socket.destroy();
+        this.socket = null;
+        await this._closeSegment();
+        console.log(`[DLT REC] Stopped ${this.serial} (${this.stats.messages} messages, ${this.stats.bytes} bytes)`);
+    }
+
+    status() {
+        return {
+            serial: this.serial,
+            port: this.port,
+            active: this.active,
+            currentSegment: this.segment ? this.segment.name : null,
+            ...this.stats
+        };
+    }
+
+    _connect() {
+        if (!this.active) return;
+        const socket = net.connect(this.port, '127.0.0.1');
+        this.socket = socket;
+
+        socket.on('connect', () => {
+            this.stats.connected = true;
+            this.pending = Buffer.alloc(0);
+        });
+        socket.on('data', (chunk) => this._onData(chunk));
+        socket.on('error', (err) => {
+            console.warn(`[DLT REC] ${this.serial} socket error: ${err.message}`);
+        });
+        socket.on('close', () => {
+            this.stats.connected = false;
+            if (!this.active) return;
+            // Device rebooted or forward dropped - keep trying until stopped
+            this.stats.reconnects++;
+            this.reconnectTimer = setTimeout(() => this._connect(), this.options.reconnectDelay);
+        });
+    }
+
+    _onData(chunk) {
+        const buffer = this.pending.length ? Buffer.concat([this.pending, chunk]) : chunk;
+        const { messages, rest, skipped } = splitMessages(buffer);
+        // Copy the tail so we don't pin the whole socket chunk in memory
+        this.pending = Buffer.from(rest);
+        this.stats.skippedBytes += skipped;
+
+        const now = Date.now();
+        for (const msg of messages) this._write(now, msg);
+
+        // Disk is slower than the device - stop reading until the file stream drains
+        if (this.segment && this.segment.file.writableNeedDrain && this.socket) {
+            const socket = this.socket;
+            socket.pause();
+            this.segment.file.once('drain', () => socket.resume());
+        }
+    }
+
+    _write(timestampMs, message) {
+        if (!this.segment || this.segment.bytes >= this.options.segmentBytes) {
+            this._rotate(timestampMs);
+        }
+        const seg = this.segment;
+
+        // Sparse index: the offset always points at a storage header boundary
+        if (seg.lastIndexMs === null ||
+            timestampMs - seg.lastIndexMs >= this.options.indexIntervalMs ||
+            seg.bytes - seg.lastIndexBytes >= this.options.indexIntervalBytes) {
+            fs.appendFileSync(seg.indexPath, `${timestampMs} ${seg.bytes}\n`);
+            seg.lastIndexMs = timestampMs;
+            seg.lastIndexBytes = seg.bytes;
+        }
+
+        const header = buildStorageHeader(timestampMs, ecuIdOf(message));
+        seg.bytes += header.length + message.length;
+        this.stats.messages++;
+        this.stats.bytes += header.length + message.length;
+        seg.file.write(header);
+        seg.file.write(message);
+    }
+
+    _rotate(timestampMs) {
+        this._closeSegment();
+
+        const name = String(timestampMs);
+        const dataPath = path.join(this.dir, `${name}.dlt`);
+        this.segment = {
+            name,
+            startMs: timestampMs,
+            dataPath,
+            indexPath: path.join(this.dir, `${name}.idx`),
+            file: fs.createWriteStream(dataPath, { flags: 'a' }),
+            bytes: 0,
+            lastIndexMs: null,
+            lastIndexBytes: 0
+        };
+        this.stats.segmentsWritten++;
+        this._enforceRetention();
+    }
+
+    _closeSegment() {
+        const seg = this.segment;
+        this.segment = null;
+        if (!seg) return Promise.resolve();
+        return new Promise((resolve) => seg.file.end(resolve));
+    }
+
+    _enforceRetention() {
+        try {
+            // The new segment's file may not exist yet, so count only the closed ones
+            const segments = listSegments(this.dir).filter(s => s.name !== this.segment.name);
+            const excess = segments.length - (this.options.maxSegments - 1);
+            for (let i = 0; i < excess; i++) {
+                fs.rmSync(segments[i].dataPath, { force: true });
+                fs.rmSync(segments[i].indexPath, { force: true });
+            }
+        } catch (e) {
+            console.error(`[DLT REC] Retention cleanup failed for ${this.serial}:`, e.message);
+        }
+    }
+}
+
+/**
+ * List the segments of one device directory, oldest first.
+ */
+const listSegments = (dir) => {
+    if (!fs.existsSync(dir)) return [];
+    return fs.readdirSync(dir)
+        .filter(f => f.endsWith('.dlt'))
+        .map(f => {
+            const name = f.slice(0, -4);
+            const dataPath = path.join(dir, f);
+            return {
+                name,
+                startMs: parseInt(name, 10),
+                dataPath,
+                indexPath: path.join(dir, `${name}.idx`),
+                bytes: fs.statSync(dataPath).size
+            };
+        })
+        .filter(s => !isNaN(s.startMs))
+        .sort((a, b) => a.startMs - b.startMs);
+};
+
+const readIndex = (indexPath) => {
+    if (!fs.existsSync(indexPath)) return [];
+    return fs.readFileSync(indexPath, 'utf8')
+        .split('\n')
+        .filter(Boolean)
+        .map(line => {
+            const [ts, offset] = line.split(' ');
+            return { ts: parseInt(ts, 10), offset: parseInt(offset, 10) };
+        });
+};
+
+/**
+ * Summarise every recorded device under `rootDir`.
+ */
+const listRecordings = (rootDir) => {
+    if (!fs.existsSync(rootDir)) return [];
+    return fs.readdirSync(rootDir, { withFileTypes: true })
+        .filter(d => d.isDirectory())
+        .map(d => {
+            const segments = listSegments(path.join(rootDir, d.name));
+            if (segments.length === 0) return null;
+            const last = segments[segments.length - 1];
+            const lastIndex = readIndex(last.indexPath).pop();
+            return {
+                serial: d.name,
+                segments: segments.length,
+                bytes: segments.reduce((sum, s) => sum + s.bytes, 0),
+                fromMs: segments[0].startMs,
+                toMs: lastIndex ? lastIndex.ts : last.startMs
+            };
+        })
+        .filter(Boolean);
+};
+
+/**
+ * Stream the recorded messages of `serial` between fromMs and toMs (inclusive).
+ * With `stripStorageHeader` the output is a raw daemon-style stream suitable
+ * for a live DLT Viewer TCP connection; otherwise it is a valid .dlt file.
+ */
+const createWindowStream = (rootDir, serial, fromMs, toMs, { stripStorageHeader = false } = {}) => {
+    const segments = listSegments(path.join(rootDir, safeSerial(serial)));
+
+    async function* generate() {
+        for (let i = 0; i < segments.length; i++) {
+            const seg = segments[i];
+            const nextStart = i + 1 < segments.length ? segments[i + 1].startMs : Infinity;
+            if (nextStart <= fromMs) continue;   // segment ends before the window
+            if (seg.startMs > toMs) break;       // segment starts after the window
+
+            // Seek to the last index entry at or before the window start
+            let position = 0;
+            for (const entry of readIndex(seg.indexPath)) {
+                if (entry.ts > fromMs) break;
+                position = entry.offset;
+            }
+
+            const handle = await fs.promises.open(seg.dataPath, 'r');
+            try {
+                let pending = Buffer.alloc(0);
+                let done = false;
+                while (!done) {
+                    const chunk = Buffer.alloc(READ_CHUNK);
+                    const { bytesRead } = await handle.read(chunk, 0, READ_CHUNK, position);
+                    if (bytesRead === 0) break;
+                    position += bytesRead;
+
+                    let buffer = pending.length ? Buffer.concat([pending, chunk.subarray(0, bytesRead)]) : chunk.subarray(0, bytesRead);
+                    const out = [];
+                    let offset = 0;
+                    while (buffer.length - offset >= STORAGE_HEADER_SIZE + 4) {
+                        const len = buffer.readUInt16BE(offset + STORAGE_HEADER_SIZE + 2);
+                        const total = STORAGE_HEADER_SIZE + len;
+                        if (buffer.length - offset < total) break;
+
+                        const ts = buffer.readUInt32LE(offset + 4) * 1000 + Math.floor(buffer.readInt32LE(offset + 8) / 1000);
+                        if (ts > toMs) { done = true; break; }
+                        if (ts >= fromMs) {
+                            out.push(buffer.subarray(offset + (stripStorageHeader ? STORAGE_HEADER_SIZE : 0), offset + total));
+                        }
+                        offset += total;
+                    }
+                    pending = Buffer.from(buffer.subarray(offset));
+                    if (out.length) yield Buffer.concat(out);
+                }
+            } finally {
+                await handle.close();
+            }
+        }
+    }
+
+    return Readable.from(generate());
+};
+
+module.exports = {
+    DltRecorder,
+    listRecordings,
+    createWindowStream,
+    safeSerial,
+    splitMessages
+};
@@ -0,0 +1,230 @@
+"""
+Telephony Manager - Fake ADB binary for load testing
+Stands in for adb/adb1 so server.js can be driven by many simulated users
+without a device rack. It understands the subset of adb the server uses
+(devices, connect, forward, root, reboot, -s <serial> shell ...) and answers
+sldd telephony/region queries in the same format as real devices.
+
+Point the server at it with:
+    ADB_COMMAND="python3 /path/to/fake_adb.py" node server.js
+
+Behaviour is controlled through environment variables (inherited from server.js):
+    FAKE_ADB_DEVICES   number of simulated devices (default 10)
+    FAKE_ADB_PROFILE   fast | typical | slow | flaky, or a path to a JSON profile
+    FAKE_ADB_SEED      optional RNG seed for reproducible runs
+    FAKE_ADB_STATE     directory for per-device boot ids (default: the temp dir);
+                       `reboot` gives the device a new one, like the kernel does
+
+A JSON profile looks like:
+    {"latency": {"default": [150, 50], "telephony getservicestate": [800, 200]},
+     "failRate": 0.02, "hangRate": 0.001, "offline": ["FAKE0003"]}
+Latencies are [mean_ms, jitter_ms]; a "hang" sleeps past the server timeout.
+"""
+
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+import uuid
+
+PROFILES = {
+    'fast': {'latency': {'default': [20, 5]}, 'failRate': 0.0, 'hangRate': 0.0},
+    'typical': {
+        'latency': {
+            'default': [150, 60],
+            'devices': [15, 5],
+            'telephony getservicestate': [600, 250],
+            'telephony getimei': [250, 80],
+            'region sethalsystemnation': [1200, 400],
+        },
+        'failRate': 0.01,
+        'hangRate': 0.0,
+    },
+    'slow': {'latency': {'default': [1500, 700], 'devices': [40, 20]}, 'failRate': 0.02, 'hangRate': 0.002},
+    'flaky': {'latency': {'default': [400, 300]}, 'failRate': 0.15, 'hangRate': 0.01},
+}
+
+BANNER = '-----------------------------------------------------------'
+
+
+def load_profile():
+    name = os.environ.get('FAKE_ADB_PROFILE', 'typical')
+    if os.path.isfile(name):
+        with open(name, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return PROFILES.get(name, PROFILES['typical'])
+
+
+def device_serials():
+    count = int(os.environ.get('FAKE_ADB_DEVICES', '10'))
+    return [f'FAKE{i:04d}' for i in range(count)]
+
+
+def boot_id(serial, reboot=False):
+    """The device's /proc/sys/kernel/random/boot_id, kept on disk across adb invocations."""
+    state = os.environ.get('FAKE_ADB_STATE', tempfile.gettempdir())
+    path = os.path.join(state, f'fake_adb_boot_{serial}')
+    if not reboot and os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    value = str(uuid.uuid4())
+    os.makedirs(state, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(value)
+    return value
+
+
+def block(title, *lines):
+    return '\n'.join([BANNER, f'    {title}', BANNER] + [f' -> {line}' for line in lines])
+
+
+def sldd_response(serial, args):
+    """Emulate `sldd <module> <command> [params]` output."""
+    module = args[0] if args else ''
+    cmd = args[1] if len(args) > 1 else ''
+    params = args[2:]
+    device_no = int(serial[-4:]) if serial[-4:].isdigit() else 0
+
+    if module == 'telephony':
+        if cmd == 'getsimstate':
+            return block('Get SIM state', 'SIM state : 5 (Ready)')
+        if cmd == 'getimei':
+            return block('Get IMEI', f'IMEI : 3512591600{device_no:05d}')
+        if cmd == 'getservicestate':
+            return block('Get service state', 'Voice service state : 0', 'Data service state : 0')
+        if cmd == 'getradiostate':
+            return block('Get radio state', 'Radio State :-> 2 (RADIO ON)')
+        if cmd == 'isRadioOn':
+            return block('Is radio on', 'Result : true')
+        if cmd == 'dial':
+            return block('Dial', f'Dial to {params[0] if params else ""}', 'Result : true')
+        if cmd == 'factorySetimei':
+            return block('Factory set IMEI', f'IMEI : {params[0] if params else ""}', 'Result : true')
+        if cmd.startswith('get'):
+            return block(cmd, f'{cmd[3:]} : 0', 'Result : true')
+        return block(cmd, 'Result : true')
+    if module == 'region':
+        if cmd == 'getnation':
+            return block('Get nation', 'LGE nation : 4378')
+        if cmd == 'getRegionInfo':
+            return block('Get region info', 'LGE Region info : KR')
+        if cmd == 'sethalsystemnation':
+            return block('Set hal system nation', f'nation : {params[0] if params else ""}', 'Result : true')
+    return block(f'{module} {cmd}', 'Result : true')
+
+
+def shell_response(serial, command):
+    """Handle one shell command line (may contain several ';'-separated commands)."""
+    outputs = []
+    for part in command.replace('"', '').split(';'):
+        tokens = part.split()
+        if not tokens:
+            continue
+        if tokens[0].endswith('sldd'):
+            outputs.append(sldd_response(serial, tokens[1:]))
+        elif tokens[0] == 'whoami':
+            outputs.append('root')
+        elif tokens[:2] == ['cat', '/proc/sys/kernel/random/boot_id']:
+            outputs.append(boot_id(serial))
+        elif tokens[:2] == ['cat', 'etc/version']:
+            # Every fourth device pretends to be a BMW (WAVE) unit
+            outputs.append('WAVE_HIGH_V2.1' if int(serial[-1:] or 0) % 4 == 3 else 'TOYOTA_24DCM_V1.0.3')
+        elif tokens[0] == 'echo':
+            outputs.append(' '.join(tokens[1:]))
+        else:
+            outputs.append(f'/system/bin/sh: {tokens[0]}: not found')
+    return '\n'.join(outputs)
+
+
+def latency_for(profile, key):
+    table = profile.get('latency', {})
+    mean, jitter = table.get(key, table.get('default', [100, 30]))
+    return max(0.0, random.gauss(mean, jitter)) / 1000.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main(argv):
+    if os.environ.get('FAKE_ADB_SEED'):
+        random.seed(int(os.environ['FAKE_ADB_SEED']) + os.getpid())
+    profile = load_profile()
+    serials = device_serials()
+    offline = set(profile.get('offline', []))
+
+    serial = None
+    if len(argv) >= 2 and argv[0] == '-s':
+        serial, argv = argv[1], argv[2:]
+    if not argv:
+        print('fake adb: no command', file=sys.stderr)
+        return 1
+
+    cmd = argv[0]
+    if cmd == 'shell':
+        key_tokens = [t for t in ' '.join(argv[1:]).replace('"', '').split() if not t.endswith('sldd')]
+        key = ' '.join(key_tokens[:2])
+    else:
+        key = cmd
+    time.sleep(latency_for(profile, key))
+
+    if cmd == 'version':
+        print('Android Debug Bridge version 1.0.41 (fake)')
+        return 0
+    if cmd == 'devices':
+        print('List of devices attached')
+        for s in serials:
+            print(f"{s}\t{'offline' if s in offline else 'device'}")
+        return 0
+    if cmd == 'connect':
+        target = argv[1] if len(argv) > 1 else ''
+        print(f'failed to connect to {target}')
+        return 1
+    if cmd == 'forward':
+        if '--remove' in argv:
+            return 0
+        local = argv[1] if len(argv) > 1 else ''
+        if local == 'tcp:0':
+            print(free_port())
+        return 0
+    if cmd in ('root', 'wait-for-device'):
+        return 0
+
+    # Everything below needs a device
+    if serial is None:
+        online = [s for s in serials if s not in offline]
+        if len(online) != 1:
+            print('error: more than one device/emulator', file=sys.stderr)
+            return 1
+        serial = online[0]
+    if serial not in serials:
+        print(f"error: device '{serial}' not found", file=sys.stderr)
+        return 1
+    if serial in offline:
+        print('error: device offline', file=sys.stderr)
+        return 1
+
+    if random.random() < profile.get('hangRate', 0.0):
+        time.sleep(60)
+    if random.random() < profile.get('failRate', 0.0):
+        print('error: closed', file=sys.stderr)
+        return 1
+
+    if cmd == 'shell':
+        print(shell_response(serial, ' '.join(argv[1:])))
+        return 0
+    if cmd == 'reboot':
+        boot_id(serial, reboot=True)
+        return 0
+
+    print(f'fake adb: unsupported command {cmd}', file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,192 @@
+/**
+ * Federation - one UI over devices attached to several host PCs.
+ *
+ * Every host runs server.js; the role comes from the environment:
+ *   TM_ROLE=agent        registers its device list with the coordinator every
+ *                        few seconds (TM_COORDINATOR=http://coord:3000,
+ *                        TM_AGENT_NAME, TM_AGENT_URL default http://<ip>:<port>)
+ *   TM_ROLE=coordinator  keeps the agent registry, merges agent devices into
+ *                        /api/devices and forwards device-bound requests
+ *                        (execute, status, DLT, ...) to the agent owning the
+ *                        selected serial
+ *   unset                standalone, as before
+ * TM_FEDERATION_TOKEN, when set on both sides, must accompany registrations
+ * and forwarded requests.
+ *
+ * Forwarded requests share one keep-alive socket pool per agent, so a
+ * regression step costs one HTTP round trip on an already open connection.
+ */
+
+const http = require('http');
+const https = require('https');
+
+const REGISTER_INTERVAL = 5000;
+const AGENT_TTL = 3 * REGISTER_INTERVAL; // an agent missing three registrations is gone
+const FORWARD_TIMEOUT = 60000;           // /api/execute itself allows 30 s per ADB command
+
+const keepAliveAgents = {
+    'http:': new http.Agent({ keepAlive: true, maxSockets: 64 }),
+    'https:': new https.Agent({ keepAlive: true, maxSockets: 64 })
+};
+
+/**
+ * JSON-over-HTTP request on the shared keep-alive pools.
+ * Resolves to { status, headers, body (Buffer), json (parsed or null) }.
+ */
+const request = (url, { method = 'GET', headers = {}, body, timeout = FORWARD_TIMEOUT } = {}) => {
+    return new Promise((resolve, reject) => {
+        const target = new URL(url);
+        const payload = body === undefined ? null : Buffer.from(typeof body === 'string' ? body : JSON.stringify(body));
+        const lib = target.protocol === 'https:' ? https : http;
+        const req = lib.request(target, {
+            method,
+            agent: keepAliveAgents[target.protocol],
+            headers: {
+                ...headers,
+                ...(payload ? { 'Content-Type': 'application/json', 'Content-Length': payload.length } : {})
+            },
+            timeout
+        }, (res) => {
+            const chunks = [];
+            res.on('data', (c) => chunks.push(c));
+            res.on('end', () => {
+                const buf = Buffer.concat(chunks);
+                let json = null;
+                if ((res.headers['content-type'] || '').includes('application/json')) {
+                    try { json = JSON.parse(buf.toString('utf8')); } catch (e) { /* leave raw */ }
+                }
+                resolve({ status: res.statusCode, headers: res.headers, body: buf, json });
+            });
+            res.on('error', reject);
+        });
+        req.on('timeout', () => req.destroy(new Error(`timed out after ${timeout} ms`)));
+        req.on('error', reject);
+        if (payload) req.write(payload);
+        req.end();
+    });
+};
+
+class Coordinator {
+    constructor({ token = '', ttlMs = AGENT_TTL } = {}) {
+        this.token = token;
+        this.ttlMs = ttlMs;
+        this.agents = new Map(); // name -> { name, url, devices, lastSeen, registeredAt, forwarded, errors }
+    }
+
+    authorized(token) {
+        return !this.token || token === this.token;
+    }
+
+    register({ name, url, devices = [] }) {
+        if (!name || !url) throw new Error('name and url required');
+        let agent = this.agents.get(name);
+        if (!agent) {
+            agent = { name, registeredAt: Date.now(), forwarded: 0, errors: 0 };
+            this.agents.set(name, agent);
+            console.log(`[FEDERATION] Agent ${name} joined (${url}, ${devices.length} device(s))`);
+        }
+        agent.url = url.replace(/\/+$/, '');
+        agent.devices = devices.map(d => ({ id: String(d.id), status: String(d.status) }));
+        agent.lastSeen = Date.now();
+        return agent;
+    }
+
+    /** Agents heard from within the TTL; stale ones are dropped. */
+    live() {
+        const now = Date.now();
+        for (const [name, agent] of this.agents) {
+            if (now - agent.lastSeen > this.ttlMs) {
+                this.agents.delete(name);
+                console.log(`[FEDERATION] Agent ${name} timed out`);
+            }
+        }
+        return [...this.agents.values()];
+    }
+
+    ownerOf(serial) {
+        const wanted = String(serial || '').trim().toLowerCase();
+        if (!wanted) return null;
+        return this.live().find(a => a.devices.some(d => d.id.toLowerCase() === wanted)) || null;
+    }
+
+    /** Devices of every live agent, tagged with the agent name. */
+    devices() {
+        return this.live().flatMap(a => a.devices.map(d => ({ ...d, host: a.name })));
+    }
+
+    async forward(agent, { method, path, headers = {}, body }) {
+        try {
+            const reply = await request(`${agent.url}${path}`, {
+                method,
+                headers: { ...headers, 'X-TM-Token': this.token },
+                body: method === 'GET' || method === 'HEAD' ? undefined : body
+            });
+            agent.forwarded++;
+            return reply;
+        } catch (e) {
+            agent.errors++;
+            throw e;
+        }
+    }
+
+    list() {
+        const now = Date.now();
+        return this.live().map(a => ({
+            name: a.name,
+            url: a.url,
+            devices: a.devices,
+            lastSeenMs: now - a.lastSeen,
+            registeredAt: a.registeredAt,
+            forwarded: a.forwarded,
+            errors: a.errors
+        }));
+    }
+}
+
+class AgentLink {
+    /**
+     * @param {Object} opts { coordinatorUrl, name, url, token, listDevices() -> [{ id, status }] }
+     */
+    constructor({ coordinatorUrl, name, url, token = '', listDevices, intervalMs = REGISTER_INTERVAL }) {
+        this.coordinatorUrl = coordinatorUrl.replace(/\/+$/, '');
+        this.name = name;
+        this.url = url;
+        this.token = token;
+        this.listDevices = listDevices;
+        this.intervalMs = intervalMs;
+        this.timer = null;
+        this.registered = false;
+    }
+
+    start() {
+        if (this.timer) return;
+        this._register();
+        this.timer = setInterval(() => this._register(), this.intervalMs);
+        this.timer.unref();
+    }
+
+    stop() {
+        clearInterval(this.timer);
+        this.timer = null;
+    }
+
+    async _register() {
+        try {
+            const devices = await this.listDevices();
+            const reply = await request(`${this.coordinatorUrl}/api/federation/register`, {
+                method: 'POST',
+                headers: { 'X-TM-Token': this.token },
+                body: { name: this.name, url: this.url, devices },
+                timeout: this.intervalMs
+            });
+            if (reply.status !== 200) throw new Error(`HTTP ${reply.status}`);
+            if (!this.registered) console.log(`[FEDERATION] Registered with ${this.coordinatorUrl} as ${this.name}`);
+            this.registered = true;
+        } catch (e) {
+            if (this.registered) console.warn(`[FEDERATION] Lost coordinator ${this.coordinatorUrl}: ${e.message}`);
+            this.registered = false;
+        }
+    }
+}
+
+module.exports = { Coordinator, AgentLink, request };
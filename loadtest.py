@@ -0,0 +1,318 @@
+"""
+Telephony Manager - Load Test Harness
+Simulates N browser tabs against server.js: device-status / device polling,
+catalog command execution, back-to-back regression steps and DLT bridge
+viewers, each with its own x-client-id. Reports throughput and p50/p99
+latency per endpoint.
+
+With --start-server the harness launches server.js itself, wired to
+fake_adb.py (simulated devices) so the whole run works on a plain Linux box:
+
+    python loadtest.py --start-server --clients 30 --devices 10 --duration 60
+    python loadtest.py --url http://10.0.0.5:3000 --clients 10 --duration 120   # real rack
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Sldd queries that are safe to hammer (no device state changes)
+READ_VERBS = ('get', 'is', 'has')
+
+
+class Stats:
+    """Thread-safe latency samples per endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.status = defaultdict(lambda: defaultdict(int))
+        self.dlt_bytes = 0
+
+    def add(self, endpoint, seconds, status, ok):
+        with self.lock:
+            self.samples[endpoint].append(seconds)
+            self.status[endpoint][status] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def add_dlt_bytes(self, n):
+        with self.lock:
+            self.dlt_bytes += n
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class FakeDltSource(threading.Thread):
+    """Listens where the server expects the ADB-forwarded dlt-daemon and streams synthetic messages."""
+
+    def __init__(self, port, rate_per_sec):
+        super().__init__(daemon=True)
+        self.port = port
+        self.rate = rate_per_sec
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', port))
+        self.sock.listen(8)
+
+    @staticmethod
+    def message(counter):
+        text = f'LOADTEST telephony state update {counter}'.encode() + b'\x00'
+        payload = struct.pack('<IH', 0x200, len(text)) + text
+        ext = bytes([0x41, 1]) + b'TELE' + b'LOAD'
+        body = b'ECU1' + ext + payload
+        return bytes([0x20 | 0x01 | 0x04, counter & 0xFF]) + struct.pack('>H', 4 + len(body)) + body
+
+    def run(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+    def serve(self, conn):
+        counter = 0
+        batch = max(1, self.rate // 10)
+        try:
+            while True:
+                conn.sendall(b''.join(self.message(counter + i) for i in range(batch)))
+                counter += batch
+                time.sleep(0.1)
+        except OSError:
+            conn.close()
+
+
+class SimulatedClient(threading.Thread):
+    """One browser tab: polls like app.js and mixes in executions, regressions and DLT."""
+
+    def __init__(self, index, args, stats, serial, commands, stop_at):
+        super().__init__(daemon=True)
+        self.index = index
+        self.args = args
+        self.stats = stats
+        self.serial = serial
+        self.commands = commands
+        self.stop_at = stop_at
+        self.client_id = f'client_load{index:03d}_{int(time.time())}'
+        url = urlparse(args.url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.local = threading.local()  # one keep-alive connection per thread (polling + DLT viewer)
+        self.rng = random.Random(index)
+
+    def request(self, method, path, body=None, endpoint=None):
+        endpoint = endpoint or f'{method} {path.split("?")[0]}'
+        headers = {'X-Client-ID': self.client_id}
+        data = None
+        if body is not None:
+            data = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        start = time.perf_counter()
+        conn = getattr(self.local, 'conn', None)
+        try:
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.args.timeout)
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+            elapsed = time.perf_counter() - start
+            try:
+                payload = json.loads(raw) if raw else {}
+            except ValueError:
+                payload = {}
+            ok = resp.status < 400 and payload.get('success', True) is not False
+            self.stats.add(endpoint, elapsed, resp.status, ok)
+            return payload
+        except (OSError, http.client.HTTPException):
+            self.stats.add(endpoint, time.perf_counter() - start, 'conn-error', False)
+            if conn:
+                conn.close()
+            self.local.conn = None
+            return {}
+
+    def run(self):
+        self.request('GET', '/api/commands')
+        self.request('POST', '/api/config', {'serial': self.serial})
+        is_regression = self.index < self.args.clients * self.args.regression_share
+        wants_dlt = self.args.dlt and self.index < self.args.clients * self.args.dlt_share
+        dlt_thread = threading.Thread(target=self.dlt_viewer, daemon=True) if wants_dlt else None
+        if dlt_thread:
+            dlt_thread.start()
+
+        next_status = time.time()
+        next_devices = time.time()
+        while time.time() < self.stop_at:
+            now = time.time()
+            if now >= next_status:
+                self.request('GET', '/api/device-status')
+                next_status = now + 5
+            if now >= next_devices:
+                self.request('GET', '/api/devices')
+                next_devices = now + 15
+
+            cmd = self.rng.choice(self.commands)
+            self.request('POST', '/api/execute', {
+                'command': cmd['command'],
+                'targetSerial': self.serial,
+                'commandId': cmd['id'],
+                'modelId': self.args.model,
+                'context': 'regression' if is_regression else 'manual',
+            }, endpoint='POST /api/execute' + (' [regression]' if is_regression else ''))
+
+            # Regressions run steps back to back; manual users think between clicks
+            time.sleep(0.05 if is_regression else self.rng.uniform(1.0, self.args.think_time))
+
+        self.request('POST', '/api/tools/stop-dlt', {'clientId': self.client_id})
+
+    def dlt_viewer(self):
+        res = self.request('POST', '/api/tools/launch-dlt', {'dltPort': self.args.dlt_base_port + self.index * 2})
+        port = res.get('port')
+        if not port:
+            return
+        if self.args.start_server:
+            try:
+                FakeDltSource(port + 1000, self.args.dlt_rate).start()
+            except OSError:
+                pass
+        try:
+            with socket.create_connection(('127.0.0.1' if self.args.start_server else self.host, port), timeout=5) as s:
+                s.settimeout(1)
+                while time.time() < self.stop_at:
+                    try:
+                        data = s.recv(65536)
+                    except socket.timeout:
+                        continue
+                    if not data:
+                        break
+                    self.stats.add_dlt_bytes(len(data))
+        except OSError:
+            self.stats.add('DLT viewer connect', 0.0, 'conn-error', False)
+
+
+def load_commands(url, model):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=10)
+    conn.request('GET', '/api/commands')
+    data = json.loads(conn.getresponse().read())
+    commands = data['commands'][model]['commands']
+    reads = [c for c in commands
+             if any(t.lower().startswith(READ_VERBS) for t in c['command'].split()[3:5])]
+    return reads or commands
+
+
+def list_devices(url):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    conn.request('GET', '/api/devices', headers={'X-Client-ID': 'loadtest_probe'})
+    data = json.loads(conn.getresponse().read())
+    return [d['id'] for d in data.get('devices', []) if d['status'] == 'device']
+
+
+def start_server(args):
+    env = dict(os.environ)
+    env['PORT'] = str(urlparse(args.url).port or 3000)
+    env['ADB_COMMAND'] = f'"{sys.executable}" "{os.path.join(HERE, "fake_adb.py")}"'
+    env['FAKE_ADB_DEVICES'] = str(args.devices)
+    env['FAKE_ADB_PROFILE'] = args.profile
+    proc = subprocess.Popen(['node', os.path.join(HERE, 'server.js')], env=env, cwd=HERE,
+                            stdout=subprocess.DEVNULL if not args.verbose else None,
+                            stderr=subprocess.STDOUT if not args.verbose else None)
+    parsed = urlparse(args.url)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=1)
+            conn.request('GET', '/api/ping')
+            conn.getresponse().read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit('server.js did not come up within 20 s')
+
+
+def report(stats, duration):
+    print(f"\n{'Endpoint':<38}{'Count':>8}{'Req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'Max ms':>10}{'Errors':>8}")
+    print('-' * 93)
+    total = 0
+    for endpoint in sorted(stats.samples):
+        values = sorted(stats.samples[endpoint])
+        total += len(values)
+        print(f"{endpoint:<38}{len(values):>8}{len(values) / duration:>9.1f}"
+              f"{percentile(values, 50) * 1000:>10.0f}{percentile(values, 99) * 1000:>10.0f}"
+              f"{values[-1] * 1000:>10.0f}{stats.errors[endpoint]:>8}")
+    print('-' * 93)
+    print(f"{'TOTAL':<38}{total:>8}{total / duration:>9.1f}")
+    if stats.dlt_bytes:
+        print(f"DLT bytes received by viewers: {stats.dlt_bytes} ({stats.dlt_bytes / duration / 1024:.1f} KB/s)")
+    codes = defaultdict(int)
+    for per_endpoint in stats.status.values():
+        for code, n in per_endpoint.items():
+            codes[code] += n
+    print('Status codes:', dict(codes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test server.js with simulated browser clients')
+    parser.add_argument('--url', default='http://127.0.0.1:3300')
+    parser.add_argument('--start-server', action='store_true', help='launch server.js with fake_adb.py')
+    parser.add_argument('--devices', type=int, default=10, help='simulated devices (with --start-server)')
+    parser.add_argument('--profile', default='typical', help='fake adb latency/failure profile')
+    parser.add_argument('--clients', type=int, default=30)
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds')
+    parser.add_argument('--model', default='toyota')
+    parser.add_argument('--think-time', type=float, default=4.0, help='max seconds between manual clicks')
+    parser.add_argument('--regression-share', type=float, default=0.2, help='fraction of clients running regressions')
+    parser.add_argument('--dlt', action='store_true', help='open DLT bridges and stream through them')
+    parser.add_argument('--dlt-share', type=float, default=0.3, help='fraction of clients with a DLT viewer')
+    parser.add_argument('--dlt-base-port', type=int, default=23490)
+    parser.add_argument('--dlt-rate', type=int, default=2000, help='synthetic DLT messages/s per bridge')
+    parser.add_argument('--timeout', type=float, default=60.0, help='HTTP timeout per request')
+    parser.add_argument('--verbose', action='store_true', help='show server output')
+    args = parser.parse_args()
+
+    server = start_server(args) if args.start_server else None
+    try:
+        commands = load_commands(args.url, args.model)
+        serials = list_devices(args.url)
+        if not serials:
+            raise SystemExit('No devices visible to the server')
+        print(f"{args.clients} clients, {len(serials)} devices, {len(commands)} read commands, {args.duration:.0f} s")
+
+        stats = Stats()
+        stop_at = time.time() + args.duration
+        clients = [SimulatedClient(i, args, stats, serials[i % len(serials)], commands, stop_at)
+                   for i in range(args.clients)]
+        started = time.time()
+        for c in clients:
+            c.start()
+            time.sleep(0.05)  # tabs don't all open in the same millisecond
+        for c in clients:
+            c.join(args.duration + args.timeout + 10)
+        report(stats, time.time() - started)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(10)
+
+
+if __name__ == '__main__':
+    main()
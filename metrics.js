@@ -0,0 +1,184 @@
+/**
+ * Minimal Prometheus metrics registry (text exposition format 0.0.4).
+ * Counters, gauges and histograms with labels - enough for /metrics without
+ * pulling in prom-client (keeps the pkg executable small).
+ */
+
+const escapeLabel = (value) => String(value).replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+
+const formatLabels = (names, values, extra = '') => {
+    const parts = names.map((n, i) => `${n}="${escapeLabel(values[i])}"`);
+    if (extra) parts.push(extra);
+    return parts.length ? `{${parts.join(',')}}` : '';
+};
+
+const formatValue = (v) => {
+    if (v === Infinity) return '+Inf';
+    if (v === -Infinity) return '-Inf';
+    return String(v);
+};
+
+class Metric {
+    constructor(type, name, help, labelNames = []) {
+        this.type = type;
+        this.name = name;
+        this.help = help;
+        this.labelNames = labelNames;
+        this.series = new Map(); // label key -> { values, ... }
+    }
+
+    _series(labels, create) {
+        const values = this.labelNames.map(n => (labels[n] === undefined || labels[n] === null) ? '' : labels[n]);
+        const key = values.join('\u0000');
+        let s = this.series.get(key);
+        if (!s) {
+            s = create(values);
+            this.series.set(key, s);
+        }
+        return s;
+    }
+
+    header() {
+        return `# HELP ${this.name} ${this.help}\n# TYPE ${this.name} ${this.type}\n`;
+    }
+}
+
+class Counter extends Metric {
+    constructor(name, help, labelNames) {
+        super('counter', name, help, labelNames);
+    }
+
+    inc(labels = {}, amount = 1) {
+        this._series(labels, values => ({ values, value: 0 })).value += amount;
+    }
+
+    render() {
+        let out = this.header();
+        for (const s of this.series.values()) {
+            out += `${this.name}${formatLabels(this.labelNames, s.values)} ${formatValue(s.value)}\n`;
+        }
+        return out;
+    }
+}
+
+class Gauge extends Metric {
+    /**
+     * @param {Function} [collect] Called at scrape time; receives the gauge so it can set() fresh values.
+     */
+    constructor(name, help, labelNames, collect) {
+        super('gauge', name, help, labelNames);
+        this.collect = collect;
+    }
+
+    set(labels = {}, value) {
+        this._series(labels, values => ({ values, value: 0 })).value = value;
+    }
+
+    inc(labels = {}, amount = 1) {
+        this._series(labels, values => ({ values, value: 0 })).value += amount;
+    }
+
+    dec(labels = {}, amount = 1) {
+        this.inc(labels, -amount);
+    }
+
+    get(labels = {}) {
+        return this._series(labels, values => ({ values, value: 0 })).value;
+    }
+
+    render() {
+        if (this.collect) {
+            this.series.clear();
+            this.collect(this);
+        }
+        let out = this.header();
+        for (const s of this.series.values()) {
+            out += `${this.name}${formatLabels(this.labelNames, s.values)} ${formatValue(s.value)}\n`;
+        }
+        return out;
+    }
+}
+
+class Histogram extends Metric {
+    constructor(name, help, labelNames, buckets) {
+        super('histogram', name, help, labelNames);
+        this.buckets = [...buckets].sort((a, b) => a - b);
+    }
+
+    observe(labels = {}, value) {
+        const s = this._series(labels, values => ({
+            values,
+            counts: new Array(this.buckets.length).fill(0),
+            sum: 0,
+            count: 0
+        }));
+        for (let i = 0; i < this.buckets.length; i++) {
+            if (value <= this.buckets[i]) {
+                s.counts[i]++;
+                break;
+            }
+        }
+        s.sum += value;
+        s.count++;
+    }
+
+    /**
+     * Start a timer; call the returned function with extra labels to observe seconds elapsed.
+     */
+    startTimer(labels = {}) {
+        const start = process.hrtime.bigint();
+        return (extra = {}) => {
+            const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+            this.observe({ ...labels, ...extra }, seconds);
+            return seconds;
+        };
+    }
+
+    render() {
+        let out = this.header();
+        for (const s of this.series.values()) {
+            let cumulative = 0;
+            this.buckets.forEach((le, i) => {
+                cumulative += s.counts[i];
+                out += `${this.name}_bucket${formatLabels(this.labelNames, s.values, `le="${formatValue(le)}"`)} ${cumulative}\n`;
+            });
+            out += `${this.name}_bucket${formatLabels(this.labelNames, s.values, 'le="+Inf"')} ${s.count}\n`;
+            out += `${this.name}_sum${formatLabels(this.labelNames, s.values)} ${s.sum}\n`;
+            out += `${this.name}_count${formatLabels(this.labelNames, s.values)} ${s.count}\n`;
+        }
+        return out;
+    }
+}
+
+class Registry {
+    constructor() {
+        this.metrics = [];
+    }
+
+    counter(name, help, labelNames = []) {
+        return this._add(new Counter(name, help, labelNames));
+    }
+
+    gauge(name, help, labelNames = [], collect = null) {
+        return this._add(new Gauge(name, help, labelNames, collect));
+    }
+
+    histogram(name, help, labelNames = [], buckets = Registry.DEFAULT_BUCKETS) {
+        return this._add(new Histogram(name, help, labelNames, buckets));
+    }
+
+    _add(metric) {
+        this.metrics.push(metric);
+        return metric;
+    }
+
+    render() {
+        return this.metrics.map(m => m.render()).join('');
+    }
+}
+
+// Seconds - spans fast HTTP handlers up to the 30 s ADB default timeout
+Registry.DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30];
+Registry.CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8';
+
+module.exports = { Registry };
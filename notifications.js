@@ -0,0 +1,74 @@
+/**
+ * Notification Feed - system-wide events (ADB binary switched, IMEI written, ...)
+ * delivered to every open tab.
+ *
+ * Every event gets the next value of a monotonic sequence number and lands in a
+ * fixed-size ring. Clients keep only the last seq they have seen and ask for
+ * what came after it, either by polling `since(seq)` or by subscribing for
+ * pushes (Server-Sent Events in server.js). A cursor that has fallen out of
+ * the ring gets whatever is left plus `truncated: true`; a cursor from before
+ * a server restart is recognised by the `epoch` changing.
+ */
+
+const crypto = require('crypto');
+
+class NotificationFeed {
+    /**
+     * @param {Object} [opts] { capacity = 256 }
+     */
+    constructor({ capacity = 256 } = {}) {
+        this.capacity = capacity;
+        this.ring = new Array(capacity);
+        this.seq = 0;                  // seq of the newest event (0 = none yet)
+        this.epoch = crypto.randomBytes(4).toString('hex');
+        this.subscribers = new Set();
+    }
+
+    /** Oldest seq still held in the ring. */
+    get firstSeq() {
+        return Math.max(1, this.seq - this.capacity + 1);
+    }
+
+    publish(type, user, message, data = {}) {
+        const event = {
+            seq: ++this.seq,
+            type,
+            user,
+            message,
+            data,
+            ts: Date.now(),
+            time: new Date().toLocaleTimeString()
+        };
+        this.ring[event.seq % this.capacity] = event;
+        for (const fn of this.subscribers) {
+            try {
+                fn(event);
+            } catch (e) {
+                console.error('[NOTIFY] Subscriber failed:', e.message);
+            }
+        }
+        return event;
+    }
+
+    /**
+     * Events with seq > `since`, oldest first.
+     * Returns { epoch, seq, events, truncated } - truncated when events between
+     * `since` and the oldest one returned were already overwritten.
+     */
+    since(since = 0) {
+        const from = Math.max(since + 1, this.firstSeq);
+        const events = [];
+        for (let s = from; s <= this.seq; s++) events.push(this.ring[s % this.capacity]);
+        return { epoch: this.epoch, seq: this.seq, events, truncated: from > since + 1 && since < this.seq };
+    }
+
+    /**
+     * Call `fn(event)` for every future event. Returns the unsubscribe function.
+     */
+    subscribe(fn) {
+        this.subscribers.add(fn);
+        return () => this.subscribers.delete(fn);
+    }
+}
+
+module.exports = { NotificationFeed };
@@ -0,0 +1,319 @@
+"""
+Telephony Manager - PPTX Compactor
+Shrinks a saved .pptx so decks stay small enough to mail and upload:
+
+    1. identical media parts are stored once (relationships are re-pointed)
+    2. images are losslessly re-optimized and, with --max-px, downscaled
+       (and, with --jpeg-quality, JPEGs recompressed) - needs Pillow
+    3. slide layouts no slide uses are dropped, together with masters and
+       themes that end up unused, and any part no longer reachable
+    4. XML parts are minified (indentation between elements removed)
+    5. the package is rewritten with maximum deflate compression
+
+Usage:
+    python pptx_compact.py Telephony_Manager_Demo_Light.pptx
+    python pptx_compact.py report.pptx --out report_small.pptx --max-px 1600 --jpeg-quality 85
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import posixpath
+import zipfile
+
+from lxml import etree
+
+NS_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+NS_CT = 'http://schemas.openxmlformats.org/package/2006/content-types'
+NS_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+REL_LAYOUT = NS_R + '/slideLayout'
+REL_MASTER = NS_R + '/slideMaster'
+REL_SLIDE = NS_R + '/slide'
+
+XML_EXTENSIONS = ('.xml', '.rels')
+STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')  # already compressed - deflate would only cost time
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+
+def rels_path(part):
+    """ppt/slides/slide1.xml -> ppt/slides/_rels/slide1.xml.rels"""
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, '_rels', name + '.rels')
+
+
+def source_of(rels):
+    """ppt/slides/_rels/slide1.xml.rels -> ppt/slides/slide1.xml ('' for the package rels)."""
+    folder, name = posixpath.split(rels)
+    return posixpath.join(posixpath.dirname(folder), name[:-len('.rels')]) if name != '.rels' else ''
+
+
+def resolve(source, target):
+    base = posixpath.dirname(source)
+    return posixpath.normpath(posixpath.join(base, target)).lstrip('/')
+
+
+def relative(source, part):
+    return posixpath.relpath(part, posixpath.dirname(source) or '.')
+
+
+class Package:
+    """The parts of a zip package plus parsed relationship files."""
+
+    def __init__(self, path):
+        with zipfile.ZipFile(path) as z:
+            self.order = [i.filename for i in z.infolist()]
+            self.parts = {name: z.read(name) for name in self.order}
+        self.rels = {name: etree.fromstring(data) for name, data in self.parts.items() if name.endswith('.rels')}
+
+    def relationships(self, part):
+        root = self.rels.get(rels_path(part) if part else '_rels/.rels')
+        return [] if root is None else list(root)
+
+    def targets(self, part):
+        for rel in self.relationships(part):
+            if rel.get('TargetMode') != 'External':
+                yield rel, resolve(part, rel.get('Target'))
+
+    def xml(self, part):
+        return etree.fromstring(self.parts[part])
+
+    def set_xml(self, part, root):
+        self.parts[part] = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+    def drop_relationship(self, part, rel):
+        rel.getparent().remove(rel)
+
+    def remove(self, part):
+        self.parts.pop(part, None)
+        self.rels.pop(rels_path(part), None)
+        self.parts.pop(rels_path(part), None)
+
+    def reachable(self):
+        """Parts reachable from the package relationships."""
+        seen = set()
+        stack = [target for _, target in self.targets('')]
+        while stack:
+            part = stack.pop()
+            if part in seen or part not in self.parts:
+                continue
+            seen.add(part)
+            stack.extend(target for _, target in self.targets(part))
+        return seen
+
+    def save(self, path, level=9):
+        for name, root in self.rels.items():
+            if name in self.parts:
+                self.set_xml(name, root)
+        # [Content_Types].xml must stay first; keep the original order otherwise
+        names = [n for n in self.order if n in self.parts] + sorted(n for n in self.parts if n not in self.order)
+        names.sort(key=lambda n: n != '[Content_Types].xml')
+        with zipfile.ZipFile(path, 'w') as z:
+            for name in names:
+                if name.lower().endswith(STORED_EXTENSIONS):
+                    z.writestr(name, self.parts[name], compress_type=zipfile.ZIP_STORED)
+                else:
+                    z.writestr(name, self.parts[name], compress_type=zipfile.ZIP_DEFLATED, compresslevel=level)
+
+
+# ─── Steps ───────────────────────────────────────────────────────────
+
+def dedupe_media(pkg):
+    """Point every relationship at one copy of each distinct media body."""
+    canonical = {}
+    alias = {}
+    for name in sorted(pkg.parts):
+        if not name.startswith('ppt/media/'):
+            continue
+        digest = hashlib.sha1(pkg.parts[name]).hexdigest()
+        if digest in canonical:
+            alias[name] = canonical[digest]
+        else:
+            canonical[digest] = name
+    if not alias:
+        return 0
+    for rels_name, root in pkg.rels.items():
+        source = source_of(rels_name)
+        for rel in root:
+            if rel.get('TargetMode') == 'External':
+                continue
+            target = resolve(source, rel.get('Target'))
+            if target in alias:
+                rel.set('Target', relative(source, alias[target]))
+    saved = sum(len(pkg.parts[name]) for name in alias)
+    for name in alias:
+        pkg.remove(name)
+    return saved
+
+
+def optimize_images(pkg, max_px=None, jpeg_quality=None):
+    """Re-encode images when that makes them smaller; returns bytes saved (0 without Pillow)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return 0
+    saved = 0
+    for name in [n for n in pkg.parts if n.startswith('ppt/media/')]:
+        ext = posixpath.splitext(name)[1].lower()
+        if ext not in ('.png', '.jpg', '.jpeg'):
+            continue
+        data = pkg.parts[name]
+        try:
+            img = Image.open(io.BytesIO(data))
+            img.load()
+        except Exception:
+            continue
+        if max_px and max(img.size) > max_px:
+            img.thumbnail((max_px, max_px), Image.LANCZOS)
+        out = io.BytesIO()
+        if ext == '.png':
+            img.save(out, 'PNG', optimize=True)
+        else:
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img.save(out, 'JPEG', quality=jpeg_quality or 95, optimize=True, progressive=True)
+        # Never keep a lossy re-encode of a JPEG unless it was asked for
+        if ext != '.png' and not (jpeg_quality or max_px):
+            continue
+        if out.tell() < len(data):
+            saved += len(data) - out.tell()
+            pkg.parts[name] = out.getvalue()
+    return saved
+
+
+def drop_unused_layouts(pkg):
+    """Remove layouts no slide uses, then masters left without layouts. Returns parts removed."""
+    used = set()
+    for name in pkg.parts:
+        if name.startswith('ppt/slides/slide') and name.endswith('.xml'):
+            used.update(t for rel, t in pkg.targets(name) if rel.get('Type') == REL_LAYOUT)
+
+    masters = [t for rel, t in pkg.targets('ppt/presentation.xml') if rel.get('Type') == REL_MASTER]
+    pres = pkg.xml('ppt/presentation.xml')
+    pres_changed = False
+    for master in masters:
+        root = pkg.xml(master)
+        id_list = root.find(f'{{{NS_P}}}sldLayoutIdLst')
+        kept = 0
+        for rel, target in list(pkg.targets(master)):
+            if rel.get('Type') != REL_LAYOUT:
+                continue
+            if target in used:
+                kept += 1
+                continue
+            pkg.drop_relationship(master, rel)
+            if id_list is not None:
+                for entry in id_list.findall(f'{{{NS_P}}}sldLayoutId'):
+                    if entry.get(f'{{{NS_R}}}id') == rel.get('Id'):
+                        id_list.remove(entry)
+        pkg.set_xml(master, root)
+
+        if kept == 0:
+            # Nothing uses this master any more: unlink it from the presentation
+            for rel, target in list(pkg.targets('ppt/presentation.xml')):
+                if target != master:
+                    continue
+                pkg.drop_relationship('ppt/presentation.xml', rel)
+                id_list = pres.find(f'{{{NS_P}}}sldMasterIdLst')
+                for entry in (id_list if id_list is not None else []):
+                    if entry.get(f'{{{NS_R}}}id') == rel.get('Id'):
+                        id_list.remove(entry)
+                pres_changed = True
+    if pres_changed:
+        pkg.set_xml('ppt/presentation.xml', pres)
+    return remove_unreachable(pkg)
+
+
+def remove_unreachable(pkg):
+    """Delete parts nothing points at (and their content-type overrides)."""
+    reachable = pkg.reachable()
+    dropped = [n for n in pkg.parts
+               if n != '[Content_Types].xml' and not n.endswith('.rels') and n not in reachable]
+    for name in dropped:
+        pkg.remove(name)
+    # Orphaned .rels of removed parts
+    for name in [n for n in pkg.parts if n.endswith('.rels') and n != '_rels/.rels']:
+        if source_of(name) not in pkg.parts:
+            pkg.parts.pop(name)
+            pkg.rels.pop(name, None)
+
+    ct = pkg.xml('[Content_Types].xml')
+    for override in ct.findall(f'{{{NS_CT}}}Override'):
+        if override.get('PartName').lstrip('/') not in pkg.parts:
+            ct.remove(override)
+    pkg.set_xml('[Content_Types].xml', ct)
+    return len(dropped)
+
+
+def _strip_whitespace(root):
+    for el in root.iter():
+        if not isinstance(el.tag, str) or el.get(XML_SPACE) == 'preserve':
+            continue
+        # Only indentation between elements is insignificant; text of leaf elements (a:t) is kept
+        if len(el) and el.text is not None and not el.text.strip():
+            el.text = None
+        for child in el:
+            if child.tail is not None and not child.tail.strip():
+                child.tail = None
+
+
+def minify_xml(pkg):
+    saved = 0
+    for name in list(pkg.parts):
+        if not name.endswith(XML_EXTENSIONS) or name.endswith('.rels'):
+            continue
+        before = len(pkg.parts[name])
+        root = etree.fromstring(pkg.parts[name])
+        _strip_whitespace(root)
+        pkg.set_xml(name, root)
+        saved += before - len(pkg.parts[name])
+    return saved
+
+
+def compact(path, out=None, max_px=None, jpeg_quality=None, keep_layouts=False):
+    """Compact `path` (in place unless `out` is given). Returns a report dict of bytes saved."""
+    before = os.path.getsize(path)
+    pkg = Package(path)
+    report = {
+        'media_dedup': dedupe_media(pkg),
+        'images': optimize_images(pkg, max_px, jpeg_quality),
+        'layouts_removed': 0 if keep_layouts else drop_unused_layouts(pkg),
+        'xml_minify': minify_xml(pkg),
+    }
+    if keep_layouts:
+        remove_unreachable(pkg)
+    target = out or path
+    tmp = target + '.tmp'
+    pkg.save(tmp)
+    os.replace(tmp, target)
+    report.update(before=before, after=os.path.getsize(target))
+    return report
+
+
+def format_report(report):
+    saved = report['before'] - report['after']
+    pct = saved / report['before'] * 100 if report['before'] else 0
+    return (f"{report['before']:,} -> {report['after']:,} bytes ({saved:,} saved, {pct:.1f}%)  |  "
+            f"media dedup {report['media_dedup']:,} B, images {report['images']:,} B, "
+            f"{report['layouts_removed']} unused part(s) dropped, XML {report['xml_minify']:,} B")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shrink .pptx files for mailing/uploading')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--out', help='output path (single input only); default rewrites in place')
+    parser.add_argument('--max-px', type=int, help='downscale images larger than this (longest side)')
+    parser.add_argument('--jpeg-quality', type=int, help='recompress JPEGs at this quality (1-95)')
+    parser.add_argument('--keep-layouts', action='store_true', help='keep unused slide layouts')
+    args = parser.parse_args()
+    if args.out and len(args.files) > 1:
+        parser.error('--out needs a single input file')
+
+    for path in args.files:
+        report = compact(path, args.out, args.max_px, args.jpeg_quality, args.keep_layouts)
+        print(f"{os.path.basename(path)}: {format_report(report)}")
+
+
+if __name__ == '__main__':
+    main()
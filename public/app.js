@@ -3,6 +3,163 @@
  * Handles dynamic command management, device status, and test execution.
  */
 
+/**
+ * Windowed log view: only the rows inside the viewport are in the DOM, and at
+ * most `capacity` entries are kept in memory. Entries trimmed from the head
+ * (and everything before a page reload) are brought back on demand through
+ * the `loadOlder` callback, which resolves to entries in chronological order.
+ *
+ * Entry shapes: { time, tag, status, statusClass, output } for steps,
+ * { note, tone } for banners (tone: info | success | warning | error | muted).
+ */
+class VirtualLog {
+    constructor(el, { capacity = 2000, rowHeight = 28, overscan = 8, loadOlder = null } = {}) {
+        this.el = el;
+        this.capacity = capacity;
+        this.rowHeight = rowHeight;
+        this.overscan = overscan;
+        this.loadOlder = loadOlder;
+        this.entries = [];
+        this.hasOlder = false;
+        this.loading = false;
+        this.renderPending = false;
+
+        el.classList.add('virtual');
+        el.style.position = 'relative';
+        el.innerHTML = '';
+
+        this.olderBtn = document.createElement('button');
+        this.olderBtn.className = 'reg-log-older';
+        this.olderBtn.textContent = '⬆️ Load older entries';
+        this.olderBtn.addEventListener('click', () => this.fetchOlder());
+
+        this.spacer = document.createElement('div');
+        this.spacer.style.position = 'relative';
+        this.rows = document.createElement('div');
+        this.rows.style.position = 'absolute';
+        this.rows.style.left = '0';
+        this.rows.style.right = '0';
+        this.spacer.appendChild(this.rows);
+
+        el.appendChild(this.olderBtn);
+        el.appendChild(this.spacer);
+        el.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        this.render();
+    }
+
+    reset(entries = []) {
+        this.entries = entries.slice(-this.capacity);
+        this.hasOlder = false;
+        this.el.scrollTop = 0;
+        this.scheduleRender();
+    }
+
+    isFollowing() {
+        return this.el.scrollTop + this.el.clientHeight >= this.el.scrollHeight - this.rowHeight;
+    }
+
+    push(entry) {
+        const follow = this.isFollowing();
+        this.entries.push(entry);
+        // While the user is reading older rows, let the ring stretch (up to 2x) instead of pulling rows from under them
+        const limit = follow ? this.capacity : this.capacity * 2;
+        if (this.entries.length > limit) {
+            const drop = this.entries.length - this.capacity;
+            this.entries.splice(0, drop);
+            this.hasOlder = true;
+            if (!follow) this.el.scrollTop -= drop * this.rowHeight;
+        }
+        this.scheduleRender(follow);
+        return entry;
+    }
+
+    note(note, tone = 'info') {
+        return this.push({ note, tone });
+    }
+
+    update(entry) {
+        const idx = this.entries.lastIndexOf(entry);
+        if (idx >= this.first && idx < this.last) this.scheduleRender();
+    }
+
+    async fetchOlder() {
+        if (this.loading || !this.loadOlder) return;
+        this.loading = true;
+        this.olderBtn.disabled = true;
+        this.olderBtn.textContent = '⏳ Loading...';
+        try {
+            const older = await this.loadOlder(this.entries);
+            if (older.length === 0) {
+                this.hasOlder = false;
+            } else {
+                this.entries = older.concat(this.entries);
+                this.el.scrollTop += older.length * this.rowHeight;
+            }
+        } catch (e) {
+            console.error('Failed to load older log entries:', e);
+        } finally {
+            this.loading = false;
+            this.olderBtn.disabled = false;
+            this.olderBtn.textContent = '⬆️ Load older entries';
+            this.scheduleRender();
+        }
+    }
+
+    scheduleRender(scrollToEnd = false) {
+        this.scrollToEnd = this.scrollToEnd || scrollToEnd;
+        if (this.renderPending) return;
+        this.renderPending = true;
+        requestAnimationFrame(() => {
+            this.renderPending = false;
+            this.render();
+        });
+    }
+
+    render() {
+        this.olderBtn.style.display = this.hasOlder && this.loadOlder ? 'block' : 'none';
+        this.spacer.style.height = `${this.entries.length * this.rowHeight}px`;
+        if (this.scrollToEnd) {
+            this.el.scrollTop = this.el.scrollHeight;
+            this.scrollToEnd = false;
+        }
+
+        const offset = Math.max(0, this.el.scrollTop - this.spacer.offsetTop);
+        const visible = Math.ceil((this.el.clientHeight || 300) / this.rowHeight);
+        this.first = Math.max(0, Math.floor(offset / this.rowHeight) - this.overscan);
+        this.last = Math.min(this.entries.length, this.first + visible + this.overscan * 2);
+        this.rows.style.transform = `translateY(${this.first * this.rowHeight}px)`;
+
+        const frag = document.createDocumentFragment();
+        for (let i = this.first; i < this.last; i++) frag.appendChild(this.renderRow(this.entries[i]));
+        this.rows.replaceChildren(frag);
+    }
+
+    renderRow(entry) {
+        const row = document.createElement('div');
+        row.style.height = `${this.rowHeight}px`;
+        if (entry.note !== undefined) {
+            row.className = `reg-log-note ${entry.tone}`;
+            row.textContent = entry.note;
+            return row;
+        }
+        row.className = 'reg-log-entry';
+        const cells = [
+            ['reg-log-time', `[${entry.time}]`],
+            ['reg-log-iter', entry.tag],
+            [`reg-log-status ${entry.statusClass || ''}`, entry.status],
+            ['reg-log-output', entry.output]
+        ];
+        cells.forEach(([cls, text]) => {
+            const span = document.createElement('span');
+            span.className = cls;
+            span.textContent = text;
+            row.appendChild(span);
+        });
+        row.title = entry.output;
+        return row;
+    }
+}
+
 class TelephonyManager {
     constructor() {
         this.results = {};
@@ -51,6 +208,13 @@ class TelephonyManager {
         this.isRegressionRunning = false;
         this.isRegressionPaused = false;
         this.regressionHistory = []; // Store detailed run data for export
+        this.regressionHistoryLimit = 2000; // Steps kept in memory (and in the log view) per run
+        this.regressionHistoryDropped = 0;
+
+        // Request tracing: every call carries a request id; calls of a Run All / regression share a trace run
+        this.requestSeq = 0;
+        this.traceRunId = null;     // set while a Run All or regression is in progress
+        this.lastTraceRunId = null; // the run offered by the Trace buttons
 
         // DLT Settings — per-tab so each tab tracks its own assigned port
         // Use sessionStorage first (per-tab), fallback to localStorage (user default)
@@ -64,9 +228,12 @@ class TelephonyManager {
             if (btn) btn.textContent = '🌙';
         }
 
-        // Global Event Tracking
-        this.seenNotifIds = new Set(JSON.parse(localStorage.getItem('seenNotifIds') || '[]'));
-        this.isInitialLoad = true;
+        // Global Event Tracking: cursor into the server notification feed (per tab, nothing persisted)
+        this.notifEpoch = null;
+        this.notifSeq = 0;
+        this.notifStream = null;   // only in the tab that holds the shared stream (see startNotificationFeed)
+        this.notifChannel = null;
+        localStorage.removeItem('seenNotifIds'); // left over from the id-set based tracking
 
         this.init();
     }
@@ -74,6 +241,8 @@ class TelephonyManager {
     async apiCall(url, options = {}) {
         options.headers = options.headers || {};
         options.headers['X-Client-ID'] = this.clientId;
+        options.headers['X-Request-Id'] = `${this.clientId}-${++this.requestSeq}`;
+        if (this.traceRunId) options.headers['X-Trace-Run'] = this.traceRunId;
         if (this.adminToken) {
             options.headers['Authorization'] = this.adminToken;
         }
@@ -108,9 +277,12 @@ class TelephonyManager {
         }).catch(e => console.error(e));
 
         this.checkDeviceStatus().catch(e => console.error(e));
+        this.startNotificationFeed().catch(e => console.error(e));
 
         setInterval(() => this.checkDeviceStatus(), 5000);
         setInterval(() => this.fetchDevices(), 15000);
+        // Session keep-alive (status polling normally covers it; this survives a stalled poll)
+        setInterval(() => this.apiCall('/api/session/heartbeat', { method: 'POST' }).catch(() => { }), 60000);
 
         // Cleanup DLT proxy when tab is closed
         window.addEventListener('beforeunload', () => {
@@ -317,10 +489,26 @@ class TelephonyManager {
         document.getElementById('btnStartRegression').addEventListener('click', () => this.startRegression());
         document.getElementById('btnPauseRegression').addEventListener('click', () => this.toggleRegressionPause());
         document.getElementById('btnStopRegression').addEventListener('click', () => { this.stopRegression = true; });
+        document.getElementById('btnQueueRegression').addEventListener('click', () => this.queueRegression());
+        document.getElementById('regJobs').addEventListener('click', (e) => {
+            const btn = e.target.closest('[data-job-action]');
+            if (btn) this.controlRegressionJob(btn.dataset.jobId, btn.dataset.jobAction);
+        });
         document.getElementById('btnAddRegStep').addEventListener('click', () => this.addRegressionStep());
         document.getElementById('btnAddRegModule').addEventListener('click', () => this.showRegModuleSelection());
         document.getElementById('btnClearRegLog').addEventListener('click', () => this.clearRegressionLog());
         document.getElementById('btnExportRegReport').addEventListener('click', () => this.exportRegressionReport());
+        document.getElementById('btnExportRegTrace').addEventListener('click', () => this.downloadTrace());
+        document.getElementById('btnReportTrace').addEventListener('click', () => this.downloadTrace());
+
+        // Command Timing
+        document.getElementById('btnTiming').addEventListener('click', () => this.showTimingModal());
+        document.getElementById('btnStability').addEventListener('click', () => this.openStabilityReport());
+        document.getElementById('timingModalClose').addEventListener('click', () => {
+            document.getElementById('timingModal').classList.remove('active');
+        });
+        document.getElementById('btnRefreshTiming').addEventListener('click', () => this.loadTimingData());
+        document.getElementById('timingThisDevice').addEventListener('change', () => this.loadTimingData());
 
         // External Tools
         document.getElementById('btnDltSettings').addEventListener('click', () => this.showDLTConfig());
@@ -402,7 +590,8 @@ class TelephonyManager {
 
     loadCommands() {
         const grid = document.getElementById('commandsGrid');
-        grid.innerHTML = '';
+        // Cards are built off-document and inserted in one go (one layout instead of one per card)
+        const frag = document.createDocumentFragment();
 
         let commands = [...(this.commandsData[this.currentModel]?.commands || [])];
 
@@ -439,7 +628,7 @@ class TelephonyManager {
                     <button class="btn-result" onclick="app.showResult('${cmd.id}')" ${!result ? 'disabled' : ''}>📋 Result</button>
                 </div>
             `;
-            grid.appendChild(card);
+            frag.appendChild(card);
         });
 
         // Add "Add Custom Test" card for admins
@@ -466,8 +655,9 @@ class TelephonyManager {
             `;
 
             addCard.addEventListener('click', () => this.showManageModal(targetCat));
-            grid.appendChild(addCard);
+            frag.appendChild(addCard);
         }
+        grid.replaceChildren(frag);
 
         this.updateModuleVisibility();
     }
@@ -563,7 +753,11 @@ class TelephonyManager {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     command: overrideCommand || cmd.command,
-                    targetSerial: this.deviceSerial  // Pass explicit target
+                    targetSerial: this.deviceSerial,  // Pass explicit target
+                    commandId: id,
+                    modelId: this.currentModel,
+                    context: this.isRegressionRunning ? 'regression' : (this.isRunningAll ? 'run-all' : 'manual'),
+                    ...(this.isRegressionRunning ? this.regressionContext : {})  // runId / iteration / step for the results log
                 })
             });
             let result = await response.json();
@@ -778,6 +972,7 @@ class TelephonyManager {
         this.isRunningAll = true;
         this.isPaused = false;
         this.stopExecution = false;
+        this.traceRunId = this.lastTraceRunId = `runall_${this.clientId}_${Date.now()}`;
 
         // Device lock removed — all users can run freely
 
@@ -820,10 +1015,12 @@ class TelephonyManager {
         }
 
         this.isRunningAll = false;
+        this.traceRunId = null;
         btn.innerHTML = originalText;
         btn.disabled = false;
 
-        // Execution complete
+        // Execution complete - keep the run in the server-side results history
+        this.saveResultsToServer(true);
 
         // Update Stop Button state to 'Reprint' or hide
         const stopBtn = document.getElementById('reportStopBtn');
@@ -1035,7 +1232,8 @@ class TelephonyManager {
                 data.devices.forEach(d => {
                     const opt = document.createElement('option');
                     opt.value = d.id;
-                    opt.textContent = `${d.id} (${d.status})`;
+                    // Devices on other hosts (federation coordinator) carry the host name
+                    opt.textContent = d.host ? `${d.id} @ ${d.host} (${d.status})` : `${d.id} (${d.status})`;
                     selector.appendChild(opt);
                 });
 
@@ -1126,6 +1324,8 @@ class TelephonyManager {
 
         try {
             const response = await this.apiCall(`/api/device-status?t=${Date.now()}`);
+            // Throttled by the server: keep the last known state until the next poll
+            if (response.status === 429) return;
             const data = await response.json();
 
             // Detected disconnection state transition
@@ -1167,9 +1367,11 @@ class TelephonyManager {
 
             // Lock feature removed
 
-            // NEW: Handle global notifications (e.g., ADB binary changes by other users)
-            if (data.notifications) {
-                this.handleGlobalNotifications(data.notifications);
+            // Global notifications (e.g., ADB binary changes by other users): the status only carries
+            // the feed cursor - fetch the delta if the push stream is down and we are behind
+            const feed = data.notifications;
+            if (feed && this.notifEpoch && !this.notificationStreamLive() && (feed.epoch !== this.notifEpoch || feed.seq > this.notifSeq)) {
+                this.fetchNotifications().catch(e => console.error(e));
             }
         } catch (e) {
             // Don't wipe the status bar on transient errors. Only mark disconnected
@@ -2096,7 +2298,7 @@ class TelephonyManager {
         try {
             const response = await this.apiCall('/api/set-region', {
                 method: 'POST', headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ regionNumber: region })
+                body: JSON.stringify({ regionNumber: region, modelId: this.currentModel })
             });
             const result = await response.json();
             if (resultEl) {
@@ -2241,8 +2443,8 @@ class TelephonyManager {
         this.showToast('Excel Report Generated!', true);
     }
 
-    async saveResultsToServer() {
-        if (Object.keys(this.results).length === 0) return this.showToast('No results to save', false);
+    async saveResultsToServer(silent = false) {
+        if (Object.keys(this.results).length === 0) return silent ? null : this.showToast('No results to save', false);
 
         try {
             const response = await this.apiCall('/api/save-results', {
@@ -2251,13 +2453,14 @@ class TelephonyManager {
                 body: JSON.stringify({
                     modelId: this.currentModel,
                     results: this.results,
+                    serial: this.deviceSerial,
                     timestamp: new Date().toISOString()
                 })
             });
             const data = await response.json();
-            this.showToast('Results saved to server!', true);
+            if (!silent) this.showToast(data.success ? 'Results saved to server!' : 'Failed to save results', data.success);
         } catch (e) {
-            this.showToast('Failed to save results', false);
+            if (!silent) this.showToast('Failed to save results', false);
         }
     }
 
@@ -2669,6 +2872,11 @@ class TelephonyManager {
         container.innerHTML = '';
         this.addRegressionStep(); // Add first default step
         document.getElementById('regressionModal').classList.add('active');
+
+        // Server-side jobs progress without this tab; refresh their list while the modal is open
+        this.loadRegressionJobs();
+        clearInterval(this.regJobsTimer);
+        this.regJobsTimer = setInterval(() => this.loadRegressionJobs(), 5000);
     }
 
     addRegressionStep(commandId = '') {
@@ -2757,22 +2965,52 @@ class TelephonyManager {
     closeRegressionModal() {
         if (this.isRegressionRunning && !confirm('Stop running regression?')) return;
         this.stopRegression = true;
+        clearInterval(this.regJobsTimer);
         document.getElementById('regressionModal').classList.remove('active');
     }
 
-    async startRegression() {
+    // Step rows of the regression modal as { id, delay (ms), customParam, useCustom }
+    readRegressionSequence() {
         const stepRows = document.querySelectorAll('.reg-step-row');
-        const sequence = Array.from(stepRows).map(row => ({
+        return Array.from(stepRows).map(row => ({
             id: row.querySelector('.reg-step-select').value,
             delay: (parseInt(row.querySelector('.reg-step-delay').value) || 0) * 1000,
             customParam: row.querySelector('.reg-custom-param') ? row.querySelector('.reg-custom-param').value : '',
             useCustom: row.querySelector('.reg-custom-param') && row.querySelector('.reg-custom-param').style.display !== 'none'
         }));
+    }
+
+    // Catalog command with the step's custom number (dial / SMS) filled in, or null to run it unchanged
+    regressionStepCommand(step) {
+        if (!step.useCustom || !step.customParam) return null;
+        const cmdObj = this.commandsData[this.currentModel].commands.find(c => c.id === step.id);
+        if (!cmdObj) return null;
+        const parts = cmdObj.command.split(' ');
+        if (step.id.includes('dial')) {
+            // Replace last param for dial
+            // Check if keyword 'dial' exists
+            const idx = parts.indexOf('dial');
+            if (idx !== -1 && parts[idx + 1]) parts[idx + 1] = step.customParam;
+            else parts[parts.length - 1] = step.customParam; // Fallback
+            return parts.join(' ');
+        }
+        if (step.id.includes('sms')) {
+            const idx = parts.indexOf('sendSms16');
+            if (idx !== -1 && parts[idx + 1]) {
+                parts[idx + 1] = step.customParam;
+                return parts.join(' ');
+            }
+        }
+        return null;
+    }
+
+    async startRegression() {
+        const sequence = this.readRegressionSequence();
 
         if (sequence.length === 0) return this.showToast('Please add at least one step', false);
 
         const iterations = parseInt(document.getElementById('regIterations').value) || 10;
-        const log = document.getElementById('regressionLog');
+        const log = this.getRegressionLog();
         const startBtn = document.getElementById('btnStartRegression');
         const stopBtn = document.getElementById('btnStopRegression');
         const progressArea = document.getElementById('regProgress');
@@ -2796,13 +3034,15 @@ class TelephonyManager {
         const liveStatusArea = document.getElementById('regLiveStatus');
         liveStatusArea.style.display = 'block';
 
-        log.innerHTML = `<div style="color: var(--accent-primary); border-bottom: 2px solid var(--accent-primary); padding-bottom: 10px; margin-bottom: 10px;">
-            🚀 REGRESSION STARTED: ${iterations} iterations | Sequence: ${sequence.length} steps
-        </div>`;
+        log.reset();
+        log.note(`🚀 REGRESSION STARTED: ${iterations} iterations | Sequence: ${sequence.length} steps`, 'info');
 
         let passCount = 0;
         let failCount = 0;
         this.regressionHistory = [];
+        this.regressionHistoryDropped = 0;
+        this.regressionContext = { runId: `reg_${this.clientId}_${Date.now()}` };
+        this.traceRunId = this.lastTraceRunId = this.regressionContext.runId;
         document.getElementById('regTotalCount').textContent = iterations;
 
         for (let i = 1; i <= iterations; i++) {
@@ -2810,7 +3050,7 @@ class TelephonyManager {
             await new Promise(r => setTimeout(r, 0));
 
             if (this.stopRegression) {
-                log.innerHTML += `<div style="color: var(--error); margin-top: 10px; font-weight: bold;">🛑 REGRESSION STOPPED BY USER</div>`;
+                log.note('🛑 REGRESSION STOPPED BY USER', 'error');
                 break;
             }
 
@@ -2832,19 +3072,17 @@ class TelephonyManager {
 
                 // Log Entry for this specific step
                 const time = new Date().toLocaleTimeString();
-                const entryEl = document.createElement('div');
-                entryEl.className = 'reg-log-entry';
-                entryEl.innerHTML = `
-                    <span class="reg-log-time">[${time}]</span>
-                    <span class="reg-log-iter">#${i}-${stepNum}</span>
-                    <span class="reg-log-status">RUNNING...</span>
-                    <span class="reg-log-output">Step ${stepNum}: Executing...</span>
-                `;
-                log.appendChild(entryEl);
-                log.scrollTop = log.scrollHeight;
+                const entry = log.push({
+                    time,
+                    tag: `#${i}-${stepNum}`,
+                    iteration: i,
+                    step: stepNum,
+                    status: 'RUNNING...',
+                    output: `Step ${stepNum}: Executing...`
+                });
 
                 if (!this.deviceConnected) {
-                    log.innerHTML += `<div style="color: var(--error); margin-top: 10px; font-weight: bold;">❌ ERROR: Device Disconnected</div>`;
+                    log.note('❌ ERROR: Device Disconnected', 'error');
                     this.stopRegression = true;
                     break;
                 }
@@ -2866,43 +3104,23 @@ class TelephonyManager {
                 }
 
                 try {
-                    let overrideCommand = null;
-                    if (step.useCustom && step.customParam) {
-                        const cmdObj = this.commandsData[this.currentModel].commands.find(c => c.id === step.id);
-                        if (cmdObj) {
-                            const parts = cmdObj.command.split(' ');
-                            if (step.id.includes('dial')) {
-                                // Replace last param for dial
-                                // Check if keyword 'dial' exists 
-                                const idx = parts.indexOf('dial');
-                                if (idx !== -1 && parts[idx + 1]) parts[idx + 1] = step.customParam;
-                                else parts[parts.length - 1] = step.customParam; // Fallback
-                                overrideCommand = parts.join(' ');
-                            } else if (step.id.includes('sms')) {
-                                const idx = parts.indexOf('sendSms16');
-                                if (idx !== -1 && parts[idx + 1]) {
-                                    parts[idx + 1] = step.customParam;
-                                    overrideCommand = parts.join(' ');
-                                }
-                            }
-                        }
-                    }
+                    const overrideCommand = this.regressionStepCommand(step);
 
+                    this.regressionContext.iteration = i;
+                    this.regressionContext.step = stepNum;
                     const res = await this.runCommand(step.id, true, overrideCommand);
-                    const statusSpan = entryEl.querySelector('.reg-log-status');
-                    const outSpan = entryEl.querySelector('.reg-log-output');
-
-                    if (res.success) {
-                        statusSpan.className = 'reg-log-status pass';
-                        statusSpan.textContent = 'PASS';
-                    } else {
-                        statusSpan.className = 'reg-log-status fail';
-                        statusSpan.textContent = 'FAIL';
-                        iterationFail = true;
-                    }
-                    outSpan.textContent = `[Step ${stepNum}] ${res.output}`;
 
-                    // Store history
+                    entry.status = res.success ? 'PASS' : 'FAIL';
+                    entry.statusClass = res.success ? 'pass' : 'fail';
+                    entry.output = `[Step ${stepNum}] ${res.output}`;
+                    if (!res.success) iterationFail = true;
+                    log.update(entry);
+
+                    // Store history (bounded - the full run stays in the server results store)
+                    if (this.regressionHistory.length >= this.regressionHistoryLimit) {
+                        this.regressionHistory.shift();
+                        this.regressionHistoryDropped++;
+                    }
                     this.regressionHistory.push({
                         iteration: i,
                         step: stepNum,
@@ -2920,13 +3138,7 @@ class TelephonyManager {
 
                 // Use per-step delay set by user
                 if (step.delay > 0) {
-                    const waitEntry = document.createElement('div');
-                    waitEntry.style.fontSize = '0.75rem';
-                    waitEntry.style.color = 'var(--text-muted)';
-                    waitEntry.style.paddingLeft = '85px';
-                    waitEntry.innerHTML = `⏳ Waiting ${step.delay / 1000}s...`;
-                    log.appendChild(waitEntry);
-                    log.scrollTop = log.scrollHeight;
+                    log.note(`⏳ Waiting ${step.delay / 1000}s...`, 'muted');
 
                     const stepWaitStart = Date.now();
                     while (Date.now() - stepWaitStart < step.delay) {
@@ -2946,16 +3158,147 @@ class TelephonyManager {
         }
 
         this.isRegressionRunning = false;
+        this.traceRunId = null;
         startBtn.disabled = false;
         document.getElementById('btnPauseRegression').style.display = 'none';
         stopBtn.style.display = 'none';
 
         // Regression lock removed - no unlock needed
 
-        log.innerHTML += `<div style="color: var(--success); font-weight: bold; margin-top: 15px; border-top: 1px solid var(--success); padding-top: 10px;">
-            ✅ REGRESSION COMPLETED: ${passCount} Pass, ${failCount} Fail
-        </div>`;
-        log.scrollTop = log.scrollHeight;
+        log.note(`✅ REGRESSION COMPLETED: ${passCount} Pass, ${failCount} Fail`, 'success');
+    }
+
+    /**
+     * Submit the modal's sequence as a server-side job: it runs on the server
+     * in device order, keeps going with this tab closed and resumes after a restart.
+     */
+    async queueRegression() {
+        const sequence = this.readRegressionSequence();
+        if (sequence.length === 0) return this.showToast('Please add at least one step', false);
+        if (!this.deviceSerial) return this.showToast('Select a device first', false);
+
+        const iterations = parseInt(document.getElementById('regIterations').value) || 10;
+        try {
+            const response = await this.apiCall('/api/regressions', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    modelId: this.currentModel,
+                    targetSerial: this.deviceSerial,
+                    iterations,
+                    steps: sequence.map(step => ({
+                        commandId: step.id,
+                        command: this.regressionStepCommand(step) || undefined,
+                        delay: step.delay
+                    }))
+                })
+            });
+            const data = await response.json();
+            if (!data.success) return this.showToast(`Queue failed: ${data.error}`, false);
+            this.showToast(`Queued ${iterations} iterations on ${data.job.serial}`, true);
+            this.loadRegressionJobs();
+        } catch (e) {
+            this.showToast('Queue failed: server unreachable', false);
+        }
+    }
+
+    async loadRegressionJobs() {
+        const panel = document.getElementById('regJobs');
+        try {
+            const response = await this.apiCall('/api/regressions');
+            const data = await response.json();
+            if (data.success) this.renderRegressionJobs(panel, data.jobs);
+        } catch (e) {
+            // Keep the last list; the next refresh retries
+        }
+    }
+
+    renderRegressionJobs(panel, jobs) {
+        const finished = ['done', 'cancelled', 'failed'];
+        // Everything still pending, plus the last few finished ones
+        const shown = jobs.filter(j => !finished.includes(j.state))
+            .concat(jobs.filter(j => finished.includes(j.state)).slice(-5));
+        panel.style.display = shown.length ? 'block' : 'none';
+        if (!shown.length) return;
+
+        const rows = shown.map(job => {
+            const done = Math.min(job.next.iteration - 1, job.iterations);
+            const actions = [];
+            if (job.state === 'queued' || job.state === 'running') actions.push(['pause', '⏸️']);
+            if (job.state === 'paused') actions.push(['resume', '▶️']);
+            if (!finished.includes(job.state)) actions.push(['cancel', '🛑']);
+            return `
+                <div class="reg-job reg-job-${job.state}">
+                    <span class="reg-job-state">${job.state}</span>
+                    <span class="reg-job-device">${job.serial}</span>
+                    <span class="reg-job-progress">${done}/${job.iterations} · ✅ ${job.pass} · ❌ ${job.fail}${job.error ? ` · ${job.error}` : ''}</span>
+                    <span class="reg-job-actions">
+                        ${actions.map(([action, icon]) => `<button class="btn-secondary" data-job-id="${job.id}" data-job-action="${action}" title="${action}">${icon}</button>`).join('')}
+                        <a class="btn-secondary" href="/api/results/export.csv?runId=${encodeURIComponent(job.id)}" title="Download CSV">📥</a>
+                        <a class="btn-secondary" href="/api/trace?run=${encodeURIComponent(job.id)}" title="Download timeline (Chrome trace)">🧭</a>
+                    </span>
+                </div>`;
+        }).join('');
+        panel.innerHTML = `<div class="reg-jobs-title">🗄️ Server Jobs</div>${rows}`;
+    }
+
+    async controlRegressionJob(id, action) {
+        if (action === 'cancel' && !confirm('Cancel this server regression job?')) return;
+        try {
+            const response = await this.apiCall(`/api/regressions/${encodeURIComponent(id)}/${action}`, { method: 'POST' });
+            const data = await response.json();
+            if (!data.success) this.showToast(`${action} failed: ${data.error}`, false);
+        } catch (e) {
+            this.showToast(`${action} failed: server unreachable`, false);
+        }
+        this.loadRegressionJobs();
+    }
+
+    getRegressionLog() {
+        if (!this.regressionLog) {
+            this.regressionLog = new VirtualLog(document.getElementById('regressionLog'), {
+                capacity: this.regressionHistoryLimit,
+                loadOlder: (entries) => this.loadOlderRegressionEntries(entries)
+            });
+        }
+        return this.regressionLog;
+    }
+
+    /**
+     * Older step entries of the current run from the server results store,
+     * i.e. those before the oldest step still held by the log.
+     */
+    async loadOlderRegressionEntries(entries) {
+        const runId = this.regressionContext?.runId;
+        if (!runId) return [];
+        const page = 500;
+        const oldest = entries.find(e => e.iteration !== undefined);
+        const params = new URLSearchParams({ runId, kind: 'step' });
+        if (oldest && oldest.ts) {
+            params.set('to', oldest.ts - 1);
+            params.set('limit', page);
+        } else {
+            // Live rows carry no server timestamp: skip past everything the log already shows
+            const shown = entries.filter(e => e.iteration !== undefined).length;
+            params.set('limit', Math.min(shown + page, 5000));
+        }
+
+        const response = await this.apiCall(`/api/results?${params}`);
+        const data = await response.json();
+        if (!data.success) throw new Error(data.error);
+
+        const before = (r) => !oldest || r.iteration < oldest.iteration ||
+            (r.iteration === oldest.iteration && r.step < oldest.step);
+        return data.records.filter(before).reverse().map(r => ({
+            time: new Date(r.ts).toLocaleTimeString(),
+            ts: r.ts,
+            tag: `#${r.iteration}-${r.step}`,
+            iteration: r.iteration,
+            step: r.step,
+            status: r.success ? 'PASS' : 'FAIL',
+            statusClass: r.success ? 'pass' : 'fail',
+            output: `[Step ${r.step}] ${r.output || ''}`
+        }));
     }
 
     showRegModuleSelection() {
@@ -3021,23 +3364,36 @@ class TelephonyManager {
     }
 
     clearRegressionLog() {
-        document.getElementById('regressionLog').innerHTML = '<div style="color: var(--text-muted); text-align: center;">Log cleared. Waiting to start...</div>';
+        this.getRegressionLog().reset([{ note: 'Log cleared. Waiting to start...', tone: 'muted' }]);
         document.getElementById('regPassCount').textContent = '0';
         document.getElementById('regFailCount').textContent = '0';
         document.getElementById('regCurrentIdx').textContent = '0';
         document.getElementById('regProgressBar').style.width = '0%';
         this.regressionHistory = [];
+        this.regressionHistoryDropped = 0;
     }
 
-    exportRegressionReport() {
+    async exportRegressionReport() {
         if (!this.regressionHistory || this.regressionHistory.length === 0) {
             return this.showToast('No regression data to export', false);
         }
 
+        // Long runs only keep their tail in memory; the server builds the complete run's CSV
+        const history = this.regressionHistory;
+        if (this.regressionHistoryDropped > 0 && this.regressionContext?.runId) {
+            try {
+                const response = await this.apiCall(`/api/results/export.csv?runId=${encodeURIComponent(this.regressionContext.runId)}`);
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return this.downloadBlob(await response.blob(), `regression_report_${this.currentModel}_${Date.now()}.csv`);
+            } catch (e) {
+                this.showToast(`Server history unavailable - exporting the last ${history.length} steps only`, false);
+            }
+        }
+
         const headers = ['Iteration', 'Step', 'Time', 'Command Name', 'Command ID', 'Status', 'Output'];
         const csvContent = [
             headers.join(','),
-            ...this.regressionHistory.map(row => {
+            ...history.map(row => {
                 const safeOutput = (row.output || '').replace(/"/g, '""').replace(/\n/g, ' ');
                 return [
                     row.iteration,
@@ -3052,10 +3408,29 @@ class TelephonyManager {
         ].join('\n');
 
         const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
+        this.downloadBlob(blob, `regression_report_${this.currentModel}_${Date.now()}.csv`);
+    }
+
+    /**
+     * Timeline of the last Run All / regression in Chrome trace format
+     * (open in ui.perfetto.dev or chrome://tracing).
+     */
+    async downloadTrace() {
+        if (!this.lastTraceRunId) return this.showToast('Run All or start a regression first', false);
+        try {
+            const response = await this.apiCall(`/api/trace?run=${encodeURIComponent(this.lastTraceRunId)}`);
+            if (!response.ok) return this.showToast('No trace recorded for the last run', false);
+            this.downloadBlob(await response.blob(), `trace_${this.lastTraceRunId}.json`);
+        } catch (e) {
+            this.showToast('Trace download failed: server unreachable', false);
+        }
+    }
+
+    downloadBlob(blob, filename) {
         const url = URL.createObjectURL(blob);
         const link = document.createElement('a');
         link.setAttribute('href', url);
-        link.setAttribute('download', `regression_report_${this.currentModel}_${Date.now()}.csv`);
+        link.setAttribute('download', filename);
         link.style.visibility = 'hidden';
         document.body.appendChild(link);
         link.click();
@@ -3069,12 +3444,8 @@ class TelephonyManager {
             btn.textContent = this.isRegressionPaused ? '▶️ Resume' : '⏸️ Pause';
             btn.className = this.isRegressionPaused ? 'btn-success' : 'btn-warning';
         }
-        const log = document.getElementById('regressionLog');
-        if (log) {
-            const time = new Date().toLocaleTimeString();
-            log.innerHTML += `<div style="color: var(--warning); padding: 5px 0;">[${time}] ${this.isRegressionPaused ? '⏸️ Regression Paused' : '▶️ Regression Resumed'}</div>`;
-            log.scrollTop = log.scrollHeight;
-        }
+        const time = new Date().toLocaleTimeString();
+        this.getRegressionLog().note(`[${time}] ${this.isRegressionPaused ? '⏸️ Regression Paused' : '▶️ Regression Resumed'}`, 'warning');
     }
 
     showDeviceDisconnectedPopup(disconnectedSerial, availableDevices = []) {
@@ -3190,6 +3561,60 @@ class TelephonyManager {
         document.getElementById('remoteGuidePort').textContent = this.dltPort;
 
         document.getElementById('dltConfigModal').classList.add('active');
+
+        // Live bridge counters while the modal is open
+        this.refreshDltStats();
+        clearInterval(this.dltStatsTimer);
+        this.dltStatsTimer = setInterval(() => {
+            if (!document.getElementById('dltConfigModal').classList.contains('active')) {
+                clearInterval(this.dltStatsTimer);
+                return;
+            }
+            this.refreshDltStats();
+        }, 2000);
+    }
+
+    formatBytes(bytes) {
+        if (!bytes) return '0 B';
+        const units = ['B', 'KB', 'MB', 'GB'];
+        const i = Math.min(units.length - 1, Math.floor(Math.log(bytes) / Math.log(1024)));
+        return `${(bytes / Math.pow(1024, i)).toFixed(i ? 1 : 0)} ${units[i]}`;
+    }
+
+    async refreshDltStats() {
+        const container = document.getElementById('dltStatsContainer');
+        if (!container) return;
+        try {
+            const response = await this.apiCall('/api/tools/dlt-stats');
+            const data = await response.json();
+            if (!data.bridges || data.bridges.length === 0) {
+                container.textContent = 'No active bridges';
+                return;
+            }
+
+            const t = data.totals;
+            let html = `<div style="margin-bottom: 8px; color: var(--text-primary);">
+                ${t.bridges} bridge(s) · ${t.viewers} viewer(s) · ↓ ${this.formatBytes(t.rateDown)}/s · ↑ ${this.formatBytes(t.rateUp)}/s · ${t.pauses} pauses
+            </div>`;
+            html += `<table style="width: 100%; border-collapse: collapse;">
+                <tr style="text-align: left;"><th>Port</th><th>Device</th><th>↓/s</th><th>↑/s</th><th>Total ↓</th><th>Pauses ↓/↑</th><th>Queue HW</th><th>Conns</th></tr>`;
+            data.bridges.forEach(b => {
+                html += `<tr style="${b.own ? 'color: #4CAF50; font-weight: 600;' : ''}">
+                    <td>${b.publicPort}</td>
+                    <td>${b.serial}</td>
+                    <td>${this.formatBytes(b.rateDown)}</td>
+                    <td>${this.formatBytes(b.rateUp)}</td>
+                    <td>${this.formatBytes(b.bytesDown)}</td>
+                    <td>${b.pausesDown}/${b.pausesUp}</td>
+                    <td>${this.formatBytes(b.queueHighWaterDown)}</td>
+                    <td>${b.activeConnections} (${b.connections})</td>
+                </tr>`;
+            });
+            html += '</table>';
+            container.innerHTML = html;
+        } catch (e) {
+            container.textContent = 'Bridge stats unavailable';
+        }
     }
 
     saveDLTConfig() {
@@ -3214,34 +3639,190 @@ class TelephonyManager {
         this.launchDLT();
     }
 
-    handleGlobalNotifications(notifications) {
-        let hasNew = false;
-        notifications.forEach(notif => {
-            if (!this.seenNotifIds.has(notif.id)) {
-                this.seenNotifIds.add(notif.id);
-                hasNew = true;
-
-                // Sync local state if it's an ADB change (even on initial load to stay in sync)
-                if (notif.type === 'ADB_CHANGE' && notif.data && notif.data.adb) {
-                    this.adbCommand = notif.data.adb;
-                    this.updateAdbToggleUI();
-                    this.loadCommands();
-                }
+    // Static dashboard generated by report_html.py into public/report.html
+    async openStabilityReport() {
+        const win = window.open('', '_blank'); // open synchronously so popup blockers allow it
+        try {
+            const res = await fetch('/report.html', { method: 'HEAD', cache: 'no-store' });
+            if (!res.ok) throw new Error('missing');
+            win.location = '/report.html';
+        } catch (e) {
+            if (win) win.close();
+            this.showToast('No dashboard yet - run report_html.py on the server', false);
+        }
+    }
 
-                // ONLY show the popup if this is NOT the first time we are loading the page
-                if (!this.isInitialLoad) {
-                    this.showSystemPopup(notif.message, notif.time);
-                }
+    showTimingModal() {
+        document.getElementById('timingModal').classList.add('active');
+        this.loadTimingData();
+    }
+
+    async loadTimingData() {
+        const summaryEl = document.getElementById('timingSummary');
+        const slowestEl = document.getElementById('timingSlowest');
+        const params = new URLSearchParams({ model: this.currentModel });
+        if (document.getElementById('timingThisDevice').checked && this.deviceSerial) {
+            params.set('serial', this.deviceSerial);
+        }
+
+        try {
+            const [summaryRes, slowestRes] = await Promise.all([
+                this.apiCall(`/api/profiler/commands?${params}`),
+                this.apiCall(`/api/profiler/slowest?${params}&limit=15`)
+            ]);
+            const summary = await summaryRes.json();
+            const slowest = await slowestRes.json();
+            const commands = this.commandsData[this.currentModel]?.commands || [];
+            const nameOf = (cmdId) => commands.find(c => c.id === cmdId)?.name || cmdId;
+
+            if (!summary.commands || summary.commands.length === 0) {
+                summaryEl.innerHTML = '<div style="color: var(--text-muted);">No executions recorded yet for this model.</div>';
+            } else {
+                let html = `<table class="timing-table"><tr>
+                    <th>Command</th><th>Device</th><th>Runs</th><th>p50</th><th>p95</th><th>p99</th><th>Max</th><th>Fail %</th><th>Suggested Timeout</th>
+                </tr>`;
+                summary.commands.forEach(c => {
+                    html += `<tr>
+                        <td>${nameOf(c.commandId)}</td>
+                        <td>${c.serial}</td>
+                        <td class="num">${c.total}</td>
+                        <td class="num">${c.p50}</td>
+                        <td class="num ${c.p95 > 5000 ? 'slow' : ''}">${c.p95}</td>
+                        <td class="num ${c.p99 > 10000 ? 'slow' : ''}">${c.p99}</td>
+                        <td class="num">${c.max}</td>
+                        <td class="num">${(c.failureRate * 100).toFixed(0)}</td>
+                        <td class="num">${c.suggestedTimeoutMs ? (c.suggestedTimeoutMs / 1000) + ' s' : '-'}</td>
+                    </tr>`;
+                });
+                summaryEl.innerHTML = html + '</table>';
+            }
+
+            if (!slowest.invocations || slowest.invocations.length === 0) {
+                slowestEl.innerHTML = '<div style="color: var(--text-muted);">-</div>';
+            } else {
+                let html = '<table class="timing-table"><tr><th>Time</th><th>Command</th><th>Device</th><th>Duration (ms)</th><th>Exit</th><th>Output</th></tr>';
+                slowest.invocations.forEach(inv => {
+                    html += `<tr>
+                        <td>${new Date(inv.time).toLocaleString()}</td>
+                        <td>${nameOf(inv.commandId)}</td>
+                        <td>${inv.serial}</td>
+                        <td class="num">${inv.duration}</td>
+                        <td class="num">${inv.exitCode}</td>
+                        <td class="num">${this.formatBytes(inv.outputBytes)}</td>
+                    </tr>`;
+                });
+                slowestEl.innerHTML = html + '</table>';
             }
+        } catch (e) {
+            summaryEl.innerHTML = '<div style="color: var(--error);">Failed to load timing data</div>';
+        }
+    }
+
+    /**
+     * One notification stream per browser, not per tab: an open EventSource holds one of the six
+     * HTTP/1.1 connections a browser allows per origin, so a sixth tab would stall every API call.
+     * Tabs elect a leader over a BroadcastChannel; it keeps the stream and relays events to the others.
+     * Leaders announce themselves every 10 s (background tabs get their timers throttled, hence the
+     * generous 75 s takeover) and say goodbye when the tab closes.
+     */
+    async startNotificationFeed() {
+        // Catch up silently first (applies the latest ADB switch), then listen for pushes
+        await this.fetchNotifications(true);
+        if (!window.EventSource) return; // device-status polling picks up new events instead
+        if (!window.BroadcastChannel) return this.openNotificationStream();
+
+        this.notifTabId = Math.random().toString(36).slice(2); // sessionStorage (clientId) is copied into duplicated tabs
+        this.notifLeaderSeen = 0;
+        this.notifLeaderOpen = false;
+        this.notifChannel = new BroadcastChannel('tm-notifications');
+        this.notifChannel.onmessage = (e) => this.onNotificationChannel(e.data);
+        this.notifChannel.postMessage({ type: 'hello' });
+        // Nobody answered: take over (jittered so tabs restored together don't all open a stream)
+        setTimeout(() => this.checkNotificationLeader(), 1000 + Math.random() * 500);
+        setInterval(() => this.checkNotificationLeader(), 10000);
+        window.addEventListener('pagehide', () => {
+            if (!this.notifStream) return;
+            this.notifChannel.postMessage({ type: 'bye' });
+            this.closeNotificationStream();
         });
+    }
 
-        if (hasNew) {
-            // Keep localStorage clean, store last 50 IDs
-            const keptIds = Array.from(this.seenNotifIds).slice(-50);
-            localStorage.setItem('seenNotifIds', JSON.stringify(keptIds));
+    openNotificationStream() {
+        const since = encodeURIComponent(`${this.notifEpoch}:${this.notifSeq}`);
+        this.notifStream = new EventSource(`/api/notifications/stream?since=${since}`);
+        this.notifStream.onmessage = (e) => {
+            const epoch = e.lastEventId.split(':')[0];
+            const notif = JSON.parse(e.data);
+            this.handleGlobalNotifications([notif], epoch);
+            if (this.notifChannel) this.notifChannel.postMessage({ type: 'event', notif, epoch });
+        };
+        this.notifStream.addEventListener('truncated', () => console.warn('Some system notifications were missed (feed overflowed)'));
+    }
+
+    closeNotificationStream() {
+        if (!this.notifStream) return;
+        this.notifStream.close();
+        this.notifStream = null;
+    }
+
+    checkNotificationLeader() {
+        if (!this.notifStream && Date.now() - this.notifLeaderSeen < 75000) return;
+        if (!this.notifStream) this.openNotificationStream();
+        this.notifChannel.postMessage({ type: 'leader', id: this.notifTabId, open: this.notifStream.readyState === EventSource.OPEN });
+    }
+
+    onNotificationChannel(msg) {
+        if (msg.type === 'hello') {
+            if (this.notifStream) this.checkNotificationLeader();
+        } else if (msg.type === 'leader') {
+            this.notifLeaderSeen = Date.now();
+            this.notifLeaderOpen = msg.open;
+            // Two tabs took over at once: the lower id keeps its stream
+            if (this.notifStream && msg.id < this.notifTabId) this.closeNotificationStream();
+        } else if (msg.type === 'bye') {
+            this.notifLeaderSeen = 0;
+            setTimeout(() => this.checkNotificationLeader(), Math.random() * 1000);
+        } else if (msg.type === 'event') {
+            this.handleGlobalNotifications([msg.notif], msg.epoch);
         }
+    }
 
-        this.isInitialLoad = false;
+    // Events arrive by push, in this tab or relayed from the leader tab
+    notificationStreamLive() {
+        if (this.notifStream) return this.notifStream.readyState === EventSource.OPEN;
+        return !!this.notifChannel && this.notifLeaderOpen && Date.now() - this.notifLeaderSeen < 75000;
+    }
+
+    async fetchNotifications(silent = false) {
+        const since = this.notifEpoch ? encodeURIComponent(`${this.notifEpoch}:${this.notifSeq}`) : '';
+        const response = await this.apiCall(`/api/notifications?since=${since}`);
+        const data = await response.json();
+        if (data.success) this.handleGlobalNotifications(data.events, data.epoch, silent);
+    }
+
+    handleGlobalNotifications(notifications, epoch, silent = false) {
+        if (epoch !== this.notifEpoch) {
+            // Server restarted: its sequence starts over
+            this.notifEpoch = epoch;
+            this.notifSeq = 0;
+        }
+        notifications.forEach(notif => {
+            // Poll and push may both deliver an event; the cursor makes that harmless
+            if (notif.seq <= this.notifSeq) return;
+            this.notifSeq = notif.seq;
+
+            // Sync local state if it's an ADB change (even on initial load to stay in sync)
+            if (notif.type === 'ADB_CHANGE' && notif.data && notif.data.adb) {
+                this.adbCommand = notif.data.adb;
+                this.updateAdbToggleUI();
+                this.loadCommands();
+            }
+
+            // Events from before the page was loaded are applied, not announced
+            if (!silent) {
+                this.showSystemPopup(notif.message, notif.time);
+            }
+        });
     }
 
     showSystemPopup(message, time) {
@@ -0,0 +1,318 @@
+/**
+ * Regression Queue - server-side regression jobs that survive restarts.
+ *
+ * A job is a fixed step sequence (ADB commands resolved at submit time) run
+ * `iterations` times against one device. Jobs for the same device run one
+ * after another in submission order; different devices run in parallel.
+ * Nothing depends on a browser tab staying open.
+ *
+ * Every change is appended to a JSONL journal and fdatasync'ed before it is
+ * acknowledged:
+ *   {"t":"job","job":{...}}          submitted job (and compaction snapshots)
+ *   {"t":"set","id":...,...fields}   state changes and checkpoints
+ * A checkpoint is written after every iteration and whenever a job stops
+ * (pause, cancel, device gone). After a crash the journal is replayed and
+ * interrupted jobs resume from their last checkpoint, i.e. at most the
+ * iteration in progress is run again. The journal is compacted on open.
+ *
+ * States: queued -> running -> done | cancelled | failed
+ *         queued/running <-> paused (a paused job lets the device's next job run)
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const DEFAULTS = {
+    offlineGraceMs: 10 * 60 * 1000,  // a step may reboot the device; give up after this long without it
+    offlinePollMs: 5000,
+    keepFinished: 200                 // finished jobs kept for the list / reports
+};
+
+const FINAL = new Set(['done', 'cancelled', 'failed']);
+
+const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+
+/** The journal could not be written: the change was not persisted. */
+class JournalError extends Error {
+    constructor(cause) {
+        super(`Regression journal write failed: ${cause.message}`);
+        this.code = cause.code;
+    }
+}
+
+class RegressionQueue {
+    /**
+     * @param {string} file journal path
+     * @param {Object} deps { runStep(job, index, iteration) -> { success },
+     *                        isOnline(job) -> bool, onFinish(job) }
+     * @param {Object} [opts] see DEFAULTS
+     */
+    constructor(file, { runStep, isOnline = () => true, onFinish = () => {} }, opts = {}) {
+        this.file = file;
+        this.runStep = runStep;
+        this.isOnline = isOnline;
+        this.onFinish = onFinish;
+        this.opts = { ...DEFAULTS, ...opts };
+        this.jobs = new Map();    // id -> job, in submission order
+        this.active = new Map();  // device -> id of the job running on it
+        this.fh = null;
+        this.writes = Promise.resolve();
+        this.nextId = 1;
+    }
+
+    async open() {
+        await fs.promises.mkdir(path.dirname(this.file), { recursive: true });
+        let text = '';
+        try {
+            text = await fs.promises.readFile(this.file, 'utf8');
+        } catch (e) {
+            if (e.code !== 'ENOENT') throw e;
+        }
+        for (const line of text.split('\n')) {
+            if (!line) continue;
+            let rec;
+            try {
+                rec = JSON.parse(line);
+            } catch (e) {
+                continue; // torn final line from a crash mid-append
+            }
+            if (rec.t === 'job') this.jobs.set(rec.job.id, rec.job);
+            else if (rec.t === 'set' && this.jobs.has(rec.id)) Object.assign(this.jobs.get(rec.id), rec.fields);
+        }
+
+        // Interrupted mid-run: back in line, resuming at the checkpoint
+        let resumed = 0;
+        for (const job of this.jobs.values()) {
+            if (job.state === 'running') {
+                job.state = 'queued';
+                resumed++;
+            }
+        }
+        this._trimFinished();
+        await this._compact();
+        this.fh = await fs.promises.open(this.file, 'a');
+        if (this.jobs.size) {
+            const pending = [...this.jobs.values()].filter(j => !FINAL.has(j.state)).length;
+            console.log(`[REGRESSION] Loaded ${this.jobs.size} job(s), ${pending} pending, ${resumed} resumed after restart`);
+        }
+        this._pump();
+    }
+
+    /** Rewrite the journal as one snapshot per job (tmp + rename, so a crash keeps the old file). */
+    async _compact() {
+        const tmp = `${this.file}.tmp`;
+        const body = [...this.jobs.values()].map(job => JSON.stringify({ t: 'job', job }) + '\n').join('');
+        const fh = await fs.promises.open(tmp, 'w');
+        try {
+            await fh.writeFile(body, 'utf8');
+            await fh.datasync();
+        } finally {
+            await fh.close();
+        }
+        await fs.promises.rename(tmp, this.file);
+    }
+
+    /** Resolves once `rec` is on disk; rejects with JournalError when it could not be written. */
+    _append(rec) {
+        const line = JSON.stringify(rec) + '\n';
+        // Serialized: records must land in the order they were made
+        const write = this.writes.then(async () => {
+            try {
+                await this.fh.write(line);
+                await this.fh.datasync();
+            } catch (e) {
+                console.error('[REGRESSION] Journal write failed:', e.message);
+                throw new JournalError(e);
+            }
+        });
+        // One failed write must not stall the ones queued behind it
+        this.writes = write.catch(() => {});
+        return write;
+    }
+
+    _set(job, fields) {
+        Object.assign(job, fields);
+        return this._append({ t: 'set', id: job.id, fields });
+    }
+
+    _trimFinished() {
+        const finished = [...this.jobs.values()].filter(j => FINAL.has(j.state));
+        for (const job of finished.slice(0, Math.max(0, finished.length - this.opts.keepFinished))) {
+            this.jobs.delete(job.id);
+        }
+    }
+
+    /**
+     * Queue a job.
+     * @param {Object} spec { serial, binary, modelId, name, submittedBy, iterations,
+     *                        steps: [{ commandId, command, delay }] }
+     */
+    async submit(spec) {
+        if (!this.fh) throw new Error('regression queue not open yet');
+        const job = {
+            id: `job_${Date.now()}_${this.nextId++}`,
+            name: spec.name || '',
+            serial: spec.serial,
+            binary: spec.binary,
+            modelId: spec.modelId || '',
+            submittedBy: spec.submittedBy || '',
+            iterations: spec.iterations,
+            steps: spec.steps,
+            state: 'queued',
+            submittedAt: Date.now(),
+            startedAt: null,
+            finishedAt: null,
+            next: { iteration: 1, step: 0 }, // checkpoint: first step not yet run
+            iterationFailed: false,
+            pass: 0,
+            fail: 0,
+            error: ''
+        };
+        this.jobs.set(job.id, job);
+        try {
+            await this._append({ t: 'job', job });
+        } catch (e) {
+            this.jobs.delete(job.id); // not acknowledged, so never run
+            throw e;
+        }
+        this._trimFinished();
+        this._pump();
+        return job;
+    }
+
+    get(id) {
+        return this.jobs.get(id) || null;
+    }
+
+    list() {
+        return [...this.jobs.values()].map(job => ({ ...job, running: this.active.get(this._device(job)) === job.id }));
+    }
+
+    async pause(id) {
+        return this._control(id, ['queued', 'running'], { state: 'paused' });
+    }
+
+    async resume(id) {
+        const job = await this._control(id, ['paused'], { state: 'queued' });
+        this._pump();
+        return job;
+    }
+
+    async cancel(id) {
+        const job = await this._control(id, ['queued', 'running', 'paused'], { state: 'cancelled', finishedAt: Date.now() });
+        if (this.active.get(this._device(job)) !== job.id) this.onFinish(job);
+        return job;
+    }
+
+    // A state change that could not be journaled is rolled back and reported
+    async _control(id, allowed, fields) {
+        const job = this.jobs.get(id);
+        if (!job) throw new Error(`unknown job ${id}`);
+        if (!allowed.includes(job.state)) throw new Error(`job is ${job.state}`);
+        const previous = Object.fromEntries(Object.keys(fields).map(k => [k, job[k]]));
+        try {
+            await this._set(job, fields);
+        } catch (e) {
+            Object.assign(job, previous);
+            throw e;
+        }
+        return job;
+    }
+
+    _device(job) {
+        return `${job.binary}_${job.serial}`;
+    }
+
+    /** Start the oldest runnable job of every idle device. */
+    _pump() {
+        for (const job of this.jobs.values()) {
+            if (job.state !== 'queued') continue;
+            const device = this._device(job);
+            if (this.active.has(device)) continue;
+            this.active.set(device, job.id);
+            this._run(job)
+                .catch(e => {
+                    console.error(`[REGRESSION] ${job.id} crashed:`, e.message);
+                    // Still failed in memory if even this cannot be journaled; a restart resumes it from the last checkpoint
+                    return this._set(job, { state: 'failed', error: e.message, finishedAt: Date.now() }).catch(() => {});
+                })
+                .finally(() => {
+                    this.active.delete(device);
+                    if (FINAL.has(job.state)) this.onFinish(job);
+                    this._pump();
+                });
+        }
+    }
+
+    async _run(job) {
+        await this._set(job, { state: 'running', startedAt: job.startedAt || Date.now() });
+        console.log(`[REGRESSION] ${job.id} on ${job.serial}: iteration ${job.next.iteration}/${job.iterations}, step ${job.next.step + 1}`);
+
+        while (job.state === 'running' && job.next.iteration <= job.iterations) {
+            if (!(await this._waitOnline(job))) {
+                await this._set(job, { state: 'failed', error: 'device offline', finishedAt: Date.now() });
+                break;
+            }
+            if (job.state !== 'running') break;
+
+            const { iteration, step } = job.next;
+            let result;
+            try {
+                result = await this.runStep(job, step, iteration);
+            } catch (e) {
+                result = { success: false };
+            }
+            if (!result.success) job.iterationFailed = true;
+
+            if (step + 1 < job.steps.length) {
+                job.next = { iteration, step: step + 1 };
+            } else {
+                // Iteration complete: this is the checkpoint a restart resumes from
+                await this._set(job, {
+                    next: { iteration: iteration + 1, step: 0 },
+                    iterationFailed: false,
+                    pass: job.pass + (job.iterationFailed ? 0 : 1),
+                    fail: job.fail + (job.iterationFailed ? 1 : 0)
+                });
+            }
+            await this._wait(job, job.steps[step].delay || 0);
+        }
+
+        if (job.state === 'running') {
+            await this._set(job, { state: 'done', finishedAt: Date.now() });
+            console.log(`[REGRESSION] ${job.id} done: ${job.pass} pass, ${job.fail} fail`);
+        } else {
+            // Paused / cancelled / failed mid-iteration: keep the exact position for resume
+            await this._set(job, { next: job.next, iterationFailed: job.iterationFailed });
+        }
+    }
+
+    // Step delay; cut short as soon as the job is paused or cancelled
+    async _wait(job, ms) {
+        const until = Date.now() + ms;
+        while (job.state === 'running' && Date.now() < until) {
+            await sleep(Math.min(250, until - Date.now()));
+        }
+    }
+
+    async _waitOnline(job) {
+        const since = Date.now();
+        let logged = false;
+        while (job.state === 'running') {
+            if (await this.isOnline(job)) return true;
+            if (Date.now() - since > this.opts.offlineGraceMs) return false;
+            if (!logged) console.log(`[REGRESSION] ${job.id} waiting for ${job.serial} to come back`);
+            logged = true;
+            await sleep(this.opts.offlinePollMs);
+        }
+        return true; // stopped while waiting - the caller checks the state
+    }
+
+    async close() {
+        await this.writes;
+        if (this.fh) await this.fh.close();
+        this.fh = null;
+    }
+}
+
+module.exports = { RegressionQueue, JournalError };
@@ -0,0 +1,206 @@
+"""
+Telephony Manager - Static HTML Results Dashboard
+Renders the same aggregated model as the results deck (results_analytics.
+build_report_model) into one self-contained HTML page: inline CSS, inline SVG
+charts, no scripts or external assets. The server serves it from public/,
+so the latest pass rates are one click away instead of opening a pptx.
+
+Usage:
+    python report_html.py results/ --out public/report.html
+    python create_report.py results/ --html public/report.html   # deck + dashboard in one run
+"""
+
+import argparse
+import os
+from datetime import datetime
+from html import escape
+
+from results_analytics import build_report_model
+
+GREEN = '#10b981'
+ORANGE = '#f59e0b'
+RED = '#ef4444'
+ACCENT = '#6366f1'
+MUTED = '#6b7280'
+TRACK = 'rgba(255,255,255,0.08)'
+
+CSS = """
+body{margin:0;background:#0a0e1a;color:#f9fafb;font:14px/1.45 'Segoe UI',system-ui,sans-serif}
+main{max-width:1200px;margin:0 auto;padding:24px}
+h1{font-size:26px;margin:0 0 4px}h2{font-size:17px;margin:0 0 12px;color:#c7d2fe}
+.sub{color:#9ca3af;margin-bottom:20px}
+.grid{display:grid;gap:16px}.kpis{grid-template-columns:repeat(4,1fr)}.two{grid-template-columns:1fr 1fr}
+.card{background:#111827;border:1px solid rgba(255,255,255,.1);border-radius:12px;padding:16px;margin-bottom:16px}
+.kpi b{display:block;font-size:28px}.kpi span{color:#9ca3af;font-size:12px;text-transform:uppercase}
+table{width:100%;border-collapse:collapse;font-size:13px}
+th,td{padding:5px 8px;text-align:left;border-bottom:1px solid rgba(255,255,255,.06)}
+th{color:#9ca3af;font-weight:600}td.n{text-align:right;font-variant-numeric:tabular-nums}
+details{margin-bottom:8px}summary{cursor:pointer;padding:6px 0}
+svg text{fill:#9ca3af;font-size:10px}
+@media (max-width:800px){.kpis,.two{grid-template-columns:1fr 1fr}}
+"""
+
+
+def rate_color(rate):
+    if rate is None:
+        return MUTED
+    if rate >= 0.95:
+        return GREEN
+    return ORANGE if rate >= 0.7 else RED
+
+
+def fmt_time(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M') if ts else '—'
+
+
+def pct(v):
+    return '—' if v is None else f"{v:.1%}"
+
+
+def bar(rate, width=120, height=10, color=None):
+    """Inline SVG bar with a track; `rate` in 0..1."""
+    filled = 0 if rate is None else max(0.0, min(1.0, rate)) * width
+    return (f'<svg width="{width}" height="{height}" role="img">'
+            f'<rect width="{width}" height="{height}" rx="3" fill="{TRACK}"/>'
+            f'<rect width="{filled:.1f}" height="{height}" rx="3" fill="{color or rate_color(rate)}"/></svg>')
+
+
+def hour_chart(rates, width=520, height=140):
+    """Column chart of failure rate per hour of day."""
+    pad, cols = 22, len(rates)
+    step = (width - pad) / cols
+    peak = max([r for r in rates if r] or [1.0])
+    out = [f'<svg viewBox="0 0 {width} {height}" width="100%" role="img" aria-label="Failure rate by hour">']
+    for h, r in enumerate(rates):
+        x = pad + h * step
+        if r:
+            bh = (height - 24) * r / peak
+            out.append(f'<rect x="{x + 1:.1f}" y="{height - 16 - bh:.1f}" width="{step - 2:.1f}" height="{bh:.1f}" '
+                       f'fill="{rate_color(1 - r)}"><title>{h:02d}:00 — {r:.0%} failed</title></rect>')
+        if h % 3 == 0:
+            out.append(f'<text x="{x + step / 2:.1f}" y="{height - 3}" text-anchor="middle">{h:02d}</text>')
+    out.append(f'<text x="0" y="10">{peak:.0%}</text></svg>')
+    return ''.join(out)
+
+
+def iteration_chart(edges, rates, width=520, height=140):
+    """Line chart of failure rate across regression progress."""
+    points = [(i, r) for i, r in enumerate(rates) if r is not None]
+    if not points:
+        return '<p class="sub">No regression runs yet.</p>'
+    pad = 22
+    peak = max(r for _, r in points) or 1.0
+    n = max(len(rates) - 1, 1)
+    coords = [(pad + (width - pad - 6) * i / n, height - 16 - (height - 28) * r / peak) for i, r in points]
+    path = ' '.join(f"{'M' if k == 0 else 'L'}{x:.1f},{y:.1f}" for k, (x, y) in enumerate(coords))
+    dots = ''.join(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{ACCENT}"><title>iterations '
+                   f'{int(edges[i])}–{int(edges[i + 1]) - 1}: {r:.0%} failed</title></circle>'
+                   for (x, y), (i, r) in zip(coords, points))
+    return (f'<svg viewBox="0 0 {width} {height}" width="100%" role="img" aria-label="Failure rate by iteration">'
+            f'<path d="{path}" fill="none" stroke="{ACCENT}" stroke-width="2"/>{dots}'
+            f'<text x="0" y="10">{peak:.0%}</text>'
+            f'<text x="{pad}" y="{height - 3}">#{int(edges[0])}</text>'
+            f'<text x="{width - 6}" y="{height - 3}" text-anchor="end">#{int(edges[-1]) - 1}</text></svg>')
+
+
+def heatmap(comparison, cell=22):
+    models, commands, matrix = comparison['models'], comparison['commands'], comparison['pass_rate']
+    if not commands:
+        return '<p class="sub">No commands shared between models yet.</p>'
+    left, top = 90, 110
+    width, height = left + cell * len(commands), top + cell * len(models)
+    out = [f'<svg viewBox="0 0 {width} {height}" width="100%" role="img" aria-label="Pass rate by model">']
+    for j, c in enumerate(commands):
+        x = left + j * cell + cell / 2
+        out.append(f'<text transform="translate({x:.1f},{top - 6}) rotate(-60)">{escape(c[:18])}</text>')
+    for i, m in enumerate(models):
+        y = top + i * cell
+        out.append(f'<text x="{left - 6}" y="{y + cell * 0.65:.1f}" text-anchor="end">{escape(m)}</text>')
+        for j, r in enumerate(matrix[i]):
+            fill = TRACK if r is None else rate_color(r)
+            label = 'not run' if r is None else f'{r:.0%}'
+            out.append(f'<rect x="{left + j * cell}" y="{y}" width="{cell - 2}" height="{cell - 2}" rx="3" '
+                       f'fill="{fill}"><title>{escape(m)} / {escape(commands[j])}: {label}</title></rect>')
+    out.append('</svg>')
+    return ''.join(out)
+
+
+def offenders_table(offenders):
+    if not offenders:
+        return '<p class="sub">No failing commands.</p>'
+    rows = ''.join(
+        f"<tr><td>{escape(r['model'])}</td><td>{escape(r['command'])}</td><td class=n>{r['samples']}</td>"
+        f"<td>{bar(r['pass_rate'])} {pct(r['pass_rate'])}</td>"
+        f"<td>{bar(r['flip_rate'], color=ORANGE)} {pct(r['flip_rate'])}</td>"
+        f"<td>{fmt_time(r['last_failure'])}</td></tr>"
+        for r in offenders)
+    return ('<table><tr><th>Model</th><th>Command</th><th>Samples</th><th>Pass rate</th>'
+            f'<th>Flip rate</th><th>Last failure</th></tr>{rows}</table>')
+
+
+def model_section(model, data):
+    commands = sorted(data['commands'], key=lambda r: (r['pass_rate'], -r['flips']))
+    rows = ''.join(
+        f"<tr><td>{escape(r['command'])}</td><td class=n>{r['samples']}</td><td class=n>{r['failed']}</td>"
+        f"<td>{bar(r['pass_rate'], 90)} {pct(r['pass_rate'])}</td><td class=n>{r['flips']}</td></tr>"
+        for r in commands)
+    return (f"<details><summary><b>{escape(model)}</b> — {pct(data['pass_rate'])} pass, "
+            f"{data['runs']} runs, {data['samples']:,} samples</summary>"
+            '<table><tr><th>Command</th><th>Samples</th><th>Failed</th><th>Pass rate</th><th>Flips</th></tr>'
+            f'{rows}</table></details>')
+
+
+def render(report):
+    period = report['period']
+    span = f"{fmt_time(period[0])} → {fmt_time(period[1])}" if period else 'No results yet'
+    models = sorted(report['models'].items())
+    kpis = [
+        (f"{report['samples']:,}", 'Samples', '#f9fafb'),
+        (pct(report['pass_rate']), 'Pass rate', rate_color(report['pass_rate'])),
+        (str(len(models)), 'Models', '#f9fafb'),
+        (str(sum(1 for r in report['offenders'] if r['flips'])), 'Flaky commands', ORANGE),
+    ]
+    model_bars = ''.join(
+        f"<tr><td>{escape(m)}</td><td>{bar(d['pass_rate'], 240, 12)}</td><td class=n>{pct(d['pass_rate'])}</td>"
+        f"<td class=n>{d['runs']} runs</td></tr>" for m, d in models)
+    fbi = report['failure_by_iteration']
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Sanity Results — {escape(span)}</title><style>{CSS}</style></head>
+<body><main>
+<h1>Sanity Results</h1>
+<div class="sub">{escape(span)} · generated {escape(report['generated'])}</div>
+<div class="grid kpis">{''.join(f'<div class="card kpi"><b style="color:{c}">{v}</b><span>{l}</span></div>' for v, l, c in kpis)}</div>
+<div class="card"><h2>Pass rate by model</h2><table>{model_bars}</table></div>
+<div class="card"><h2>Flakiest commands</h2>{offenders_table(report['offenders'])}</div>
+<div class="grid two">
+<div class="card"><h2>Failures by hour of day</h2>{hour_chart(report['failure_by_hour'])}</div>
+<div class="card"><h2>Failures across regression iterations</h2>{iteration_chart(fbi['edges'], fbi['rate'])}</div>
+</div>
+<div class="card"><h2>Model comparison (shared commands)</h2>{heatmap(report['comparison'])}</div>
+<div class="card"><h2>All commands</h2>{''.join(model_section(m, d) for m, d in models)}</div>
+</main></body></html>
+"""
+
+
+def write_html(report, out):
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp = out + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(render(report))
+    os.replace(tmp, out)  # the server may be serving the old file right now
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the results dashboard as one static HTML file')
+    parser.add_argument('inputs', nargs='+', help='results/ dir, results_*.json, regression CSVs or results/log')
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public', 'report.html'))
+    parser.add_argument('--top', type=int, default=15, help='offenders to list')
+    args = parser.parse_args()
+
+    write_html(build_report_model(args.inputs, args.top), args.out)
+    print(f"Dashboard written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
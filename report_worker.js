@@ -0,0 +1,67 @@
+/**
+ * Report Worker - CPU-bound post-processing run by WorkerPool (worker_pool.js).
+ *
+ * Tasks:
+ *   diff { a, b }                 -> [{ op, line }] line diff of two outputs
+ *   csv  { records, names }       -> Uint8Array (transferred) regression report CSV,
+ *                                    same columns as the UI export
+ *   runCsv { plan, runId, names }  -> { model, ts, csv } or null: reads the run's steps
+ *                                    from the results log (ResultsStore.readPlan) and
+ *                                    builds the CSV, so the scan stays off the main loop;
+ *                                    `names` is { model: { commandId: name } }
+ */
+
+const { parentPort } = require('worker_threads');
+const { diffLines, readRun } = require('./results_store');
+
+const CSV_HEADERS = ['Iteration', 'Step', 'Time', 'Command Name', 'Command ID', 'Status', 'Output'];
+
+const csvCell = (value) => `"${String(value === undefined || value === null ? '' : value).replace(/"/g, '""').replace(/\r?\n/g, ' ')}"`;
+
+// Local HH:MM:SS - the format results_analytics.py reads back from regression CSVs
+const clock = (ts) => new Date(ts).toTimeString().slice(0, 8);
+
+const tasks = {
+    diff: ({ a, b }) => diffLines(a, b),
+
+    runCsv: async ({ plan, runId, names = {} }) => {
+        const records = await readRun(plan, { runId, kind: 'step' });
+        if (records.length === 0) return null;
+        const model = records[0].model || 'unknown';
+        return { model, ts: records[0].ts, csv: tasks.csv({ records, names: names[model] }) };
+    },
+
+    csv: ({ records, names = {} }) => {
+        const lines = [CSV_HEADERS.join(',')];
+        for (const r of records) {
+            lines.push([
+                r.iteration,
+                r.step,
+                clock(r.ts),
+                csvCell(names[r.commandId] || r.commandId),
+                r.commandId,
+                r.success ? 'PASS' : 'FAIL',
+                csvCell(r.output)
+            ].join(','));
+        }
+        return new TextEncoder().encode(lines.join('\n'));
+    }
+};
+
+// Encoded output is moved to the main thread, not copied
+const transferList = (result) => {
+    if (result instanceof Uint8Array) return [result.buffer];
+    if (result && result.csv instanceof Uint8Array) return [result.csv.buffer];
+    return [];
+};
+
+parentPort.on('message', async ({ id, task, payload }) => {
+    try {
+        const handler = tasks[task];
+        if (!handler) throw new Error(`unknown task '${task}'`);
+        const result = await handler(payload);
+        parentPort.postMessage({ id, result }, transferList(result));
+    } catch (e) {
+        parentPort.postMessage({ id, error: e.message });
+    }
+});
@@ -0,0 +1,311 @@
+"""
+Telephony Manager - Results Analytics
+Loads accumulated results (legacy results_*.json files, browser-exported
+regression CSVs and the server's results/log JSONL store) into one columnar
+numpy array and computes, per model and command:
+
+    pass rate, flip rate (pass<->fail transitions between consecutive runs),
+    failure clustering by iteration and by hour of day, per-model comparison
+
+All statistics are computed with sorted group boundaries + reduceat/bincount,
+so months of regression history are summarized in milliseconds.
+
+Usage:
+    python results_analytics.py results/ regression_report_toyota_1738483028938.csv --top 15
+    python results_analytics.py results/log --json stability.json
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+
+RESULT_FILE_RE = re.compile(r'^results_(.+?)_(\d{4}-\d{2}-\d{2}T[\d-]+\.\d+Z)\.json$')
+CSV_FILE_RE = re.compile(r'^regression_report_(.+?)_(\d+)\.csv$')
+LOG_FILE_RE = re.compile(r'^results-\d+\.jsonl$')
+
+ROW_DTYPE = np.dtype([
+    ('model', 'U32'),
+    ('command', 'U64'),
+    ('run', 'U96'),        # results file / regression run the sample belongs to
+    ('iteration', np.int32),  # regression iteration, 0 for single runs
+    ('time', np.float64),  # epoch seconds
+    ('passed', np.bool_),
+])
+
+MIN_SAMPLES = 3  # commands with fewer samples are not ranked
+
+
+# ─── Loaders ──────────────────────────────────────────────────────────
+
+def _legacy_time(iso):
+    """results_toyota_2026-01-30T11-17-13.510Z.json -> epoch seconds."""
+    iso = re.sub(r'T(\d{2})-(\d{2})-(\d{2})', r'T\1:\2:\3', iso)
+    return datetime.fromisoformat(iso.replace('Z', '+00:00')).timestamp()
+
+
+def load_result_file(path):
+    m = RESULT_FILE_RE.match(os.path.basename(path))
+    if not m:
+        return []
+    model, ts = m.group(1), _legacy_time(m.group(2))
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [(model, cmd, os.path.basename(path), 0, ts, bool(r.get('success')))
+            for cmd, r in data.items()]
+
+
+# "10:15:32 AM" (en-US), "10:15:32" (24h locales), "오후 1:00:00" (ko-KR)
+CSV_TIME_RE = re.compile(r'(오전|오후)?\s*(\d{1,2}):(\d{2}):(\d{2})\s*([AaPp])?')
+
+
+def _csv_time(day_start, text):
+    """Combine the file's date with the locale time string written by app.js.
+
+    A regex instead of strptime: it is ~20x faster and regression CSVs have one row per step.
+    """
+    m = CSV_TIME_RE.search(text)
+    if not m:
+        return day_start
+    marker = m.group(1) or m.group(5)
+    hour = int(m.group(2))
+    if marker:
+        hour = hour % 12 + (12 if marker in ('오후', 'P', 'p') else 0)
+    return day_start + hour * 3600 + int(m.group(3)) * 60 + int(m.group(4))
+
+
+def load_regression_csv(path):
+    m = CSV_FILE_RE.match(os.path.basename(path))
+    model = m.group(1) if m else 'unknown'
+    started = int(m.group(2)) / 1000 if m else os.path.getmtime(path)
+    day = datetime.fromtimestamp(started)
+    day_start = day.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    rows = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for rec in csv.DictReader(f):
+            ts = _csv_time(day_start, rec.get('Time', ''))
+            if ts < started - 60:
+                ts += 86400  # regression ran past midnight
+            rows.append((model, rec.get('Command ID', ''), os.path.basename(path),
+                         int(rec.get('Iteration') or 0), ts, rec.get('Status', '').upper() == 'PASS'))
+    return rows
+
+
+def load_results_log(directory):
+    """Records from the server's append-only results store (outputs are not needed)."""
+    rows = []
+    names = sorted(f for f in os.listdir(directory) if LOG_FILE_RE.match(f))
+    for name in names:
+        with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn line
+                if not rec.get('commandId'):
+                    continue
+                rows.append((rec.get('model') or 'unknown', rec['commandId'], rec.get('runId') or name,
+                             int(rec.get('iteration') or 0), rec.get('ts', 0) / 1000, bool(rec.get('success'))))
+    return rows
+
+
+def load_rows(paths):
+    """Expand files / directories into one ROW_DTYPE array sorted by time.
+
+    A results/ directory contributes its results_*.json files and, if present,
+    its log/ store. Legacy files already imported into the store are skipped.
+    """
+    rows = []
+    imported = set()
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            log_dir = p if any(LOG_FILE_RE.match(f) for f in os.listdir(p)) else os.path.join(p, 'log')
+            if os.path.isdir(log_dir):
+                rows.extend(load_results_log(log_dir))
+                manifest = os.path.join(log_dir, 'manifest.json')
+                if os.path.isfile(manifest):
+                    with open(manifest, 'r', encoding='utf-8') as f:
+                        imported.update(json.load(f).get('imported', []))
+            files.extend(sorted(glob.glob(os.path.join(p, 'results_*.json'))))
+            files.extend(sorted(glob.glob(os.path.join(p, 'regression_report_*.csv'))))
+        else:
+            files.extend(sorted(glob.glob(p)))
+    for path in files:
+        if os.path.basename(path) in imported:
+            continue
+        if path.endswith('.csv'):
+            rows.extend(load_regression_csv(path))
+        elif path.endswith('.json'):
+            rows.extend(load_result_file(path))
+
+    arr = np.array(rows, dtype=ROW_DTYPE)
+    return arr[np.argsort(arr['time'], kind='stable')]
+
+
+# ─── Statistics ──────────────────────────────────────────────────────
+
+def _groups(rows):
+    """Sort by (model, command, time) and return (sorted rows, group start offsets, group id per row)."""
+    order = np.lexsort((rows['iteration'], rows['time'], rows['command'], rows['model']))
+    s = rows[order]
+    if s.size == 0:
+        return s, np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    new_group = np.ones(s.size, dtype=bool)
+    new_group[1:] = (s['model'][1:] != s['model'][:-1]) | (s['command'][1:] != s['command'][:-1])
+    starts = np.flatnonzero(new_group)
+    gid = np.cumsum(new_group) - 1
+    return s, starts, gid
+
+
+def command_stats(rows):
+    """Per (model, command): samples, pass rate, flip count/rate and last failure.
+
+    Returns a list of dicts sorted by flakiness: flip rate first, then failure rate.
+    """
+    s, starts, gid = _groups(rows)
+    if s.size == 0:
+        return []
+    passed = s['passed'].astype(np.int64)
+    samples = np.diff(np.append(starts, s.size))
+    passes = np.add.reduceat(passed, starts)
+
+    # A flip is a pass->fail or fail->pass transition between consecutive samples of one command
+    same = gid[1:] == gid[:-1]
+    flips = np.bincount(gid[1:][same & (passed[1:] != passed[:-1])], minlength=starts.size)
+
+    fail_time = np.where(s['passed'], -np.inf, s['time'])
+    last_fail = np.maximum.reduceat(fail_time, starts)
+
+    stats = []
+    for g, start in enumerate(starts):
+        n = int(samples[g])
+        pass_rate = passes[g] / n
+        flip_rate = flips[g] / (n - 1) if n > 1 else 0.0
+        stats.append({
+            'model': str(s['model'][start]),
+            'command': str(s['command'][start]),
+            'samples': n,
+            'passed': int(passes[g]),
+            'failed': int(n - passes[g]),
+            'pass_rate': float(pass_rate),
+            'flips': int(flips[g]),
+            'flip_rate': float(flip_rate),
+            'last_failure': None if np.isinf(last_fail[g]) else float(last_fail[g]),
+        })
+    return sorted(stats, key=lambda r: (-r['flip_rate'], r['pass_rate'], -r['samples']))
+
+
+def top_offenders(stats, top=10, min_samples=MIN_SAMPLES):
+    """Commands that fail at least sometimes, flakiest first (always-failing ones go last)."""
+    ranked = [r for r in stats if r['failed'] and r['samples'] >= min_samples]
+    return sorted(ranked, key=lambda r: (r['pass_rate'] == 0, -r['flip_rate'], r['pass_rate']))[:top]
+
+
+def failure_by_hour(rows):
+    """Failure rate per local hour of day -> (24,) float array (NaN where nothing ran)."""
+    if rows.size == 0:
+        return np.full(24, np.nan)
+    utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+    hours = ((rows['time'] + utc_offset) // 3600 % 24).astype(np.int64)
+    total = np.bincount(hours, minlength=24)
+    failed = np.bincount(hours, weights=~rows['passed'], minlength=24)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, failed / total, np.nan)
+
+
+def failure_by_iteration(rows, bins=10):
+    """Failure rate across regression progress: (bin edges, rate per bin).
+
+    Only regression samples (iteration > 0) count; a rising curve points at
+    state that degrades over a long run (memory, modem resets, thermal).
+    """
+    reg = rows[rows['iteration'] > 0]
+    if reg.size == 0:
+        return np.array([]), np.array([])
+    edges = np.linspace(1, reg['iteration'].max() + 1, min(bins, int(reg['iteration'].max())) + 1)
+    total, _ = np.histogram(reg['iteration'], bins=edges)
+    failed, _ = np.histogram(reg['iteration'][~reg['passed']], bins=edges)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return edges, np.where(total > 0, failed / total, np.nan)
+
+
+def model_comparison(stats):
+    """Pass rate matrix for commands shared by more than one model.
+
+    Returns (models, commands, matrix) with NaN where a model lacks the command.
+    """
+    models = sorted({r['model'] for r in stats})
+    by_command = {}
+    for r in stats:
+        by_command.setdefault(r['command'], {})[r['model']] = r['pass_rate']
+    commands = sorted(c for c, per_model in by_command.items() if len(per_model) > 1)
+    matrix = np.full((len(models), len(commands)), np.nan)
+    for j, c in enumerate(commands):
+        for i, m in enumerate(models):
+            matrix[i, j] = by_command[c].get(m, np.nan)
+    return models, commands, matrix
+
+
+def build_report_model(paths, top=10):
+    """Everything the report generators need, as plain JSON-serializable data."""
+    rows = load_rows(paths)
+    stats = command_stats(rows)
+    models, shared, matrix = model_comparison(stats)
+    edges, iter_rate = failure_by_iteration(rows)
+    per_model = {}
+    for m in models:
+        sel = rows[rows['model'] == m]
+        per_model[m] = {
+            'samples': int(sel.size),
+            'pass_rate': float(sel['passed'].mean()) if sel.size else 0.0,
+            'runs': int(np.unique(sel['run']).size),
+            'commands': [r for r in stats if r['model'] == m],
+        }
+    nan_to_none = lambda a: [None if np.isnan(v) else float(v) for v in a]
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'period': [float(rows['time'][0]), float(rows['time'][-1])] if rows.size else None,
+        'samples': int(rows.size),
+        'pass_rate': float(rows['passed'].mean()) if rows.size else 0.0,
+        'models': per_model,
+        'offenders': top_offenders(stats, top),
+        'failure_by_hour': nan_to_none(failure_by_hour(rows)),
+        'failure_by_iteration': {'edges': edges.tolist(), 'rate': nan_to_none(iter_rate)},
+        'comparison': {'models': models, 'commands': shared,
+                       'pass_rate': [nan_to_none(row) for row in matrix]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flaky-command and failure-trend analytics')
+    parser.add_argument('inputs', nargs='+', help='results/ dir, results_*.json, regression CSVs or results/log')
+    parser.add_argument('--top', type=int, default=15, help='offenders to list')
+    parser.add_argument('--json', help='write the full report model to this file')
+    args = parser.parse_args()
+
+    report = build_report_model(args.inputs, args.top)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report model written to {args.json}")
+
+    print(f"{report['samples']} samples, overall pass rate {report['pass_rate']:.1%}\n")
+    print(f"{'Model':<12}{'Command':<36}{'Samples':>8}{'Pass %':>8}{'Flips':>7}{'Flip %':>8}")
+    print('-' * 79)
+    for r in report['offenders']:
+        print(f"{r['model']:<12}{r['command'][:35]:<36}{r['samples']:>8}"
+              f"{r['pass_rate'] * 100:>7.1f}%{r['flips']:>7}{r['flip_rate'] * 100:>7.1f}%")
+    hours = report['failure_by_hour']
+    worst = sorted((h for h in range(24) if hours[h]), key=lambda h: -hours[h])[:3]
+    if worst:
+        print('\nWorst hours:', ', '.join(f"{h:02d}:00 ({hours[h]:.0%} fail)" for h in worst))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,714 @@
+/**
+ * Results Store - durable append-only log of command results.
+ *
+ * Every saved result (Run All / manual save) and every regression step is
+ * appended as one JSON line to the current segment file. Appends are
+ * group-committed: records queued within a short window are written with a
+ * single write() + fdatasync(), and callers awaiting append() resolve once
+ * their record is on disk. Large outputs are deflated and stored base64.
+ *
+ * Segments rotate by size and by UTC day. A small manifest records the
+ * time range, models and command ids held by each segment, so queries only
+ * open the segments that can match.
+ *
+ * Outputs are content-addressed: each output is normalized (serial prefix
+ * and CRLF removed), hashed, and its body written once to the blob log.
+ * Records only carry `outputHash`, plus `changed` / `prevHash` relative to
+ * the previous output of the same regression step (or, for saved results,
+ * the same model + device + command), so a 500-iteration regression of
+ * identical sldd banners costs one body and 500 short lines.
+ *
+ * Layout on disk:
+ *   <dir>/results-<firstRecordMs>.jsonl   one record per line
+ *   <dir>/blobs.jsonl                     {"h": hash, "b": body} or {"h", "z": deflated base64}
+ *   <dir>/manifest.json                   segment summaries + imported legacy files
+ */
+
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+const readline = require('readline');
+const crypto = require('crypto');
+
+const DEFAULTS = {
+    segmentBytes: 32 * 1024 * 1024,  // rotate after 32 MB...
+    flushIntervalMs: 250,            // ...group-commit window
+    flushBytes: 256 * 1024,          // flush early once this much is queued
+    compressAbove: 2048,             // deflate bodies larger than 2 KB
+    blobCacheSize: 512,              // decoded bodies kept in memory
+    lastHashEntries: 50000           // "previous output" keys remembered for change detection
+};
+
+const SEGMENT_RE = /^results-(\d+)\.jsonl$/;
+const MANIFEST_FILE = 'manifest.json';
+const BLOB_FILE = 'blobs.jsonl';
+
+const utcDay = (ms) => new Date(ms).toISOString().slice(0, 10);
+
+const newSummary = (file) => ({ file, bytes: 0, count: 0, minTs: null, maxTs: null, models: [], commands: [] });
+
+const addToSummary = (summary, record, bytes) => {
+    summary.bytes += bytes;
+    summary.count++;
+    if (summary.minTs === null || record.ts < summary.minTs) summary.minTs = record.ts;
+    if (summary.maxTs === null || record.ts > summary.maxTs) summary.maxTs = record.ts;
+    if (record.model && !summary.models.includes(record.model)) summary.models.push(record.model);
+    if (record.commandId && !summary.commands.includes(record.commandId)) summary.commands.push(record.commandId);
+};
+
+/**
+ * Normalize an output before hashing so the same device answer always maps to
+ * the same body: drop the "[SERIAL] " prefix added by /api/execute, unify line
+ * endings and trailing whitespace.
+ */
+const normalizeOutput = (output) => String(output)
+    .replace(/^\[[^\]\r\n]+\] /, '')
+    .replace(/\r\n?/g, '\n')
+    .replace(/[ \t]+$/gm, '')
+    .replace(/\n+$/, '');
+
+const hashOutput = (body) => crypto.createHash('sha256').update(body).digest('hex').slice(0, 32);
+
+const encodeBlob = (hash, body, threshold) => (Buffer.byteLength(body) > threshold
+    ? { h: hash, z: zlib.deflateRawSync(body).toString('base64') }
+    : { h: hash, b: body });
+
+const decodeBlob = (blob) => (blob.z !== undefined
+    ? zlib.inflateRawSync(Buffer.from(blob.z, 'base64')).toString('utf8')
+    : blob.b);
+
+/**
+ * Line diff (LCS) between two outputs: [{ op: ' ' | '-' | '+', line }].
+ * Outputs are sldd banners of a few dozen lines, so the quadratic table is cheap;
+ * very large inputs fall back to "everything removed / everything added".
+ */
+const diffLines = (before, after) => {
+    const a = before.split('\n');
+    const b = after.split('\n');
+    if (a.length * b.length > 4e6) {
+        return [...a.map(line => ({ op: '-', line })), ...b.map(line => ({ op: '+', line }))];
+    }
+    const cols = b.length + 1;
+    const lcs = new Uint32Array((a.length + 1) * cols);
+    for (let i = a.length - 1; i >= 0; i--) {
+        for (let j = b.length - 1; j >= 0; j--) {
+            lcs[i * cols + j] = a[i] === b[j]
+                ? lcs[(i + 1) * cols + j + 1] + 1
+                : Math.max(lcs[(i + 1) * cols + j], lcs[i * cols + j + 1]);
+        }
+    }
+    const out = [];
+    let i = 0, j = 0;
+    while (i < a.length && j < b.length) {
+        if (a[i] === b[j]) {
+            out.push({ op: ' ', line: a[i] });
+            i++; j++;
+        } else if (lcs[(i + 1) * cols + j] >= lcs[i * cols + j + 1]) {
+            out.push({ op: '-', line: a[i++] });
+        } else {
+            out.push({ op: '+', line: b[j++] });
+        }
+    }
+    while (i < a.length) out.push({ op: '-', line: a[i++] });
+    while (j < b.length) out.push({ op: '+', line: b[j++] });
+    return out;
+};
+
+// Records of a segment file; a torn final line after a crash is skipped
+async function* readRecords(file) {
+    const input = fs.createReadStream(file, { encoding: 'utf8' });
+    const rl = readline.createInterface({ input, crlfDelay: Infinity });
+    for await (const line of rl) {
+        if (!line) continue;
+        let record;
+        try {
+            record = JSON.parse(line);
+        } catch (e) {
+            continue;
+        }
+        yield { line, record, bytes: Buffer.byteLength(line) + 1 };
+    }
+}
+
+// Key of "the previous output of this step" used for change detection
+const previousKey = (record) => (record.kind === 'step'
+    ? `step|${record.runId}|${record.step}|${record.commandId}`
+    : `result|${record.model}|${record.serial}|${record.commandId}`);
+
+const matches = (record, filter) => {
+    if (filter.model && record.model !== filter.model) return false;
+    if (filter.commandId && record.commandId !== filter.commandId) return false;
+    if (filter.serial && record.serial !== filter.serial) return false;
+    if (filter.runId && record.runId !== filter.runId) return false;
+    if (filter.kind && record.kind !== filter.kind) return false;
+    if (filter.success !== undefined && record.success !== filter.success) return false;
+    if (filter.changed !== undefined && !!record.changed !== filter.changed) return false;
+    if (filter.from !== undefined && record.ts < filter.from) return false;
+    if (filter.to !== undefined && record.ts > filter.to) return false;
+    return true;
+};
+
+class ResultsStore {
+    constructor(options) {
+        this.options = { ...DEFAULTS, ...options };
+        this.dir = this.options.dir;
+        this.segments = [];       // summaries, oldest first; last one is being appended to
+        this.imported = [];       // legacy results_*.json already copied into the log
+        this.handle = null;
+        this.queue = [];          // { line, record, resolve, reject }
+        this.queuedBytes = 0;
+        this.flushTimer = null;
+        this.flushing = Promise.resolve();
+        this.manifestDirty = false;
+        this.blobIndex = new Map();   // hash -> { offset, length } in blobs.jsonl, only once synced
+        this.pendingBlobs = new Map(); // hash -> encoded blob line not yet on disk
+        this.blobBytes = 0;
+        this.blobCache = new Map();   // hash -> body (LRU by insertion order)
+        this.blobHandle = null;
+        this.lastHash = new Map();    // previousKey -> outputHash of the last written record
+        this.queuedHash = new Map();  // previousKey -> outputHash of the last queued record
+        this.dedupHits = 0;
+    }
+
+    /**
+     * Load the manifest and reconcile it with the files actually on disk
+     * (a crash may have left the last segment longer than the manifest says).
+     */
+    async open() {
+        await fs.promises.mkdir(this.dir, { recursive: true });
+        let manifest = { segments: [], imported: [] };
+        try {
+            manifest = JSON.parse(await fs.promises.readFile(path.join(this.dir, MANIFEST_FILE), 'utf8'));
+        } catch (e) { /* first run or unreadable - rebuilt below */ }
+        this.imported = manifest.imported || [];
+
+        const known = new Map((manifest.segments || []).map(s => [s.file, s]));
+        const files = (await fs.promises.readdir(this.dir))
+            .filter(f => SEGMENT_RE.test(f))
+            .sort((a, b) => parseInt(SEGMENT_RE.exec(a)[1], 10) - parseInt(SEGMENT_RE.exec(b)[1], 10));
+
+        for (const file of files) {
+            const { size } = await fs.promises.stat(path.join(this.dir, file));
+            let summary = known.get(file);
+            if (!summary || summary.bytes !== size) {
+                summary = await this._scanSegment(file);
+                this.manifestDirty = true;
+            }
+            this.segments.push(summary);
+        }
+        if (this.segments.length !== known.size) this.manifestDirty = true;
+        if (this.segments.length) await this._repairTail(this._current().file);
+        await this._loadBlobIndex();
+        await this._loadLastHashes();
+        await this._saveManifest();
+    }
+
+    /**
+     * Rebuild the "previous output" map from the newest segment, so the first
+     * record of a step after a restart is still compared with its last output.
+     */
+    async _loadLastHashes() {
+        const current = this._current();
+        if (!current || current.count === 0) return;
+        for await (const { record } of this._lines(current.file)) {
+            const hash = record.outputHash !== undefined ? record.outputHash
+                : (typeof record.output === 'string' ? hashOutput(normalizeOutput(record.output)) : undefined);
+            if (hash === undefined) continue;
+            this._rememberHash(previousKey(record), hash);
+        }
+    }
+
+    _rememberHash(key, hash) {
+        this.lastHash.delete(key);
+        this.lastHash.set(key, hash);
+        if (this.lastHash.size > this.options.lastHashEntries) this.lastHash.delete(this.lastHash.keys().next().value);
+    }
+
+    /**
+     * Cut a torn final line (crash mid-write) so the next append starts on a fresh line.
+     */
+    async _repairTail(file) {
+        const full = path.join(this.dir, file);
+        const { size } = await fs.promises.stat(full);
+        if (size === 0) return size;
+        const fh = await fs.promises.open(full, 'r+');
+        try {
+            const tail = Buffer.alloc(Math.min(size, 64 * 1024));
+            await fh.read(tail, 0, tail.length, size - tail.length);
+            const lastNewline = tail.lastIndexOf(0x0a);
+            if (lastNewline === tail.length - 1) return size;
+            const keep = lastNewline === -1 ? size - tail.length : size - tail.length + lastNewline + 1;
+            await fh.truncate(keep);
+            console.warn(`[RESULTS] Truncated ${size - keep} torn byte(s) from ${file}`);
+            return keep;
+        } finally {
+            await fh.close();
+        }
+    }
+
+    async _loadBlobIndex() {
+        const file = path.join(this.dir, BLOB_FILE);
+        if (!fs.existsSync(file)) return;
+        this.blobBytes = await this._repairTail(BLOB_FILE);
+        // Only the hash prefix of each line is looked at; bodies are read on demand
+        const rl = readline.createInterface({ input: fs.createReadStream(file, { encoding: 'utf8' }), crlfDelay: Infinity });
+        let offset = 0;
+        for await (const line of rl) {
+            const length = Buffer.byteLength(line);
+            const m = /^\{"h":"([0-9a-f]+)"/.exec(line);
+            if (m) this.blobIndex.set(m[1], { offset, length });
+            offset += length + 1;
+        }
+    }
+
+    /**
+     * Hash the record's output, queue its body if unseen and replace `output`
+     * with `outputHash` (+ change flags against the previous output of the same step).
+     */
+    _dedupe(record) {
+        if (record.output === undefined || record.output === null) return record;
+        const { output, ...rest } = record;
+        const body = normalizeOutput(output);
+        const hash = hashOutput(body);
+        if (this.blobIndex.has(hash) || this.pendingBlobs.has(hash)) {
+            this.dedupHits++;
+        } else {
+            // Indexed only once written (see _writeBlobs): a failed write must not leave references to a lost body
+            this.pendingBlobs.set(hash, JSON.stringify(encodeBlob(hash, body, this.options.compressAbove)) + '\n');
+            this._cacheBlob(hash, body);
+        }
+
+        // lastHash only moves once the record is on disk; records still queued are compared with each other
+        const key = previousKey(record);
+        const prevHash = this.queuedHash.has(key) ? this.queuedHash.get(key) : this.lastHash.get(key);
+        this.queuedHash.set(key, hash);
+
+        const stored = { ...rest, outputHash: hash };
+        if (prevHash !== undefined) {
+            stored.changed = prevHash !== hash;
+            if (stored.changed) stored.prevHash = prevHash;
+        }
+        return stored;
+    }
+
+    _cacheBlob(hash, body) {
+        this.blobCache.delete(hash);
+        this.blobCache.set(hash, body);
+        if (this.blobCache.size > this.options.blobCacheSize) this.blobCache.delete(this.blobCache.keys().next().value);
+    }
+
+    /**
+     * Body of a stored output, or null if the hash is unknown.
+     */
+    async blob(hash) {
+        if (this.blobCache.has(hash)) {
+            const body = this.blobCache.get(hash);
+            this._cacheBlob(hash, body);
+            return body;
+        }
+        let entry = this.blobIndex.get(hash);
+        if (!entry && this.pendingBlobs.has(hash)) {
+            await this.flush();
+            entry = this.blobIndex.get(hash);
+        }
+        if (!entry) return null;
+        const fh = await fs.promises.open(path.join(this.dir, BLOB_FILE), 'r');
+        try {
+            const buf = Buffer.alloc(entry.length);
+            await fh.read(buf, 0, entry.length, entry.offset);
+            const body = decodeBlob(JSON.parse(buf.toString('utf8')));
+            this._cacheBlob(hash, body);
+            return body;
+        } finally {
+            await fh.close();
+        }
+    }
+
+    /**
+     * Line diff between two stored outputs.
+     */
+    async diff(hashA, hashB) {
+        const [a, b] = await Promise.all([this.blob(hashA), this.blob(hashB)]);
+        if (a === null || b === null) return null;
+        return diffLines(a, b);
+    }
+
+    // Records written before deduplication carry output / outputZ inline
+    async _expand(record) {
+        if (record.outputHash !== undefined) {
+            const { outputHash } = record;
+            return { ...record, output: await this.blob(outputHash) };
+        }
+        if (record.outputZ !== undefined) {
+            const { outputZ, ...rest } = record;
+            return { ...rest, output: zlib.inflateRawSync(Buffer.from(outputZ, 'base64')).toString('utf8') };
+        }
+        return record;
+    }
+
+    async _scanSegment(file) {
+        const summary = newSummary(file);
+        for await (const { record, bytes } of this._lines(file)) addToSummary(summary, record, bytes);
+        return summary;
+    }
+
+    _lines(file) {
+        return readRecords(path.join(this.dir, file));
+    }
+
+    /**
+     * Queue a record; resolves with the stored record once it has been fsynced.
+     */
+    append(record) {
+        const stored = this._dedupe({ ts: Date.now(), ...record });
+        const line = JSON.stringify(stored) + '\n';
+        return new Promise((resolve, reject) => {
+            this.queue.push({ line, record: stored, resolve, reject });
+            this.queuedBytes += Buffer.byteLength(line);
+            if (this.queuedBytes >= this.options.flushBytes) this.flush();
+            else if (!this.flushTimer) this.flushTimer = setTimeout(() => this.flush(), this.options.flushIntervalMs);
+        });
+    }
+
+    appendMany(records) {
+        return Promise.all(records.map(r => this.append(r)));
+    }
+
+    /**
+     * Write everything queued so far as one batch. Batches are serialized.
+     */
+    flush() {
+        if (this.flushTimer) {
+            clearTimeout(this.flushTimer);
+            this.flushTimer = null;
+        }
+        const batch = this.queue;
+        this.queue = [];
+        this.queuedBytes = 0;
+        if (batch.length === 0) return this.flushing;
+
+        this.flushing = this.flushing.then(() => this._writeBlobs(batch)).then(() => this._writeBatch(batch)).then(
+            () => batch.forEach(item => {
+                this._settleHash(item.record, true);
+                item.resolve(item.record);
+            }),
+            (err) => {
+                console.error('[RESULTS] Write failed:', err.message);
+                batch.forEach(item => {
+                    this._settleHash(item.record, false);
+                    item.reject(err);
+                });
+            }
+        );
+        return this.flushing;
+    }
+
+    // A written record becomes the step's previous output; a failed one is forgotten
+    _settleHash(record, written) {
+        if (record.outputHash === undefined) return;
+        const key = previousKey(record);
+        if (written) this._rememberHash(key, record.outputHash);
+        if (this.queuedHash.get(key) === record.outputHash) this.queuedHash.delete(key);
+    }
+
+    /**
+     * Bodies referenced by `batch` that are not on disk yet, synced before the records.
+     * Bodies of a failed write stay pending, so the next record using them writes them again.
+     */
+    async _writeBlobs(batch) {
+        const blobs = [];
+        for (const { record } of batch) {
+            const line = this.pendingBlobs.get(record.outputHash);
+            if (line !== undefined && !blobs.some(b => b.hash === record.outputHash)) blobs.push({ hash: record.outputHash, line });
+        }
+        if (blobs.length === 0) return;
+        try {
+            if (!this.blobHandle) this.blobHandle = await fs.promises.open(path.join(this.dir, BLOB_FILE), 'a');
+            await this.blobHandle.write(blobs.map(b => b.line).join(''));
+            await this.blobHandle.datasync();
+        } catch (e) {
+            // Part of the lines may have landed: cut a torn tail and re-read the size the offsets start from
+            if (this.blobHandle) await this.blobHandle.close().catch(() => {});
+            this.blobHandle = null;
+            this.blobBytes = await this._repairTail(BLOB_FILE).catch(() => this.blobBytes);
+            throw e;
+        }
+        for (const b of blobs) {
+            const length = Buffer.byteLength(b.line);
+            this.blobIndex.set(b.hash, { offset: this.blobBytes, length: length - 1 });
+            this.blobBytes += length;
+            this.pendingBlobs.delete(b.hash);
+        }
+    }
+
+    async _writeBatch(batch) {
+        if (batch.length === 0) return;
+        // Group by target segment so a batch spanning a rotation lands correctly
+        let chunk = [];
+        for (const item of batch) {
+            const bytes = Buffer.byteLength(item.line);
+            if (this._needsRotation(item.record.ts, bytes)) {
+                if (chunk.length) await this._writeChunk(chunk);
+                chunk = [];
+                await this._rotate(item.record.ts);
+            }
+            if (!this.handle) await this._openCurrent(item.record.ts);
+            chunk.push(item);
+            addToSummary(this._current(), item.record, bytes);
+        }
+        if (chunk.length) await this._writeChunk(chunk);
+        this.manifestDirty = true;
+    }
+
+    async _writeChunk(chunk) {
+        await this.handle.write(chunk.map(item => item.line).join(''));
+        await this.handle.datasync();
+    }
+
+    _current() {
+        return this.segments[this.segments.length - 1];
+    }
+
+    _needsRotation(ts, bytes) {
+        const current = this._current();
+        if (!current || current.count === 0) return false;
+        return current.bytes + bytes > this.options.segmentBytes || utcDay(current.minTs) !== utcDay(ts);
+    }
+
+    _newSegment(ts) {
+        // Names must stay unique even if two segments start in the same millisecond
+        let start = ts;
+        while (this.segments.some(s => s.file === `results-${start}.jsonl`)) start++;
+        this.segments.push(newSummary(`results-${start}.jsonl`));
+    }
+
+    async _openCurrent(ts) {
+        if (!this._current()) this._newSegment(ts);
+        this.handle = await fs.promises.open(path.join(this.dir, this._current().file), 'a');
+    }
+
+    async _rotate(ts) {
+        if (this.handle) {
+            await this.handle.close();
+            this.handle = null;
+        }
+        this._newSegment(ts);
+        await this._saveManifest(true);
+    }
+
+    async _saveManifest(force = false) {
+        if (!this.manifestDirty && !force) return;
+        this.manifestDirty = false;
+        const file = path.join(this.dir, MANIFEST_FILE);
+        await fs.promises.writeFile(`${file}.tmp`, JSON.stringify({ segments: this.segments, imported: this.imported }), 'utf8');
+        await fs.promises.rename(`${file}.tmp`, file);
+    }
+
+    _candidateSegments(filter) {
+        return this.segments.filter(s => {
+            if (s.count === 0) return false;
+            if (filter.from !== undefined && s.maxTs < filter.from) return false;
+            if (filter.to !== undefined && s.minTs > filter.to) return false;
+            if (filter.model && !s.models.includes(filter.model)) return false;
+            if (filter.commandId && !s.commands.includes(filter.commandId)) return false;
+            return true;
+        });
+    }
+
+    /**
+     * Records matching `filter`, newest first.
+     * @param {Object} filter { model, commandId, serial, runId, kind, success, changed, from, to }
+     * @param {Object} [opts] { limit = 500, withOutput = true }
+     */
+    async query(filter = {}, { limit = 500, withOutput = true } = {}) {
+        await this.flush();
+        // Cheap substring pre-check before JSON.parse (keys are always serialized the same way)
+        const needles = [];
+        if (filter.model) needles.push(`"model":${JSON.stringify(filter.model)}`);
+        if (filter.commandId) needles.push(`"commandId":${JSON.stringify(filter.commandId)}`);
+        if (filter.runId) needles.push(`"runId":${JSON.stringify(filter.runId)}`);
+
+        const out = [];
+        const candidates = this._candidateSegments(filter);
+        for (let i = candidates.length - 1; i >= 0 && out.length < limit; i--) {
+            const hits = [];
+            for await (const { line, record } of this._lines(candidates[i].file)) {
+                if (needles.some(n => !line.includes(n))) continue;
+                if (matches(record, filter)) hits.push(record);
+            }
+            for (let k = hits.length - 1; k >= 0 && out.length < limit; k--) {
+                out.push(withOutput ? await this._expand(hits[k]) : (({ output, outputZ, ...rest }) => rest)(hits[k]));
+            }
+        }
+        return out;
+    }
+
+    /**
+     * Segment files to read for `filter`, oldest first, with everything queued
+     * written out - for readRun() in a worker thread.
+     */
+    async readPlan(filter = {}) {
+        await this.flush();
+        return { dir: this.dir, files: this._candidateSegments(filter).map(s => s.file) };
+    }
+
+    /**
+     * One summary per run (runId): when, which model/device, pass/fail counts. Newest first.
+     */
+    async runs(filter = {}, { limit = 100 } = {}) {
+        await this.flush();
+        const runs = new Map();
+        for (const segment of this._candidateSegments(filter)) {
+            for await (const { record } of this._lines(segment.file)) {
+                if (!record.runId || !matches(record, { ...filter, runId: undefined })) continue;
+                let run = runs.get(record.runId);
+                if (!run) {
+                    run = {
+                        runId: record.runId,
+                        kind: record.kind,
+                        model: record.model,
+                        serial: record.serial,
+                        client: record.client,
+                        start: record.ts,
+                        end: record.ts,
+                        total: 0,
+                        passed: 0,
+                        failed: 0
+                    };
+                    runs.set(record.runId, run);
+                }
+                run.start = Math.min(run.start, record.ts);
+                run.end = Math.max(run.end, record.ts);
+                run.total++;
+                if (record.success) run.passed++;
+                else run.failed++;
+            }
+        }
+        return [...runs.values()].sort((a, b) => b.start - a.start).slice(0, limit);
+    }
+
+    /**
+     * Copy legacy one-file-per-save results (results_<model>_<iso>.json) into the log once.
+     * The original files are left untouched.
+     */
+    async importLegacy(legacyDir) {
+        let files;
+        try {
+            files = await fs.promises.readdir(legacyDir);
+        } catch (e) {
+            return 0;
+        }
+        let imported = 0;
+        const LEGACY_RE = /^results_(.+?)_(\d{4}-\d{2}-\d{2}T[\d-]+\.\d+Z)\.json$/;
+        // Oldest first (by the time in the name, not the model), so records of a day land in one segment in order
+        const timeOf = (file) => (LEGACY_RE.exec(file) || [])[2] || '';
+        files.sort((a, b) => timeOf(a).localeCompare(timeOf(b)));
+        for (const file of files) {
+            const m = LEGACY_RE.exec(file);
+            if (!m || this.imported.includes(file)) continue;
+            try {
+                const results = JSON.parse(await fs.promises.readFile(path.join(legacyDir, file), 'utf8'));
+                // Filenames replace ':' with '-' in the time part
+                const iso = m[2].replace(/T(\d{2})-(\d{2})-(\d{2})/, 'T$1:$2:$3');
+                const ts = Date.parse(iso) || Date.now();
+                await this.appendMany(Object.entries(results).map(([commandId, r]) => ({
+                    ts,
+                    kind: 'result',
+                    runId: `legacy_${file}`,
+                    model: m[1],
+                    commandId,
+                    name: r.name,
+                    command: r.command,
+                    success: !!r.success,
+                    output: r.output
+                })));
+                this.imported.push(file);
+                this.manifestDirty = true;
+                imported++;
+            } catch (e) {
+                console.error(`[RESULTS] Could not import ${file}:`, e.message);
+            }
+        }
+        if (imported) {
+            // Old timestamps rotated into segments after the newer native ones; query() walks
+            // segments newest-last, so restore time order (done in the write chain, between batches)
+            await this.flush();
+            this.flushing = this.flushing.then(async () => {
+                this.segments.sort((a, b) => (a.minTs === null ? Infinity : a.minTs) - (b.minTs === null ? Infinity : b.minTs));
+                if (this.handle) {
+                    await this.handle.close();
+                    this.handle = null; // reopened on the (new) current segment by the next batch
+                }
+                this.manifestDirty = true;
+            });
+            await this.flushing;
+        }
+        await this._saveManifest();
+        return imported;
+    }
+
+    stats() {
+        return {
+            segments: this.segments.length,
+            records: this.segments.reduce((n, s) => n + s.count, 0),
+            bytes: this.segments.reduce((n, s) => n + s.bytes, 0),
+            blobs: this.blobIndex.size,
+            blobBytes: this.blobBytes,
+            dedupHits: this.dedupHits,
+            queued: this.queue.length
+        };
+    }
+
+    /**
+     * Periodic housekeeping hook: persist the manifest if it changed.
+     */
+    async checkpoint() {
+        await this.flushing;
+        await this._saveManifest();
+    }
+
+    async close() {
+        await this.flush();
+        await this._saveManifest();
+        if (this.handle) {
+            await this.handle.close();
+            this.handle = null;
+        }
+        if (this.blobHandle) {
+            await this.blobHandle.close();
+            this.blobHandle = null;
+        }
+    }
+}
+
+/**
+ * Records of one run with their outputs, oldest first, read straight from the
+ * files of a readPlan(). Read-only and independent of a ResultsStore instance,
+ * so a worker thread can do the scan and blob lookups of a big export.
+ */
+const readRun = async ({ dir, files }, filter) => {
+    const needle = `"runId":${JSON.stringify(filter.runId)}`;
+    const records = [];
+    for (const file of files) {
+        for await (const { line, record } of readRecords(path.join(dir, file))) {
+            if (line.includes(needle) && matches(record, filter)) records.push(record);
+        }
+    }
+
+    // One pass over the blob log for the bodies these records reference
+    const wanted = new Set(records.map(r => r.outputHash).filter(h => h !== undefined));
+    const bodies = new Map();
+    const blobFile = path.join(dir, BLOB_FILE);
+    if (wanted.size && fs.existsSync(blobFile)) {
+        for await (const { record: blob } of readRecords(blobFile)) {
+            if (wanted.has(blob.h) && !bodies.has(blob.h)) bodies.set(blob.h, decodeBlob(blob));
+        }
+    }
+    return records.map(({ outputHash, outputZ, ...rest }) => {
+        if (outputHash !== undefined) return { ...rest, output: bodies.has(outputHash) ? bodies.get(outputHash) : null };
+        if (outputZ !== undefined) return { ...rest, output: zlib.inflateRawSync(Buffer.from(outputZ, 'base64')).toString('utf8') };
+        return rest;
+    });
+};
+
+module.exports = { ResultsStore, normalizeOutput, diffLines, readRun };
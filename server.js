@@ -5,9 +5,42 @@ const net = require('net');
 const path = require('path');
 const fs = require('fs');
 const os = require('os');
+const { monitorEventLoopDelay } = require('perf_hooks');
+const { DltRecorder, listRecordings, createWindowStream, safeSerial } = require('./dlt_recorder');
+const { Registry } = require('./metrics');
+const { CommandProfiler } = require('./command_profiler');
+const { ResultsStore } = require('./results_store');
+const staticAssets = require('./static_assets');
+const { NotificationFeed } = require('./notifications');
+const { AdbConnectionManager } = require('./adb_connections');
+const { SessionTracker } = require('./sessions');
+const { Coordinator, AgentLink } = require('./federation');
+const { WorkerPool } = require('./worker_pool');
+const { DeviceIdentityCache, BOOT_ID_FILE, parseBootId, isBmwVersion, slddFor } = require('./device_identity');
+const { CommandCache, classify } = require('./command_cache');
+const { RegressionQueue, JournalError } = require('./regression_queue');
+const { Tracer } = require('./tracing');
+const { AdmissionController, AdmissionError } = require('./admission');
 
 const app = express();
 
+// Prometheus metrics (scraped from GET /metrics)
+const metricsRegistry = new Registry();
+const metrics = {
+    httpDuration: metricsRegistry.histogram('tm_http_request_duration_seconds', 'HTTP request latency by route', ['method', 'route', 'status']),
+    adbDuration: metricsRegistry.histogram('tm_adb_command_duration_seconds', 'ADB command latency', ['command', 'serial']),
+    adbCommands: metricsRegistry.counter('tm_adb_commands_total', 'ADB commands by outcome (ok, error, timeout)', ['command', 'serial', 'outcome']),
+    adbInflight: metricsRegistry.gauge('tm_adb_inflight_processes', 'ADB child processes currently running'),
+    cacheRequests: metricsRegistry.counter('tm_cache_requests_total', 'Device / command cache lookups by result (hit, miss, stale, coalesced)', ['cache', 'result']),
+    regressionSteps: metricsRegistry.counter('tm_regression_steps_total', 'Regression steps executed by result', ['result']),
+    admission: metricsRegistry.counter('tm_admission_requests_total', 'ADB-bound requests by admission outcome (admitted, delayed, rejected)', ['outcome'])
+};
+
+// Request timelines in Chrome trace format (GET /api/trace?run=); TM_TRACE=0 turns recording off,
+// TM_TRACE=all also records requests outside a Run All / regression / job (per client)
+const tracer = new Tracer({ enabled: process.env.TM_TRACE !== '0' });
+const TRACE_UNTAGGED = process.env.TM_TRACE === 'all';
+
 // detect if we are running in a packaged environment (pkg)
 const isPackaged = process.pkg !== undefined;
 
@@ -20,32 +53,31 @@ const PUBLIC_DIR = path.join(__dirname, 'public');
 const INTERNAL_DATA_DIR = path.join(__dirname, 'data');
 const EXTERNAL_DATA_DIR = path.join(baseDirPath, 'data');
 
-// Ensure data persistence: If packaged and external data is missing, initialize it
-if (isPackaged && !fs.existsSync(EXTERNAL_DATA_DIR)) {
-    try {
-        console.log('[SYSTEM] Initializing external data directory...');
-        fs.mkdirSync(EXTERNAL_DATA_DIR, { recursive: true });
-        // Copy initial data from bundle to external location for editability
-        if (fs.existsSync(path.join(INTERNAL_DATA_DIR, 'commands.json'))) {
-            fs.copyFileSync(path.join(INTERNAL_DATA_DIR, 'commands.json'), path.join(EXTERNAL_DATA_DIR, 'commands.json'));
-        }
-        if (fs.existsSync(path.join(INTERNAL_DATA_DIR, 'categories.json'))) {
-            fs.copyFileSync(path.join(INTERNAL_DATA_DIR, 'categories.json'), path.join(EXTERNAL_DATA_DIR, 'categories.json'));
+// Data directory: the external copy when packaged (editable next to the exe), the bundled one otherwise
+let DATA_DIR = isPackaged ? EXTERNAL_DATA_DIR : INTERNAL_DATA_DIR;
+let COMMANDS_FILE = path.join(DATA_DIR, 'commands.json');
+let CATEGORIES_FILE = path.join(DATA_DIR, 'categories.json');
+
+// Ensure data persistence: if packaged and external data is missing, initialize it (async - /api waits on dataReady)
+const initDataDir = async () => {
+    await fs.promises.mkdir(DATA_DIR, { recursive: true });
+    if (DATA_DIR === INTERNAL_DATA_DIR) return;
+    for (const name of ['commands.json', 'categories.json']) {
+        try {
+            // COPYFILE_EXCL: never overwrite the user's edited copy
+            await fs.promises.copyFile(path.join(INTERNAL_DATA_DIR, name), path.join(DATA_DIR, name), fs.constants.COPYFILE_EXCL);
+            console.log(`[SYSTEM] Initialized external ${name}`);
+        } catch (e) {
+            if (e.code !== 'EEXIST' && e.code !== 'ENOENT') throw e; // ENOENT: nothing bundled to copy
         }
-    } catch (e) {
-        console.error('[SYSTEM] Failed to initialize external data:', e.message);
     }
-}
-
-// Final data directory selection
-const DATA_DIR = fs.existsSync(EXTERNAL_DATA_DIR) ? EXTERNAL_DATA_DIR : INTERNAL_DATA_DIR;
-const COMMANDS_FILE = path.join(DATA_DIR, 'commands.json');
-const CATEGORIES_FILE = path.join(DATA_DIR, 'categories.json');
-
-// Ensure directory exists (fallback/safety)
-if (!fs.existsSync(DATA_DIR)) {
-    fs.mkdirSync(DATA_DIR, { recursive: true });
-}
+};
+const dataReady = initDataDir().catch((e) => {
+    console.error('[SYSTEM] Failed to initialize external data, using bundled data:', e.message);
+    DATA_DIR = INTERNAL_DATA_DIR;
+    COMMANDS_FILE = path.join(DATA_DIR, 'commands.json');
+    CATEGORIES_FILE = path.join(DATA_DIR, 'categories.json');
+});
 
 
 // Helper: Get all valid local IPs for this machine (including IPv4 and IPv6)
@@ -77,92 +109,172 @@ const getPrimaryIp = () => {
 let config = {
     targetPort: 22,
     adbPort: 5555,
-    adbCommand: 'adb1' // CHANGED: Default is now adb1 to prevent security blocks on startup
+    adbCommand: process.env.ADB_COMMAND || 'adb1' // CHANGED: Default is now adb1 to prevent security blocks on startup
 };
 
 // Auto-discover ADB Binary
-const discoverAdb = async () => {
-    // Prioritize binaries that are known to work in the user's environment
-    // Specifically looking for adb1 or local files before trying the potentially blocked 'adb'
-    const binaries = [
-        'adb1',
-        path.join(baseDirPath, 'bin', 'adb.exe'),
-        path.join(baseDirPath, 'adb.exe'),
-        path.join(baseDirPath, 'adb1.exe')
-    ];
-
-    for (const b of binaries) {
+// Prioritize binaries that are known to work in the user's environment
+// Specifically looking for adb1 or local files before trying the potentially blocked 'adb'
+const ADB_CANDIDATES = [
+    'adb1',
+    path.join(baseDirPath, 'bin', 'adb.exe'),
+    path.join(baseDirPath, 'adb.exe'),
+    path.join(baseDirPath, 'adb1.exe')
+];
+const ADB_CACHE_FILE = path.join(baseDirPath, 'adb_cache.json');
+
+// { binary, version } when `binary version` works, else null
+const probeAdb = async (binary) => {
+    if (path.isAbsolute(binary)) {
         try {
-            // Check if binary exists/works without triggering blocks if possible
-            const res = await execAsync(`${b} version`, 2000);
-            if (res.success) {
-                console.log(`[SYSTEM] 🔍 Auto-discovered working ADB: ${b}`);
-                config.adbCommand = b;
-                return b;
-            }
+            await fs.promises.access(binary); // no process spawn for files that are not there
         } catch (e) {
-            // Silently skip failed probes
+            return null;
         }
     }
-    console.warn(`[SYSTEM] ⚠️ No working ADB found. Using default: ${config.adbCommand}`);
-    return config.adbCommand;
+    const res = await execAsync(`${binary} version`, 2000);
+    if (!res.success) return null;
+    const m = res.stdout.match(/version\s+([\d.]+)/i);
+    return { binary, version: m ? m[1] : res.stdout.split(/\r?\n/)[0] };
 };
 
-// Initialize discovery
-discoverAdb();
+const saveAdbCache = (found) => fs.promises
+    .writeFile(ADB_CACHE_FILE, JSON.stringify({ ...found, checkedAt: Date.now() }, null, 2), 'utf8')
+    .catch(e => console.warn('[SYSTEM] Could not write ADB cache:', e.message));
 
+const discoverAdb = async () => {
+    // Explicit override (e.g. the load-test harness pointing at fake_adb.py) - no probing
+    if (process.env.ADB_COMMAND) {
+        console.log(`[SYSTEM] Using ADB from ADB_COMMAND: ${process.env.ADB_COMMAND}`);
+        return config.adbCommand;
+    }
 
-// Store user-specific overrides: Map<ID, config>
-const userConfigs = new Map();
+    // Last known good binary: used right away, confirmed in the background
+    let cached = null;
+    try {
+        cached = JSON.parse(await fs.promises.readFile(ADB_CACHE_FILE, 'utf8'));
+    } catch (e) { /* first launch */ }
+    if (cached && cached.binary) {
+        config.adbCommand = cached.binary;
+        const ok = await probeAdb(cached.binary);
+        if (ok) {
+            console.log(`[SYSTEM] 🔍 Using cached ADB: ${ok.binary} (${ok.version})`);
+            if (ok.version !== cached.version) await saveAdbCache(ok);
+            return ok.binary;
+        }
+        console.warn(`[SYSTEM] Cached ADB ${cached.binary} no longer works - probing again`);
+    }
 
-// Global System Notifications
-let globalNotifications = []; // Array of { id, type, user, message, time }
-const addGlobalNotification = (type, user, message, data = {}) => {
-    const notif = {
-        id: Date.now() + Math.random(),
-        type,
-        user,
-        message,
-        data,
-        time: new Date().toLocaleTimeString()
-    };
-    globalNotifications.push(notif);
-    if (globalNotifications.length > 10) globalNotifications.shift(); // Keep last 10
+    // Probe every candidate at once; the first one in priority order that works wins
+    const probes = ADB_CANDIDATES.map(b => probeAdb(b).catch(() => null));
+    for (const probe of probes) {
+        const found = await probe;
+        if (found) {
+            console.log(`[SYSTEM] 🔍 Auto-discovered working ADB: ${found.binary} (${found.version})`);
+            config.adbCommand = found.binary;
+            await saveAdbCache(found);
+            return found.binary;
+        }
+    }
+    console.warn(`[SYSTEM] ⚠️ No working ADB found. Using default: ${config.adbCommand}`);
+    return config.adbCommand;
 };
 
 
-// Map: serial -> { start, duration, user, iterations, steps }
-const regressionLocks = new Map();
+// Store user-specific overrides: Map<ID, config>
+const userConfigs = new Map();
+
+// Global System Notifications: seq-numbered ring, clients read deltas (/api/notifications) or get pushes (SSE)
+const notificationFeed = new NotificationFeed({ capacity: 256 });
+const addGlobalNotification = (type, user, message, data = {}) => notificationFeed.publish(type, user, message, data);
 
-// DLT Proxy Map: clientId -> { proxy, serial, publicPort, internalPort, binary }
+// DLT Proxy Map: clientId -> { proxy, serial, publicPort, internalPort, binary, stats }
 // Keyed by clientId so each user gets their own isolated DLT bridge
 const dltProxies = new Map();
 
 // Track which public ports are in use (for conflict-free auto-assignment)
 const usedDltPorts = new Set();
 
+/**
+ * Per-bridge traffic counters. "up" is viewer -> device, "down" is device -> viewer.
+ * A pause means the receiving side's socket buffer was full (write() returned false):
+ * down-pauses point at a slow viewer/network, up-pauses at a slow ADB forward.
+ */
+const createBridgeStats = () => ({
+    createdAt: Date.now(),
+    bytesUp: 0,
+    bytesDown: 0,
+    rateUp: 0,            // bytes/s over the last sample interval
+    rateDown: 0,
+    peakRateUp: 0,
+    peakRateDown: 0,
+    pausesUp: 0,
+    pausesDown: 0,
+    queueHighWaterUp: 0,  // largest writableLength seen on the device-side socket
+    queueHighWaterDown: 0, // largest writableLength seen on the viewer-side socket
+    connections: 0,
+    activeConnections: 0,
+    disconnects: 0,
+    errors: 0,
+    lastConnectMs: null,  // time to open the ADB forward socket
+    _sample: { time: Date.now(), bytesUp: 0, bytesDown: 0 }
+});
+
+/**
+ * Relay data from `source` to `target`, honoring backpressure and counting into `stats`.
+ */
+const relaySocket = (source, target, stats, dir) => {
+    source.on('data', (chunk) => {
+        stats[`bytes${dir}`] += chunk.length;
+        const flushed = target.write(chunk);
+        if (target.writableLength > stats[`queueHighWater${dir}`]) {
+            stats[`queueHighWater${dir}`] = target.writableLength;
+        }
+        if (!flushed) {
+            stats[`pauses${dir}`]++;
+            source.pause();
+            target.once('drain', () => source.resume());
+        }
+    });
+    source.on('end', () => target.end());
+};
+
 /**
  * Create a DLT TCP proxy on a given public port.
  * Returns a Promise that resolves to the net.Server or rejects on error.
  */
-const setupDltProxy = (publicPort, internalPort, serial) => {
+const setupDltProxy = (publicPort, internalPort, serial, stats = createBridgeStats()) => {
     return new Promise((resolve, reject) => {
         try {
             const proxy = net.createServer((clientSocket) => {
+                stats.connections++;
+                stats.activeConnections++;
+                const connectStart = Date.now();
                 const serverSocket = net.connect(internalPort, '127.0.0.1', () => {
-                    clientSocket.pipe(serverSocket);
-                    serverSocket.pipe(clientSocket);
+                    stats.lastConnectMs = Date.now() - connectStart;
+                    relaySocket(clientSocket, serverSocket, stats, 'Up');
+                    relaySocket(serverSocket, clientSocket, stats, 'Down');
+                });
+
+                clientSocket.on('close', () => {
+                    stats.activeConnections--;
+                    stats.disconnects++;
                 });
 
                 clientSocket.on('error', (err) => {
+                    stats.errors++;
                     console.error(`[DLT Bridge ${publicPort}] Client Error:`, err.message);
                     serverSocket.destroy();
                 });
 
                 serverSocket.on('error', (err) => {
+                    stats.errors++;
                     console.error(`[DLT Bridge ${publicPort}] Internal socket error:`, err.message);
                     clientSocket.destroy();
                 });
+
+                // Device side went away (forward removed / device rebooted) - drop the viewer too
+                serverSocket.on('close', () => clientSocket.destroy());
             });
 
             proxy.on('error', (err) => {
@@ -185,6 +297,23 @@ const setupDltProxy = (publicPort, internalPort, serial) => {
     });
 };
 
+// Sample bridge throughput once per second
+const DLT_SAMPLE_INTERVAL = 1000;
+setInterval(() => {
+    const now = Date.now();
+    for (const entry of dltProxies.values()) {
+        const stats = entry.stats;
+        if (!stats) continue;
+        const elapsed = (now - stats._sample.time) / 1000;
+        if (elapsed <= 0) continue;
+        stats.rateUp = Math.round((stats.bytesUp - stats._sample.bytesUp) / elapsed);
+        stats.rateDown = Math.round((stats.bytesDown - stats._sample.bytesDown) / elapsed);
+        stats.peakRateUp = Math.max(stats.peakRateUp, stats.rateUp);
+        stats.peakRateDown = Math.max(stats.peakRateDown, stats.rateDown);
+        stats._sample = { time: now, bytesUp: stats.bytesUp, bytesDown: stats.bytesDown };
+    }
+}, DLT_SAMPLE_INTERVAL).unref();
+
 /**
  * Cleanly tear down a DLT proxy for a given clientId.
  * Closes the TCP server, removes ADB forward, frees the port.
@@ -197,10 +326,10 @@ const cleanupDltProxy = async (clientId) => {
         entry.proxy.close();
         console.log(`[DLT] Cleaned up proxy on port ${entry.publicPort} (client ${clientId})`);
 
-        // Remove ADB forward
+        // Remove ADB forward (the bridge remembers its binary - the client's config may already be gone)
         const userConfig = userConfigs.get(clientId);
-        if (userConfig) {
-            const binary = userConfig.adbCommand || 'adb';
+        if (entry.binary || userConfig) {
+            const binary = entry.binary || userConfig.adbCommand || 'adb';
             const target = entry.serial ? `-s ${entry.serial}` : '';
             try {
                 await execAsync(`${binary} ${target} forward --remove tcp:${entry.internalPort}`, 3000);
@@ -216,18 +345,152 @@ const cleanupDltProxy = async (clientId) => {
     return 1;
 };
 
+// Client sessions: a tab that stops polling loses its DLT bridge after a few minutes and its config after hours,
+// whether or not its unload beacon (/api/tools/stop-dlt) arrived
+const sessions = new SessionTracker({
+    onIdle: async (clientId) => {
+        const bridge = dltProxies.get(clientId);
+        if (!bridge) return true;
+        if (bridge.stats && bridge.stats.activeConnections > 0) return false; // a DLT Viewer is still attached
+        console.log(`[SESSIONS] ${clientId} idle - releasing DLT bridge on port ${bridge.publicPort}`);
+        await cleanupDltProxy(clientId);
+        return true;
+    },
+    onExpire: async (clientId) => {
+        await cleanupDltProxy(clientId);
+        userConfigs.delete(clientId);
+    }
+});
+sessions.start();
+
+// DLT Recorders: serial -> { recorder, internalPort, binary }
+// One recorder per device, independent of any viewer being connected
+const DLT_CAPTURE_DIR = path.join(baseDirPath, 'dlt_captures');
+const dltRecorders = new Map();
+
+/**
+ * Start capturing the DLT stream of `serial` to disk.
+ * Uses its own ADB forward (tcp:0 lets ADB pick a free local port).
+ */
+const startDltRecorder = async (binary, serial) => {
+    const existing = dltRecorders.get(serial);
+    if (existing) return existing.recorder;
+
+    const fwd = await execAsync(`${binary} -s ${serial} forward tcp:0 tcp:3490`, 5000);
+    const internalPort = parseInt(fwd.stdout, 10);
+    if (!fwd.success || isNaN(internalPort)) {
+        throw new Error(`ADB forward failed: ${fwd.stderr || fwd.stdout || 'no port assigned'}`);
+    }
+
+    const recorder = new DltRecorder({ rootDir: DLT_CAPTURE_DIR, serial, port: internalPort });
+    recorder.start();
+    dltRecorders.set(serial, { recorder, internalPort, binary });
+    return recorder;
+};
+
+const stopDltRecorder = async (serial) => {
+    const entry = dltRecorders.get(serial);
+    if (!entry) return 0;
+    dltRecorders.delete(serial);
+    await entry.recorder.stop();
+    await execAsync(`${entry.binary} -s ${serial} forward --remove tcp:${entry.internalPort}`, 3000);
+    return 1;
+};
+
+// Accepts epoch milliseconds or anything Date can parse (ISO timestamps from results files)
+const parseTimeParam = (value, fallback) => {
+    if (value === undefined || value === null || value === '') return fallback;
+    const n = Number(value);
+    if (!isNaN(n)) return n;
+    const t = Date.parse(value);
+    return isNaN(t) ? fallback : t;
+};
+
+// Per-command latency history: (model, command id, serial) -> ring buffer of recent executions
+const TIMINGS_FILE = path.join(DATA_DIR, 'command_timings.json');
+const commandProfiler = new CommandProfiler();
+dataReady.then(() => commandProfiler.load(TIMINGS_FILE));
+let timingsDirty = false;
+
+const recordCommandTiming = (model, commandId, serial, result) => {
+    commandProfiler.record({
+        model,
+        commandId,
+        serial,
+        duration: result.durationMs || 0,
+        // Killed by timeout -> no exit code; record as -1 so it counts as a failure
+        exitCode: result.success ? 0 : (typeof result.exitCode === 'number' ? result.exitCode || 1 : -1),
+        outputBytes: (result.stdout || '').length + (result.stderr || '').length
+    });
+    timingsDirty = true;
+};
+
+setInterval(() => {
+    if (!timingsDirty) return;
+    timingsDirty = false;
+    commandProfiler.save(TIMINGS_FILE).catch(e => console.error('[PROFILER] Save failed:', e.message));
+}, 60000).unref();
+
+// Results history: append-only JSONL log under results/log (legacy results_*.json imported once)
+const RESULTS_DIR = path.join(baseDirPath, 'results');
+const resultsStore = new ResultsStore({ dir: path.join(RESULTS_DIR, 'log') });
+const resultsReady = resultsStore.open()
+    .then(() => resultsStore.importLegacy(RESULTS_DIR))
+    .then(n => { if (n) console.log(`[RESULTS] Imported ${n} legacy result file(s)`); })
+    .catch(e => console.error('[RESULTS] Failed to open results store:', e.message));
+
+setInterval(() => {
+    resultsStore.checkpoint().catch(e => console.error('[RESULTS] Manifest save failed:', e.message));
+}, 30000).unref();
+
+// CPU-bound report work (diffs, CSV export) runs on worker threads, not the request loop
+const reportPool = new WorkerPool(path.join(__dirname, 'report_worker.js'), { size: 2 });
+
+// Event-loop delay over the last window: shows whether heavy reporting holds up everyone else's requests
+const loopDelay = monitorEventLoopDelay({ resolution: 10 });
+loopDelay.enable();
+let loopDelayWindow = { p50: 0, p99: 0, max: 0, mean: 0 };
+const LOOP_DELAY_WINDOW = 15000;
+setInterval(() => {
+    const ms = (ns) => Math.round(ns / 1e4) / 100; // ns -> ms with 2 decimals
+    loopDelayWindow = {
+        p50: ms(loopDelay.percentile(50)),
+        p99: ms(loopDelay.percentile(99)),
+        max: ms(loopDelay.max),
+        mean: ms(loopDelay.mean || 0)
+    };
+    loopDelay.reset();
+}, LOOP_DELAY_WINDOW).unref();
+
 // Global device cache for low-latency command execution
-let deviceCache = { devices: [], timestamp: 0 };
+const deviceCache = new Map(); // adb binary -> { devices, timestamp }; adb and adb1 see different servers
 let detailCache = new Map(); // serial -> { data, timestamp }
 const CACHE_TTL = 3000; // 3 seconds cache for device list
-const DETAIL_TTL = 10000; // 10 seconds for device details (IMEI, SIM, etc) — avoids ADB contention
+const DETAIL_TTL = 10000; // 10 seconds for device details (SIM, service, radio) — avoids ADB contention
+// SW version, IMEI, region: kept until the device reboots or a write changes them
+const deviceIdentity = new DeviceIdentityCache();
+// Query commands (sldd get*/is*) shared between tabs for a few seconds - see command_cache.js
+const commandCache = new CommandCache();
+
+// A write through this server changed a device's identity: drop the facts, the detail snapshot and cached queries
+const forgetIdentity = (binary, serial, fields) => {
+    const key = `${binary}_${serial}`;
+    deviceIdentity.forget(key, fields);
+    detailCache.delete(key);
+    commandCache.invalidate(key);
+};
 
 // Helper to get cached devices or refresh
-const getCachedDevices = async (binary) => {
+const getCachedDevices = (binary) => tracer.span('getCachedDevices', {}, async (span) => {
     const now = Date.now();
-    if (now - deviceCache.timestamp < CACHE_TTL && deviceCache.devices.length > 0) {
-        return deviceCache.devices;
+    const cached = deviceCache.get(binary);
+    if (cached && now - cached.timestamp < CACHE_TTL && cached.devices.length > 0) {
+        metrics.cacheRequests.inc({ cache: 'device', result: 'hit' });
+        span.cache = 'hit';
+        return cached.devices;
     }
+    metrics.cacheRequests.inc({ cache: 'device', result: 'miss' });
+    span.cache = 'miss';
 
     const result = await execAsync(`${binary} devices`, 5000);
     const devices = [];
@@ -249,9 +512,17 @@ const getCachedDevices = async (binary) => {
             }
         }
     }
-    deviceCache = { devices, timestamp: now };
+    deviceCache.set(binary, { devices, timestamp: now });
     return devices;
-};
+});
+
+// ADB-over-TCP endpoints of remote clients: connected/kept alive in the background, never on the request path
+const adbConnections = new AdbConnectionManager({
+    exec: (command, timeout) => execAsync(command, timeout),
+    listDevices: (binary) => getCachedDevices(binary),
+    onChange: (entry) => deviceCache.delete(entry.binary) // next listing shows the (dis)appeared device
+});
+adbConnections.start();
 
 // Admin credentials
 const ADMIN_USERS = {
@@ -263,6 +534,202 @@ const adminTokens = new Set();
 
 app.use(cors());
 app.use(express.json());
+
+// Request latency per route (static files and 404s are grouped so labels stay bounded)
+app.use((req, res, next) => {
+    const endTimer = metrics.httpDuration.startTimer({ method: req.method });
+    res.on('finish', () => {
+        let route = 'static';
+        if (req.route) route = req.baseUrl + req.route.path;
+        else if (res.statusCode === 404) route = 'unmatched';
+        endTimer({ route, status: res.statusCode });
+    });
+    next();
+});
+
+// One trace per API call of a tab's Run All / regression (or, with TM_TRACE=all, of any request, grouped by client)
+const UNTRACED = new Set(['/api/trace', '/api/traces', '/api/notifications/stream', '/api/session/heartbeat']);
+const traceRequests = tracer.middleware(req => req.headers['x-trace-run'] || req.body?.runId ||
+    (TRACE_UNTAGGED ? `client:${getClientId(req)}` : null));
+app.use('/api', (req, res, next) => (UNTRACED.has(req.baseUrl + req.path) ? next() : traceRequests(req, res, next)));
+
+// First launch of a packaged build copies the data files in the background; API calls wait for that
+app.use('/api', (req, res, next) => {
+    dataReady.then(() => next());
+});
+
+// Every API call from a tab counts as a heartbeat for its session
+app.use('/api', (req, res, next) => {
+    sessions.touch(getClientId(req), getClientIp(req));
+    next();
+});
+
+// --- FEDERATION (see federation.js) ---
+const FEDERATION_ROLE = process.env.TM_ROLE || 'standalone';
+const FEDERATION_TOKEN = process.env.TM_FEDERATION_TOKEN || '';
+const coordinator = FEDERATION_ROLE === 'coordinator' ? new Coordinator({ token: FEDERATION_TOKEN }) : null;
+
+// Device-bound routes: on a coordinator these run on the agent that has the device attached
+const FEDERATED_ROUTES = new Set([
+    '/api/execute', '/api/device-status', '/api/validate-device', '/api/set-region', '/api/adb-root', '/api/reboot',
+    '/api/tools/launch-dlt', '/api/tools/stop-dlt', '/api/dlt/record/start', '/api/dlt/record/stop'
+]);
+
+// Agent side: a forwarded request carries the client's selected device, which this host has never been told about
+app.use((req, res, next) => {
+    const serial = req.headers['x-tm-serial'];
+    if (!serial || FEDERATION_ROLE !== 'agent') return next();
+    if (FEDERATION_TOKEN && req.headers['x-tm-token'] !== FEDERATION_TOKEN) {
+        return res.status(403).json({ success: false, error: 'Bad federation token' });
+    }
+    const id = getClientId(req);
+    const current = userConfigs.get(id) || { adbCommand: config.adbCommand };
+    userConfigs.set(id, { ...current, serial });
+    next();
+});
+
+// --- ADMISSION (see admission.js) ---
+// Requests that spawn adb draw from per-client, per-IP and per-device token buckets; bursts queue, floods get 429.
+// TM_ADMISSION=0 turns it off. Costs are rough ADB processes per request.
+const ADMISSION_COST = {
+    '/api/validate-device': 1,
+    '/api/set-region': 1,
+    '/api/adb-root': 2,
+    '/api/reboot': 5
+};
+// Charged by the route itself, and only when its cache cannot answer (a cached answer spawns nothing)
+const ADMISSION_COST_ON_MISS = {
+    '/api/execute': 1,
+    '/api/device-status': 2
+};
+const admission = process.env.TM_ADMISSION === '0' ? null : new AdmissionController();
+
+// The socket address, not X-Forwarded-For, which any script can rotate. A forwarded federation
+// request carries its caller's address from the coordinator, believed only with the federation token
+const getCallerIp = (req) => (FEDERATION_ROLE === 'agent' && FEDERATION_TOKEN && req.headers['x-tm-token'] === FEDERATION_TOKEN &&
+    req.headers['x-tm-client-ip']) || req.socket.remoteAddress || '';
+
+/**
+ * Charge `cost` tokens to the request's client, caller IP and device.
+ * Resolves false once a 429 has been sent.
+ */
+const admitRequest = async (req, res, cost, serial) => {
+    if (!admission) return true;
+    const id = getClientId(req);
+    serial = String(serial || req.body?.targetSerial || req.body?.serial || req.query.serial || userConfigs.get(id)?.serial || '').trim();
+    const end = tracer.start('admission', { cost, serial });
+    try {
+        const waitMs = await admission.admit({ client: id, ip: getCallerIp(req), serial }, cost);
+        metrics.admission.inc({ outcome: waitMs ? 'delayed' : 'admitted' });
+        end({ waitMs });
+        return true;
+    } catch (e) {
+        if (!(e instanceof AdmissionError)) throw e;
+        metrics.admission.inc({ outcome: 'rejected' });
+        end({ rejected: e.scope });
+        const what = { serial: 'device', ip: 'address', client: 'client' }[e.scope];
+        res.setHeader('Retry-After', String(Math.ceil(e.retryAfterMs / 1000)));
+        res.status(429).json({
+            success: false,
+            error: 'RATE_LIMITED',
+            output: `Too many requests for this ${what} - retry in ${Math.ceil(e.retryAfterMs / 1000)} s`,
+            retryAfterMs: e.retryAfterMs
+        });
+        return false;
+    }
+};
+
+if (coordinator) {
+    app.use(async (req, res, next) => {
+        if (!FEDERATED_ROUTES.has(req.path)) return next();
+        // The unload beacon cannot send headers (same fallback as the stop-dlt handler)
+        const id = (req.path === '/api/tools/stop-dlt' && req.body?.clientId) || getClientId(req);
+        const serial = req.body?.targetSerial || req.body?.serial || req.query.serial || userConfigs.get(id)?.serial;
+        const agent = coordinator.ownerOf(serial);
+        if (!agent) return next(); // unknown serial: handle locally
+
+        // A device attached here as well is always served locally
+        const local = await getCachedDevices(getAdbBinary(req));
+        if (local.some(d => d.id.toLowerCase() === String(serial).trim().toLowerCase())) return next();
+
+        try {
+            const reply = await tracer.span(`forward ${agent.name}`, {}, () => coordinator.forward(agent, {
+                method: req.method,
+                path: req.originalUrl,
+                headers: {
+                    'X-Client-ID': id,
+                    'X-TM-Serial': serial,
+                    // Admission on the agent charges the real caller, not this host
+                    'X-TM-Client-IP': getCallerIp(req),
+                    // The agent files its spans under the same run
+                    ...(req.headers['x-trace-run'] ? { 'X-Trace-Run': req.headers['x-trace-run'] } : {}),
+                    ...(req.headers.authorization ? { Authorization: req.headers.authorization } : {})
+                },
+                body: req.body
+            }));
+            if (!reply.json) {
+                res.status(reply.status);
+                if (reply.headers['content-type']) res.setHeader('Content-Type', reply.headers['content-type']);
+                return res.send(reply.body);
+            }
+            const body = reply.json;
+            if (req.path === '/api/device-status') {
+                // Notifications are fleet-wide and live here, not on the agent
+                body.notifications = { epoch: notificationFeed.epoch, seq: notificationFeed.seq };
+            }
+            if (req.path === '/api/execute' && req.body.context === 'regression' && req.body.runId && body.targetUsed) {
+                appendRegressionStep(req, id, body.targetUsed, {
+                    success: body.success,
+                    durationMs: body.durationMs,
+                    stdout: String(body.output || '').replace(/^\[[^\]]*\] /, '')
+                }, { host: agent.name });
+            }
+            res.status(reply.status).json(body);
+        } catch (e) {
+            console.error(`[FEDERATION] ${req.path} -> ${agent.name} failed:`, e.message);
+            res.status(502).json({ success: false, output: `Host ${agent.name} unreachable`, error: e.message });
+        }
+    });
+}
+
+// After the forwarding above: a request served by an agent is charged there, not here as well
+if (admission) {
+    app.use(async (req, res, next) => {
+        const cost = ADMISSION_COST[req.path];
+        if (!cost) return next();
+        if (await admitRequest(req, res, cost)) next();
+    });
+}
+
+app.post('/api/federation/register', (req, res) => {
+    if (!coordinator) return res.status(404).json({ success: false, error: 'Not a coordinator (set TM_ROLE=coordinator)' });
+    if (!coordinator.authorized(req.headers['x-tm-token'])) return res.status(403).json({ success: false, error: 'Bad federation token' });
+    try {
+        coordinator.register(req.body || {});
+        res.json({ success: true, agents: coordinator.live().length });
+    } catch (e) {
+        res.status(400).json({ success: false, error: e.message });
+    }
+});
+
+app.get('/api/federation/agents', (req, res) => {
+    res.json({ success: true, role: FEDERATION_ROLE, agents: coordinator ? coordinator.list() : [] });
+});
+
+// Fingerprinted + precompressed copies of public/ (rebuilt when public/ changes); public/ stays the fallback
+// Built in the background: until it is ready, requests fall straight through to public/
+const DIST_DIR = path.join(baseDirPath, 'public_dist');
+let serveDist = (req, res, next) => next();
+app.use((req, res, next) => serveDist(req, res, next));
+(async () => {
+    if (await staticAssets.isStale(PUBLIC_DIR, DIST_DIR)) {
+        await staticAssets.build(PUBLIC_DIR, DIST_DIR);
+        console.log(`[ASSETS] Built ${DIST_DIR}`);
+    }
+    serveDist = await staticAssets.middleware(DIST_DIR);
+})().catch((e) => {
+    console.error('[ASSETS] Precompressed assets unavailable, serving public/ directly:', e.message);
+});
 app.use(express.static(PUBLIC_DIR));
 
 // Middleware: Check if request is authenticated as admin
@@ -300,11 +767,44 @@ const getAdbBinary = (req) => {
     return config.adbCommand;
 };
 
+// Metric label for an ADB command line built by this server: "telephony getsimstate", "devices", "forward"...
+// Arguments (numbers, phone numbers, IMEIs) are dropped to keep label cardinality bounded.
+// Free-form commands from clients are never labelled by their text - they all count as ADHOC_LABEL.
+const ADHOC_LABEL = 'adhoc';
+const adbCommandLabel = (command) => {
+    const tokens = command.replace(/^\S+\s+(-s\s+\S+\s+)?/, '').split(/\s+/).map(t => t.replace(/["';]/g, ''));
+    if (tokens[0] !== 'shell') return tokens[0] || 'unknown';
+    const rest = tokens.slice(1).filter(t => t && !t.endsWith('sldd'));
+    return rest.slice(0, 2).filter(t => !/^[\d+-]/.test(t)).join(' ') || 'shell';
+};
+
+const adbSerialOf = (command) => {
+    const m = command.match(/\s-s\s+(\S+)/);
+    return m ? m[1] : '';
+};
+
 // Helper to execute command
-const execAsync = (command, timeout = 30000) => {
-    return new Promise((resolve) => {
+// meta: { commandId, serial } - optional labels for metrics
+// Traced as "adb <command>" with children: spawn (fork/exec of the adb client) and device (until it exits)
+const execAsync = (command, timeout = 30000, meta = {}) => {
+    const labels = {
+        command: meta.commandId || adbCommandLabel(command),
+        serial: meta.serial || adbSerialOf(command)
+    };
+    return tracer.span(`adb ${labels.command}`, { command, serial: labels.serial }, (span) => new Promise((resolve) => {
         const options = timeout > 0 ? { timeout } : {};
-        exec(command, options, (error, stdout, stderr) => {
+        const endTimer = metrics.adbDuration.startTimer(labels);
+        metrics.adbInflight.inc();
+        const endSpawn = tracer.start('spawn', { inflight: metrics.adbInflight.get() }, 'adb');
+        let endDevice = null;
+        const child = exec(command, options, (error, stdout, stderr) => {
+            if (endDevice) endDevice();
+            else endSpawn({ failed: true });
+            metrics.adbInflight.dec();
+            const seconds = endTimer();
+            const outcome = !error ? 'ok' : (error.killed ? 'timeout' : 'error');
+            metrics.adbCommands.inc({ ...labels, outcome });
+            span.outcome = outcome;
             const out = stdout ? stdout.toString().trim() : '';
             const err = stderr ? stderr.toString().trim() : '';
             resolve({
@@ -312,14 +812,41 @@ const execAsync = (command, timeout = 30000) => {
                 stdout: out,
                 stderr: err,
                 error: error,
-                exitCode: error ? error.code : 0
+                exitCode: error ? error.code : 0,
+                durationMs: Math.round(seconds * 1000)
             });
         });
-    });
+        child.once('spawn', () => {
+            endSpawn({ pid: child.pid });
+            endDevice = tracer.start('device', {}, 'adb');
+        });
+    }), 'adb');
 };
 
 const readJson = (file) => JSON.parse(fs.readFileSync(file, 'utf8'));
-const writeJson = (file, data) => fs.writeFileSync(file, JSON.stringify(data, null, 4), 'utf8');
+const writeJson = (file, data) => {
+    fs.writeFileSync(file, JSON.stringify(data, null, 4), 'utf8');
+    if (file === COMMANDS_FILE) commandCatalog = null;
+};
+
+// commands.json parsed once per edit: /api/execute reads catalog metadata on every call
+let commandCatalog = null;
+const COMMAND_ACCESS = ['read', 'write'];
+const loadCatalog = () => {
+    if (!commandCatalog) {
+        try {
+            commandCatalog = readJson(COMMANDS_FILE);
+        } catch (e) {
+            return {};
+        }
+    }
+    return commandCatalog;
+};
+const catalogEntry = (modelId, commandId) => {
+    if (!modelId || !commandId) return undefined;
+    return (loadCatalog()[modelId]?.commands || []).find(c => c.id === commandId);
+};
+const catalogHasModel = (modelId) => !!modelId && Object.prototype.hasOwnProperty.call(loadCatalog(), modelId);
 
 // Get List of Connected Devices
 app.get('/api/devices', async (req, res) => {
@@ -328,32 +855,14 @@ app.get('/api/devices', async (req, res) => {
     const clientIp = getClientIp(req);
     const localIps = getLocalIps();
 
-    // If remote, try to connect before listing
+    // If remote, keep its TCP endpoint attached - the connect itself happens in the background
     if (!localIps.includes(clientIp)) {
-        await execAsync(`${binary} connect ${clientIp}:5555`);
+        adbConnections.ensure(binary, `${clientIp}:5555`);
     }
 
-    const result = await execAsync(`${binary} devices`);
-    const devices = [];
-
-    if (result.stdout) {
-        const lines = result.stdout.split(/\r?\n/);
-        let listStarted = false;
-        for (const line of lines) {
-            const raw = line.trim();
-            if (!raw || raw.toLowerCase().includes('daemon')) continue;
-            if (raw.toLowerCase().includes('list of devices attached')) {
-                listStarted = true;
-                continue;
-            }
-            if (listStarted) {
-                const parts = raw.split(/\s+/);
-                if (parts.length >= 2) {
-                    devices.push({ id: parts[0], status: parts[1] });
-                }
-            }
-        }
-    }
+    let devices = await getCachedDevices(binary);
+    // Coordinator: the whole fleet, each agent's devices tagged with its host name
+    if (coordinator) devices = devices.concat(coordinator.devices());
 
     // Cache devices for this session
     if (!userConfigs.has(id)) userConfigs.set(id, { adbCommand: binary, serial: '' });
@@ -362,32 +871,23 @@ app.get('/api/devices', async (req, res) => {
     res.json({ success: true, devices });
 });
 
+// Managed ADB-over-TCP endpoints: state, failures and next retry of each
+app.get('/api/adb/connections', (req, res) => {
+    res.json({ success: true, connections: adbConnections.list() });
+});
+
+// Per-boot identity facts cached for each device
+app.get('/api/devices/identity', (req, res) => {
+    res.json({ success: true, ...deviceIdentity.stats(), devices: deviceIdentity.list() });
+});
+
 // Device status - The core logic that was failing
 app.get('/api/device-status', async (req, res) => {
     const id = getClientId(req);
     const binary = getAdbBinary(req);
 
-    // 1. FRESH Discovery
-    const result = await execAsync(`${binary} devices`);
-    const devices = [];
-    if (result.stdout) {
-        const lines = result.stdout.split(/\r?\n/);
-        let listStarted = false;
-        for (const line of lines) {
-            const raw = line.trim();
-            if (!raw || raw.toLowerCase().includes('daemon')) continue;
-            if (raw.toLowerCase().includes('list of devices attached')) {
-                listStarted = true;
-                continue;
-            }
-            if (listStarted) {
-                const parts = raw.split(/\s+/);
-                if (parts.length >= 2) {
-                    devices.push({ id: parts[0].trim(), status: parts[1].trim() });
-                }
-            }
-        }
-    }
+    // 1. Discovery - the shared 3 s listing, so polling tabs don't each spawn `adb devices`
+    const devices = await getCachedDevices(binary);
 
     // 2. Sync session config to ensure ID consistency
     if (!userConfigs.has(id)) userConfigs.set(id, { adbCommand: binary, serial: '' });
@@ -430,7 +930,8 @@ app.get('/api/device-status', async (req, res) => {
         if (status === 'done') continue;       // Already rooted — skip
         if (status === 'pending') continue;     // Root in progress — skip (device may be rebooting)
 
-        // First time seeing this device — check if already rooted
+        // First time seeing this device — check if already rooted (spawns adb, so it is admitted like one)
+        if (!(await admitRequest(req, res, 1, d.id))) return;
         try {
             const whoami = await execAsync(`${binary} -s ${d.id} shell whoami`, 3000);
             const user = (whoami.stdout || '').trim().toLowerCase();
@@ -480,44 +981,54 @@ app.get('/api/device-status', async (req, res) => {
         const cacheKey = `${binary}_${activeTarget}`;
         const cached = detailCache.get(cacheKey);
         if (cached && (Date.now() - cached.timestamp < DETAIL_TTL)) {
+            metrics.cacheRequests.inc({ cache: 'detail', result: 'hit' });
             return res.json({
                 success: true,
                 connected: true,
                 deviceCount: readyDevices.length,
-                extraInfo: cached.data
+                extraInfo: cached.data,
+                notifications: { epoch: notificationFeed.epoch, seq: notificationFeed.seq }
             });
         }
 
+        metrics.cacheRequests.inc({ cache: 'detail', result: 'miss' });
+        if (!(await admitRequest(req, res, ADMISSION_COST_ON_MISS['/api/device-status'], activeTarget))) return;
         const adbBase = `${binary} -s ${activeTarget}`;
         let fetchSuccess = false;
+        // A write made while this poll runs (factorySetimei, set-region) outdates what it reads
+        const generation = deviceIdentity.generation(cacheKey);
         try {
-            // First, quick check for version to identify device type (3s timeout to avoid blocking)
-            const verResult = await execAsync(`${adbBase} shell cat etc/version`, 3000);
-            let swVersion = verResult.stdout.trim();
-
-            // Sticky logic: If we failed to get version this time, but we previously knew it was BMW, keep it.
-            if (!global.stickySwVersions) global.stickySwVersions = new Map();
-            const stickyKey = `${binary}_${activeTarget}`;
-
-            if (!swVersion && global.stickySwVersions.get(stickyKey)?.includes('WAVE')) {
-                swVersion = global.stickySwVersions.get(stickyKey);
-            } else if (swVersion) {
-                global.stickySwVersions.set(stickyKey, swVersion);
+            // Static facts (SW version, IMEI, region) are read once per boot - see device_identity.js
+            const bootResult = await execAsync(`${adbBase} shell cat ${BOOT_ID_FILE}`, 3000);
+            const bootId = bootResult.success ? parseBootId(bootResult.stdout) : '';
+            const previous = deviceIdentity.peek(cacheKey);
+            const identity = deviceIdentity.get(cacheKey, bootId) || {};
+            const learned = {};
+            metrics.cacheRequests.inc({ cache: 'identity', result: identity.swVersion ? 'hit' : 'miss' });
+
+            // Version identifies the device type (3s timeout to avoid blocking)
+            let swVersion = identity.swVersion;
+            if (!swVersion) {
+                const verResult = await execAsync(`${adbBase} shell cat etc/version`, 3000);
+                swVersion = learned.swVersion = verResult.stdout.trim();
+                // Sticky logic: If we failed to get version this time, but we previously knew it was BMW, keep it.
+                if (!swVersion && isBmwVersion(previous?.swVersion)) swVersion = previous.swVersion;
             }
 
             extraInfo.swVersion = swVersion || 'Unknown';
 
             // Determine sldd path (BMW uses /usr/bin/factory/sldd)
-            const isBmw = extraInfo.swVersion.includes('WAVE');
-            const sldd = isBmw ? '/usr/bin/factory/sldd' : 'sldd';
+            const isBmw = isBmwVersion(extraInfo.swVersion);
+            const sldd = slddFor(extraInfo.swVersion);
 
-            // Run commands in parallel (8s timeout — enough for slow devices)
+            // Run commands in parallel (8s timeout — enough for slow devices); IMEI/region only when not known yet
             const statusTimeout = 8000;
+            const known = Promise.resolve(null);
             const results = await Promise.allSettled([
                 execAsync(`${adbBase} shell ${sldd} telephony getsimstate`, statusTimeout),
-                execAsync(`${adbBase} shell ${sldd} telephony getimei`, statusTimeout),
+                identity.imei ? known : execAsync(`${adbBase} shell ${sldd} telephony getimei`, statusTimeout),
                 execAsync(`${adbBase} shell ${sldd} telephony getservicestate`, statusTimeout),
-                execAsync(`${adbBase} shell ${isBmw ? 'echo "Unknown"' : 'sldd region getnation; sldd region getRegionInfo'}`, statusTimeout),
+                identity.region ? known : execAsync(`${adbBase} shell ${isBmw ? 'echo "Unknown"' : 'sldd region getnation; sldd region getRegionInfo'}`, statusTimeout),
                 execAsync(`${adbBase} shell "${sldd} telephony getradiostate; ${sldd} telephony isRadioOn"`, statusTimeout)
             ]);
 
@@ -542,13 +1053,17 @@ app.get('/api/device-status', async (req, res) => {
             }
 
             // Parse IMEI
-            let iMatch = parse(imei, /IMEI\s*:\s*(\d+)/i);
-            // Fallback for Dual SIM BMW if standard getimei fails to return expected format on first slot
-            if (!iMatch && isBmw) {
-                const imei0 = await execAsync(`${adbBase} shell ${sldd} telephony getimei 0`);
-                iMatch = parse(imei0, /IMEI\s*:\s*(\d+)/i);
+            if (identity.imei) {
+                extraInfo.imei = identity.imei;
+            } else {
+                let iMatch = parse(imei, /IMEI\s*:\s*(\d+)/i);
+                // Fallback for Dual SIM BMW if standard getimei fails to return expected format on first slot
+                if (!iMatch && isBmw) {
+                    const imei0 = await execAsync(`${adbBase} shell ${sldd} telephony getimei 0`);
+                    iMatch = parse(imei0, /IMEI\s*:\s*(\d+)/i);
+                }
+                if (iMatch) extraInfo.imei = learned.imei = iMatch;
             }
-            if (iMatch) extraInfo.imei = iMatch;
 
             // Parse Service State
             if (svc && svc.stdout) {
@@ -561,16 +1076,21 @@ app.get('/api/device-status', async (req, res) => {
             }
 
             // Parse Region/Nation
-            const nationMatch = parse(reg, /LGE nation\s*:\s*(\d+)/i);
-            const regionMatch = parse(reg, /LGE Region info\s*:\s*([^\r\n]+)/i);
-            if (regionMatch && nationMatch) {
-                extraInfo.region = `${regionMatch} (${nationMatch})`;
-            } else if (regionMatch) {
-                extraInfo.region = regionMatch;
-            } else if (nationMatch) {
-                extraInfo.region = nationMatch;
-            } else if (isBmw) {
-                extraInfo.region = 'BMW (Factory)';
+            if (identity.region) {
+                extraInfo.region = identity.region;
+            } else {
+                const nationMatch = parse(reg, /LGE nation\s*:\s*(\d+)/i);
+                const regionMatch = parse(reg, /LGE Region info\s*:\s*([^\r\n]+)/i);
+                if (regionMatch && nationMatch) {
+                    extraInfo.region = `${regionMatch} (${nationMatch})`;
+                } else if (regionMatch) {
+                    extraInfo.region = regionMatch;
+                } else if (nationMatch) {
+                    extraInfo.region = nationMatch;
+                } else if (isBmw) {
+                    extraInfo.region = 'BMW (Factory)';
+                }
+                if (extraInfo.region !== '-') learned.region = extraInfo.region;
             }
 
             // Parse Radio State
@@ -582,8 +1102,11 @@ app.get('/api/device-status', async (req, res) => {
                 if (/Radio State\s*:->\s*[12]/i.test(out)) extraInfo.radioOn = true;
             }
 
+            // Remember what was read for this boot; without a boot id the facts cannot be tied to one
+            if (bootId) deviceIdentity.set(cacheKey, bootId, learned, generation);
+
             // Only mark success if we got at least SOME real data
-            fetchSuccess = (extraInfo.imei !== '-' || extraInfo.simState !== -1 ||
+            fetchSuccess = (!!learned.imei || extraInfo.simState !== -1 ||
                 extraInfo.serviceState !== '-' || extraInfo.radioOn);
         } catch (e) {
             console.error('[STATUS] Details fetch error:', e.message);
@@ -593,12 +1116,16 @@ app.get('/api/device-status', async (req, res) => {
 
         // Only cache GOOD data. If fetch failed, return stale cache instead of blanks.
         if (fetchSuccess) {
-            detailCache.set(cacheKeyForLog, { data: extraInfo, timestamp: Date.now() });
+            // Still answered with what was read, but not kept if a write has happened since
+            if (deviceIdentity.generation(cacheKey) === generation) {
+                detailCache.set(cacheKeyForLog, { data: extraInfo, timestamp: Date.now() });
+            }
             // Reset stale counter on success
             if (!global.staleCacheCount) global.staleCacheCount = new Map();
             global.staleCacheCount.delete(cacheKeyForLog);
         } else if (cached) {
             // Fetch failed — serve last known good data instead of showing blanks
+            metrics.cacheRequests.inc({ cache: 'detail', result: 'stale' });
             extraInfo = cached.data;
             // Suppress repeated stale cache logs — only log at 1st, 10th, 50th, etc.
             if (!global.staleCacheCount) global.staleCacheCount = new Map();
@@ -616,7 +1143,48 @@ app.get('/api/device-status', async (req, res) => {
         extraInfo,
         adbUsed: activeTarget ? `${binary} -s ${activeTarget}` : binary,
         debug: { serialStored: savedSerial, idsFound: devices.map(d => d.id) },
-        notifications: globalNotifications
+        // Cursor only - clients fetch the events themselves when it moved past theirs
+        notifications: { epoch: notificationFeed.epoch, seq: notificationFeed.seq }
+    });
+});
+
+// Cursors are "<epoch>:<seq>"; a cursor from another epoch (server restarted) starts over at 0
+const parseNotifyCursor = (cursor) => {
+    const [epoch, seq] = String(cursor || '').split(':');
+    if (epoch !== notificationFeed.epoch) return 0;
+    return Math.max(0, parseInt(seq) || 0);
+};
+
+// Delta poll: ?since=<epoch>:<seq> -> { epoch, seq, events (oldest first), truncated }
+app.get('/api/notifications', (req, res) => {
+    res.json({ success: true, ...notificationFeed.since(parseNotifyCursor(req.query.since)) });
+});
+
+// Push: Server-Sent Events. Reconnects resume from Last-Event-ID, so nothing is lost in between.
+app.get('/api/notifications/stream', (req, res) => {
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no'
+    });
+    const send = (event) => res.write(`id: ${notificationFeed.epoch}:${event.seq}\ndata: ${JSON.stringify(event)}\n\n`);
+    res.write('retry: 5000\n\n');
+
+    const cursor = req.headers['last-event-id'] || req.query.since;
+    if (cursor) {
+        const { events, truncated } = notificationFeed.since(parseNotifyCursor(cursor));
+        if (truncated) res.write(`event: truncated\ndata: {}\n\n`);
+        events.forEach(send);
+    }
+
+    const unsubscribe = notificationFeed.subscribe(send);
+    // Comment line keeps proxies from timing the idle stream out
+    const keepAlive = setInterval(() => res.write(': ping\n\n'), 25000);
+    keepAlive.unref();
+    req.on('close', () => {
+        clearInterval(keepAlive);
+        unsubscribe();
     });
 });
 
@@ -684,9 +1252,51 @@ app.get('/api/validate-device', async (req, res) => {
     });
 });
 
+// Persisted in the background; the step result is not held up by the fsync
+const appendRegressionStep = (req, clientId, serial, result, extra = {}) => {
+    const { commandId, command } = req.body;
+    resultsStore.append({
+        kind: 'step',
+        runId: req.body.runId,
+        model: req.body.modelId,
+        serial,
+        client: clientId,
+        commandId,
+        command: String(command || '').trim().replace(/^(adb1?(\.exe)?\s+)/i, ''),
+        iteration: req.body.iteration,
+        step: req.body.step,
+        success: result.success,
+        durationMs: result.durationMs,
+        output: result.stdout || result.stderr || '',
+        ...extra
+    }).catch(() => { /* already logged by the store */ });
+};
+
+/**
+ * What a command run on a device changed, for /api/execute and server-side regression steps alike:
+ * cached reads after a write, identity facts (raw region commands from the command library included)
+ * and the IMEI change notification.
+ */
+const afterCommand = (binary, serial, command, access, result, clientId) => {
+    // Even a failed write may have changed something
+    if (access === 'write') commandCache.invalidate(`${binary}_${serial}`);
+    if (!result.success) return;
+    if (/\bregion\s+set/i.test(command)) forgetIdentity(binary, serial, ['region']);
+    if (!/factorySetimei/i.test(command)) return;
+    forgetIdentity(binary, serial, ['imei']);
+
+    // Tell everyone about the new IMEI
+    const imeiMatch = command.match(/factorySetimei\s+(\d+|[\w-]+)/i);
+    if (imeiMatch) {
+        const newImei = imeiMatch[1];
+        const userName = clientId.includes('client_') ? 'A user' : clientId;
+        addGlobalNotification('IMEI_CHANGE', clientId, `${userName} set a new IMEI: ${newImei} for device ${serial}`, { imei: newImei, serial });
+    }
+};
+
 // Update standard response to include device name for clarity
 app.post('/api/execute', async (req, res) => {
-    const { command, targetSerial } = req.body;
+    const { command, targetSerial, commandId, context } = req.body;
     if (!command) return res.status(400).json({ success: false, error: 'No command' });
 
     const id = getClientId(req);
@@ -737,8 +1347,39 @@ app.post('/api/execute', async (req, res) => {
     // Regression lock feature disabled - all users can execute commands freely
 
     const full = `${adbBase} ${sanitized}`;
-    console.log(`[EXEC] ${full}`);
-    const result = await execAsync(full);
+    const device = `${binary}_${targetDevice.id}`;
+    // modelId / commandId come from the client: they only become metric and profiler labels when the
+    // catalog knows them, otherwise any caller could mint unbounded Prometheus series
+    const entry = catalogEntry(req.body.modelId, commandId);
+    const labelId = entry ? commandId : ADHOC_LABEL;
+    const labelModel = catalogHasModel(req.body.modelId) ? req.body.modelId : '';
+
+    // Queries are shared between tabs for a few seconds; regression steps always hit the device (their output is the test)
+    const access = classify(sanitized, entry?.access);
+    const cacheable = access === 'read' && context !== 'regression';
+    if (!(cacheable && commandCache.has(device, sanitized)) &&
+        !(await admitRequest(req, res, ADMISSION_COST_ON_MISS['/api/execute'], targetDevice.id))) return;
+
+    const run = () => {
+        console.log(`[EXEC] ${full}`);
+        return execAsync(full, 30000, { commandId: labelId, serial: targetDevice.id });
+    };
+
+    let result;
+    let source = 'miss';
+    if (cacheable) {
+        ({ result, source } = await tracer.span('command cache', {}, async (span) => {
+            const read = await commandCache.read(device, sanitized, run);
+            span.source = read.source;
+            return read;
+        }));
+        metrics.cacheRequests.inc({ cache: 'command', result: source });
+    } else {
+        result = await run();
+    }
+    if (source === 'miss') recordCommandTiming(labelModel, labelId, targetDevice.id, result);
+    const endOutput = tracer.start('output', { bytes: (result.stdout || '').length + (result.stderr || '').length });
+    if (context === 'regression') metrics.regressionSteps.inc({ result: result.success ? 'ok' : 'error' });
 
     // Add device serial to output for visual confirmation in UI
     let output = result.stdout || result.stderr || (result.success ? 'Success' : 'Failed');
@@ -747,21 +1388,20 @@ app.post('/api/execute', async (req, res) => {
         output = `[${serial}] ${output}`;
     }
 
-    // Detect IMEI write and notify everyone if successful
-    if (result.success && sanitized.includes('factorySetimei')) {
-        const imeiMatch = sanitized.match(/factorySetimei\s+(\d+|[\w-]+)/);
-        if (imeiMatch) {
-            const newImei = imeiMatch[1];
-            const userName = id.includes('client_') ? 'A user' : id;
-            addGlobalNotification('IMEI_CHANGE', id, `${userName} set a new IMEI: ${newImei} for device ${targetDevice.id}`, { imei: newImei, serial: targetDevice.id });
-        }
+    if (context === 'regression' && req.body.runId) {
+        appendRegressionStep(req, id, targetDevice.id, result);
     }
 
+    afterCommand(binary, targetDevice.id, sanitized, access, result, id);
+
+    endOutput();
     res.json({
         success: result.success,
         output: output,
         error: result.stderr,
-        targetUsed: targetDevice.id
+        targetUsed: targetDevice.id,
+        durationMs: result.durationMs,
+        cached: source !== 'miss'
     });
 });
 
@@ -777,13 +1417,15 @@ app.post('/api/set-region', async (req, res) => {
     if (userConfig && userConfig.serial) target = `-s ${userConfig.serial}`;
     // Determine sldd path - check if this is a BMW device
     const serial = userConfig?.serial || '';
-    const stickyKey = `${binary}_${serial}`;
-    const swVersion = global.stickySwVersions?.get(stickyKey) || '';
-    const sldd = swVersion.includes('WAVE') ? '/usr/bin/factory/sldd' : 'sldd';
+    const sldd = slddFor(deviceIdentity.peek(`${binary}_${serial}`)?.swVersion);
 
     const command = `${binary} ${target} shell ${sldd} region sethalsystemnation ${regionNumber}`;
     console.log(`[SET REGION] ${command}`);
     const result = await execAsync(command);
+    recordCommandTiming(catalogHasModel(req.body.modelId) ? req.body.modelId : '', 'set_region', serial, result);
+    // Even a failed write may have changed something (same rule as afterCommand)
+    commandCache.invalidate(`${binary}_${serial}`);
+    if (result.success) forgetIdentity(binary, serial, ['region']);
 
     res.json({
         success: result.success,
@@ -812,9 +1454,111 @@ app.post('/api/reboot', async (req, res) => {
     // Regression lock feature disabled - reboot allowed anytime
 
     const result = await execAsync(`${binary} ${serial ? `-s ${serial}` : ''} reboot`);
+    if (serial) commandCache.invalidate(`${binary}_${serial}`); // even a failed reboot may have gone through
+    if (result.success && serial) forgetIdentity(binary, serial); // the boot id check would catch it, one poll later
     res.json(result);
 });
 
+// --- SERVER-SIDE REGRESSION JOBS ---
+// Journaled under results/, run here without a browser tab; steps land in the results store like tab-run regressions
+const regressionQueue = new RegressionQueue(path.join(RESULTS_DIR, 'regression_jobs.jsonl'), {
+    runStep: (job, index, iteration) => tracer.root(job.id, `step ${iteration}.${index + 1} ${job.steps[index].commandId}`, { serial: job.serial }, async (trace, end) => {
+        const step = job.steps[index];
+        // Submitted ids are client input: labels only for what the catalog knows, as in /api/execute
+        const entry = catalogEntry(job.modelId, step.commandId);
+        const labelId = entry ? step.commandId : ADHOC_LABEL;
+        const labelModel = catalogHasModel(job.modelId) ? job.modelId : '';
+        const result = await execAsync(`${job.binary} -s ${job.serial} ${step.command}`, 30000, { commandId: labelId, serial: job.serial });
+        recordCommandTiming(labelModel, labelId, job.serial, result);
+        metrics.regressionSteps.inc({ result: result.success ? 'ok' : 'error' });
+        afterCommand(job.binary, job.serial, step.command, classify(step.command, entry?.access), result, job.submittedBy || job.id);
+        resultsStore.append({
+            kind: 'step',
+            runId: job.id,
+            model: job.modelId,
+            serial: job.serial,
+            client: job.submittedBy,
+            commandId: step.commandId,
+            command: step.command,
+            iteration,
+            step: index + 1,
+            success: result.success,
+            durationMs: result.durationMs,
+            output: result.stdout || result.stderr || ''
+        }).catch(() => { /* already logged by the store */ });
+        end({ success: result.success });
+        return result;
+    }),
+    isOnline: async (job) => (await getCachedDevices(job.binary))
+        .some(d => d.id === job.serial && !d.host && d.status.toLowerCase() === 'device'),
+    onFinish: (job) => {
+        const label = job.name ? `"${job.name}"` : job.id;
+        addGlobalNotification('REGRESSION_DONE', job.submittedBy,
+            `Regression ${label} on ${job.serial} ${job.state}: ${job.pass} pass, ${job.fail} fail${job.error ? ` (${job.error})` : ''}`,
+            { jobId: job.id, serial: job.serial, state: job.state });
+    }
+});
+Promise.all([resultsReady, dataReady])
+    .then(() => regressionQueue.open())
+    .catch(e => console.error('[REGRESSION] Failed to open job journal:', e.message));
+
+app.post('/api/regressions', async (req, res) => {
+    const { modelId, targetSerial, name } = req.body;
+    const iterations = parseInt(req.body.iterations, 10);
+    const steps = Array.isArray(req.body.steps) ? req.body.steps : [];
+    if (!steps.length) return res.status(400).json({ success: false, error: 'No steps' });
+    if (!(iterations >= 1)) return res.status(400).json({ success: false, error: 'Invalid iteration count' });
+
+    const id = getClientId(req);
+    const binary = getAdbBinary(req);
+    const serial = String(targetSerial || userConfigs.get(id)?.serial || '').trim();
+    const device = (await getCachedDevices(binary)).find(d => d.id.toLowerCase() === serial.toLowerCase());
+    if (!serial || !device) return res.status(400).json({ success: false, error: serial ? `Device '${serial}' not connected` : 'No device selected' });
+    if (device.host) {
+        return res.status(400).json({ success: false, error: `Device is attached to host ${device.host} - queue the regression there` });
+    }
+
+    // Commands are fixed at submit time: later catalog edits do not change a queued job
+    const resolved = [];
+    for (const step of steps) {
+        const command = String(step.command || catalogEntry(modelId, step.commandId)?.command || '').trim().replace(/^(adb1?(\.exe)?\s+)/i, '');
+        if (!command) return res.status(400).json({ success: false, error: `Unknown command '${step.commandId}'` });
+        resolved.push({ commandId: step.commandId || command, command, delay: Math.max(0, parseInt(step.delay, 10) || 0) });
+    }
+
+    try {
+        const job = await regressionQueue.submit({
+            serial: device.id, binary, modelId, name, submittedBy: id, iterations, steps: resolved
+        });
+        console.log(`[REGRESSION] ${id} queued ${job.id}: ${iterations} x ${resolved.length} step(s) on ${device.id}`);
+        res.json({ success: true, job });
+    } catch (e) {
+        res.status(503).json({ success: false, error: e.message });
+    }
+});
+
+app.get('/api/regressions', (req, res) => {
+    res.json({ success: true, jobs: regressionQueue.list() });
+});
+
+app.get('/api/regressions/:id', (req, res) => {
+    const job = regressionQueue.get(req.params.id);
+    if (!job) return res.status(404).json({ success: false, error: 'Job not found' });
+    res.json({ success: true, job });
+});
+
+app.post('/api/regressions/:id/:action', async (req, res) => {
+    const { id, action } = req.params;
+    if (!['pause', 'resume', 'cancel'].includes(action)) return res.status(400).json({ success: false, error: `Unknown action '${action}'` });
+    try {
+        const job = await regressionQueue[action](id);
+        res.json({ success: true, job });
+    } catch (e) {
+        // Not persisted (and rolled back) vs. not allowed
+        res.status(e instanceof JournalError ? 503 : 400).json({ success: false, error: e.message });
+    }
+});
+
 app.post('/api/admin/login', (req, res) => {
     const { username, password } = req.body;
     if (ADMIN_USERS[username] === password) {
@@ -872,7 +1616,7 @@ app.delete('/api/models/:id', adminAuth, (req, res) => {
 
 // Manage Commands
 app.post('/api/commands', adminAuth, (req, res) => {
-    const { modelId, name, command, category, expected, excludeFromRunAll } = req.body;
+    const { modelId, name, command, category, expected, excludeFromRunAll, access } = req.body;
     const commands = readJson(COMMANDS_FILE);
     if (!commands[modelId]) return res.status(404).json({ success: false, error: 'Model not found' });
 
@@ -882,7 +1626,9 @@ app.post('/api/commands', adminAuth, (req, res) => {
         command,
         category,
         expected: expected || "",
-        excludeFromRunAll: excludeFromRunAll || false
+        excludeFromRunAll: excludeFromRunAll || false,
+        // Optional read/write override for the command cache; omitted = inferred from the sldd verb
+        access: COMMAND_ACCESS.includes(access) ? access : undefined
     };
 
     commands[modelId].commands.push(newCmd);
@@ -892,7 +1638,7 @@ app.post('/api/commands', adminAuth, (req, res) => {
 
 app.put('/api/commands/:modelId/:cmdId', adminAuth, (req, res) => {
     const { modelId, cmdId } = req.params;
-    const { name, command, category, expected, excludeFromRunAll } = req.body;
+    const { name, command, category, expected, excludeFromRunAll, access } = req.body;
 
     const commands = readJson(COMMANDS_FILE);
     if (!commands[modelId]) return res.status(404).json({ success: false, error: 'Model not found' });
@@ -906,7 +1652,9 @@ app.put('/api/commands/:modelId/:cmdId', adminAuth, (req, res) => {
         command: command || commands[modelId].commands[cmdIndex].command,
         category: category || commands[modelId].commands[cmdIndex].category,
         expected: expected !== undefined ? expected : commands[modelId].commands[cmdIndex].expected,
-        excludeFromRunAll: excludeFromRunAll !== undefined ? excludeFromRunAll : commands[modelId].commands[cmdIndex].excludeFromRunAll
+        excludeFromRunAll: excludeFromRunAll !== undefined ? excludeFromRunAll : commands[modelId].commands[cmdIndex].excludeFromRunAll,
+        // '' (or anything else) clears the override back to inference
+        access: access !== undefined ? (COMMAND_ACCESS.includes(access) ? access : undefined) : commands[modelId].commands[cmdIndex].access
     };
 
     writeJson(COMMANDS_FILE, commands);
@@ -999,6 +1747,7 @@ app.post('/api/tools/launch-dlt', async (req, res) => {
         // FIND a free port: start from requestedPort, try up to 10 alternatives
         let assignedPort = requestedPort;
         let proxyServer = null;
+        const bridgeStats = createBridgeStats();
 
         for (let attempt = 0; attempt < 10; attempt++) {
             const tryPort = requestedPort + attempt;
@@ -1015,7 +1764,7 @@ app.post('/api/tools/launch-dlt', async (req, res) => {
             await execAsync(`${binary} ${target} forward tcp:${internalPort} tcp:3490`, 5000);
 
             try {
-                proxyServer = await setupDltProxy(tryPort, internalPort, serial);
+                proxyServer = await setupDltProxy(tryPort, internalPort, serial, bridgeStats);
                 assignedPort = tryPort;
                 break;
             } catch (err) {
@@ -1043,7 +1792,8 @@ app.post('/api/tools/launch-dlt', async (req, res) => {
             serial,
             publicPort: assignedPort,
             internalPort,
-            binary
+            binary,
+            stats: bridgeStats
         });
 
         const serverIp = getPrimaryIp();
@@ -1067,6 +1817,22 @@ app.post('/api/tools/launch-dlt', async (req, res) => {
     }
 });
 
+// Explicit keep-alive for tabs (API calls already count; this covers tabs that stopped polling devices)
+app.post('/api/session/heartbeat', (req, res) => {
+    const session = sessions.touch(getClientId(req), getClientIp(req));
+    res.json({ success: true, session: { id: session.id, firstSeen: session.firstSeen }, idleMs: sessions.opts.idleMs });
+});
+
+// Active/idle sessions with what each one holds
+app.get('/api/sessions', (req, res) => {
+    const list = sessions.list().map(s => ({
+        ...s,
+        dltPort: dltProxies.get(s.id)?.publicPort || null,
+        hasConfig: userConfigs.has(s.id)
+    }));
+    res.json({ success: true, ...sessions.stats(), sessions: list });
+});
+
 // Stop DLT Bridge when a tab closes
 app.post('/api/tools/stop-dlt', async (req, res) => {
     // sendBeacon doesn't send custom headers, so read clientId from body as fallback
@@ -1075,9 +1841,366 @@ app.post('/api/tools/stop-dlt', async (req, res) => {
     res.json({ success: true, cleaned });
 });
 
-const PORT = 3000;
+// DLT bridge throughput / backpressure counters for every active bridge
+app.get('/api/tools/dlt-stats', (req, res) => {
+    const clientId = getClientId(req);
+    const bridges = Array.from(dltProxies.entries()).map(([id, entry]) => {
+        const { _sample, ...stats } = entry.stats || {};
+        return {
+            own: id === clientId,
+            serial: entry.serial,
+            publicPort: entry.publicPort,
+            internalPort: entry.internalPort,
+            ...stats
+        };
+    });
+
+    const totals = bridges.reduce((t, b) => ({
+        bridges: t.bridges + 1,
+        viewers: t.viewers + (b.activeConnections || 0),
+        rateUp: t.rateUp + (b.rateUp || 0),
+        rateDown: t.rateDown + (b.rateDown || 0),
+        pauses: t.pauses + (b.pausesUp || 0) + (b.pausesDown || 0)
+    }), { bridges: 0, viewers: 0, rateUp: 0, rateDown: 0, pauses: 0 });
+
+    res.json({ success: true, bridges, totals });
+});
+
+// --- DLT CAPTURE-TO-DISK ---
+
+// Start recording the selected (or given) device's DLT stream to rotating segments
+app.post('/api/dlt/record/start', async (req, res) => {
+    const userConfig = userConfigs.get(getClientId(req));
+    const serial = req.body?.serial || userConfig?.serial;
+    if (!serial) return res.status(400).json({ success: false, error: 'No device selected' });
+
+    try {
+        const recorder = await startDltRecorder(getAdbBinary(req), serial);
+        res.json({ success: true, recorder: recorder.status() });
+    } catch (e) {
+        console.error(`[DLT REC] Start failed for ${serial}:`, e.message);
+        res.status(500).json({ success: false, error: e.message });
+    }
+});
+
+app.post('/api/dlt/record/stop', async (req, res) => {
+    const userConfig = userConfigs.get(getClientId(req));
+    const serial = req.body?.serial || userConfig?.serial;
+    if (!serial) return res.status(400).json({ success: false, error: 'No device selected' });
+
+    const stopped = await stopDltRecorder(serial);
+    res.json({ success: true, stopped });
+});
+
+// List captured devices with their time coverage, plus live recorder state
+app.get('/api/dlt/recordings', (req, res) => {
+    res.json({
+        success: true,
+        recordings: listRecordings(DLT_CAPTURE_DIR),
+        recorders: Array.from(dltRecorders.values()).map(e => e.recorder.status())
+    });
+});
+
+// Download a time window as a .dlt file: ?from=<ms|ISO>&to=<ms|ISO>
+app.get('/api/dlt/recordings/:serial/window', (req, res) => {
+    const { serial } = req.params;
+    const from = parseTimeParam(req.query.from, 0);
+    const to = parseTimeParam(req.query.to, Date.now());
+    if (from > to) return res.status(400).json({ success: false, error: 'from must be before to' });
+
+    res.setHeader('Content-Type', 'application/octet-stream');
+    res.setHeader('Content-Disposition', `attachment; filename="${safeSerial(serial)}_${from}-${to}.dlt"`);
+    const stream = createWindowStream(DLT_CAPTURE_DIR, serial, from, to);
+    stream.on('error', (err) => {
+        console.error(`[DLT REC] Window read failed for ${serial}:`, err.message);
+        res.destroy(err);
+    });
+    stream.pipe(res);
+});
+
+// Replay a recorded window to a DLT Viewer: opens a one-shot TCP port that behaves like a daemon
+app.post('/api/dlt/replay', async (req, res) => {
+    const { serial, from, to } = req.body || {};
+    if (!serial) return res.status(400).json({ success: false, error: 'No serial provided' });
+    const fromMs = parseTimeParam(from, 0);
+    const toMs = parseTimeParam(to, Date.now());
+
+    // Only the requesting machine may connect, and only once: the port serves one viewer, then closes
+    const plainIp = (ip) => String(ip || '').replace(/^::ffff:/, '');
+    const viewerIp = plainIp(getCallerIp(req));
+    // A browser on this machine may run its viewer against the LAN address, not 127.0.0.1
+    const allowed = getLocalIps().includes(viewerIp) ? getLocalIps().map(plainIp) : [viewerIp];
+    const replayServer = net.createServer((socket) => {
+        if (!allowed.includes(plainIp(socket.remoteAddress))) {
+            console.warn(`[DLT REC] Replay port refused ${socket.remoteAddress} (requested by ${viewerIp})`);
+            return socket.destroy();
+        }
+        replayServer.close();
+        const stream = createWindowStream(DLT_CAPTURE_DIR, serial, fromMs, toMs, { stripStorageHeader: true });
+        stream.on('error', () => socket.destroy());
+        socket.on('error', () => stream.destroy());
+        stream.pipe(socket);
+    });
+    // Replays are short-lived; don't keep a port open forever if nobody connects
+    const idleTimer = setTimeout(() => replayServer.close(), 10 * 60 * 1000);
+    replayServer.on('close', () => clearTimeout(idleTimer));
+
+    replayServer.on('error', (err) => {
+        console.error('[DLT REC] Replay server error:', err.message);
+        if (!res.headersSent) res.status(500).json({ success: false, error: err.message });
+    });
+    replayServer.listen(parseInt(req.body.port) || 0, '0.0.0.0', () => {
+        const port = replayServer.address().port;
+        console.log(`[DLT REC] Replay of ${serial} [${fromMs}..${toMs}] on ${getPrimaryIp()}:${port}`);
+        res.json({
+            success: true,
+            message: `Connect your DLT Viewer to ${getPrimaryIp()}:${port} to replay the window`,
+            ip: getPrimaryIp(),
+            port
+        });
+    });
+});
+
+// --- RESULTS HISTORY ---
+
+// Save a Run All / manual result set: { modelId, results: { cmdId: { success, output, command, name } }, timestamp }
+app.post('/api/save-results', async (req, res) => {
+    const { modelId, results, timestamp } = req.body;
+    if (!results || typeof results !== 'object') return res.status(400).json({ success: false, error: 'No results' });
+
+    await resultsReady;
+    const id = getClientId(req);
+    const ts = parseTimeParam(timestamp, Date.now());
+    const runId = req.body.runId || `run_${ts}_${Math.random().toString(36).slice(2, 8)}`;
+    const serial = req.body.serial || userConfigs.get(id)?.serial || undefined;
+    try {
+        const stored = await resultsStore.appendMany(Object.entries(results).map(([commandId, r]) => ({
+            ts,
+            kind: 'result',
+            runId,
+            model: modelId,
+            serial,
+            client: id,
+            commandId,
+            name: r.name,
+            command: r.command,
+            success: !!r.success,
+            output: r.output
+        })));
+        res.json({ success: true, runId, count: stored.length });
+    } catch (e) {
+        res.status(500).json({ success: false, error: e.message });
+    }
+});
+
+const resultsFilter = (q) => ({
+    model: q.model || undefined,
+    commandId: q.command || q.commandId || undefined,
+    serial: q.serial || undefined,
+    runId: q.runId || undefined,
+    kind: q.kind || undefined,
+    success: q.success === undefined ? undefined : q.success === 'true',
+    changed: q.changed === undefined ? undefined : q.changed === 'true',
+    from: parseTimeParam(q.from, undefined),
+    to: parseTimeParam(q.to, undefined)
+});
+
+// Query history: ?model=&command=&serial=&runId=&kind=result|step&success=&changed=&from=&to=&limit=&output=0
+app.get('/api/results', async (req, res) => {
+    await resultsReady;
+    try {
+        const limit = Math.min(parseInt(req.query.limit) || 200, 5000);
+        const records = await resultsStore.query(resultsFilter(req.query), { limit, withOutput: req.query.output !== '0' });
+        res.json({ success: true, records });
+    } catch (e) {
+        res.status(500).json({ success: false, error: e.message });
+    }
+});
+
+// Line diff between two stored outputs (record.prevHash -> record.outputHash for "what changed")
+app.get('/api/results/diff', async (req, res) => {
+    const { a, b } = req.query;
+    if (!a || !b) return res.status(400).json({ success: false, error: 'a and b output hashes required' });
+    await resultsReady;
+    try {
+        const [before, after] = await Promise.all([resultsStore.blob(a), resultsStore.blob(b)]);
+        if (before === null || after === null) return res.status(404).json({ success: false, error: 'Unknown output hash' });
+        // LCS is quadratic in the line count - keep it off the request loop
+        const diff = await reportPool.run('diff', { a: before, b: after });
+        res.json({ success: true, diff, changedLines: diff.filter(d => d.op !== ' ').length });
+    } catch (e) {
+        res.status(500).json({ success: false, error: e.message });
+    }
+});
+
+// Regression report CSV of a whole run, straight from the results log: ?runId=
+app.get('/api/results/export.csv', async (req, res) => {
+    if (!req.query.runId) return res.status(400).json({ success: false, error: 'runId required' });
+    await resultsReady;
+    try {
+        // Scan, blob lookups and CSV encoding all run in the worker; only the file list is built here
+        const plan = await resultsStore.readPlan({});
+        const names = {};
+        for (const [model, entry] of Object.entries(readJson(COMMANDS_FILE))) {
+            names[model] = {};
+            (entry.commands || []).forEach(c => { names[model][c.id] = c.name; });
+        }
+        const report = await reportPool.run('runCsv', { plan, runId: req.query.runId, names });
+        if (!report) return res.status(404).json({ success: false, error: 'Unknown run' });
+
+        const { model, ts, csv } = report;
+        res.setHeader('Content-Type', 'text/csv; charset=utf-8');
+        res.setHeader('Content-Disposition', `attachment; filename="regression_report_${model}_${ts}.csv"`);
+        res.send(Buffer.from(csv.buffer, csv.byteOffset, csv.byteLength));
+    } catch (e) {
+        res.status(500).json({ success: false, error: e.message });
+    }
+});
+
+// One row per run (Run All save or regression), newest first
+app.get('/api/results/runs', async (req, res) => {
+    await resultsReady;
+    try {
+        const limit = Math.min(parseInt(req.query.limit) || 50, 1000);
+        res.json({ success: true, runs: await resultsStore.runs(resultsFilter(req.query), { limit }), store: resultsStore.stats() });
+    } catch (e) {
+        res.status(500).json({ success: false, error: e.message });
+    }
+});
+
+// --- COMMAND TIMING PROFILER ---
+
+// p50/p95/p99 per (model, command, serial): ?model=&serial=&commandId=
+app.get('/api/profiler/commands', (req, res) => {
+    const { model, serial, commandId } = req.query;
+    const rows = commandProfiler.summary({ model, serial, commandId }).sort((a, b) => b.p95 - a.p95);
+    res.json({ success: true, commands: rows });
+});
+
+// Slowest recent individual invocations
+app.get('/api/profiler/slowest', (req, res) => {
+    const { model, serial, commandId } = req.query;
+    const limit = Math.min(parseInt(req.query.limit) || 20, 200);
+    res.json({ success: true, invocations: commandProfiler.slowest({ model, serial, commandId }, limit) });
+});
+
+// Event-loop delay (ms, last 15 s window) and worker pool load
+app.get('/api/profiler/event-loop', (req, res) => {
+    res.json({ success: true, windowMs: LOOP_DELAY_WINDOW, delay: loopDelayWindow, workers: reportPool.status() });
+});
+
+// --- TRACING ---
+
+// Runs with recorded spans, most recent first
+app.get('/api/traces', (req, res) => {
+    res.json({ success: true, enabled: tracer.enabled, untagged: TRACE_UNTAGGED, spans: tracer.spanCount, runs: tracer.list() });
+});
+
+// Chrome trace JSON of one run (?run= regression runId, job id, Run All id or client:<id>) - open in ui.perfetto.dev
+app.get('/api/trace', (req, res) => {
+    const run = String(req.query.run || `client:${getClientId(req)}`);
+    const trace = tracer.export(run);
+    if (!trace) return res.status(404).json({ success: false, error: `No trace recorded for '${run}'` });
+    res.setHeader('Content-Disposition', `attachment; filename="trace_${run.replace(/[^\w.-]+/g, '_')}.json"`);
+    res.json(trace);
+});
+
+// --- ADMISSION ---
+
+// Who is being queued or turned away on ADB-bound routes, most rejected first
+app.get('/api/throttle', (req, res) => {
+    if (!admission) return res.json({ success: true, enabled: false, limits: [] });
+    const limits = admission.list().map(l => (l.scope === 'client' ? { ...l, ip: sessions.sessions.get(l.id)?.ip || '' } : l));
+    res.json({ success: true, enabled: true, config: admission.opts, costs: { ...ADMISSION_COST, ...ADMISSION_COST_ON_MISS }, limits });
+});
+
+// --- METRICS ---
+
+metricsRegistry.gauge('tm_cache_hit_ratio', 'Hit ratio of the device list / device detail caches', ['cache'], (g) => {
+    const counts = {};
+    for (const series of metrics.cacheRequests.series.values()) {
+        const [cache, result] = series.values;
+        counts[cache] = counts[cache] || { hit: 0, total: 0 };
+        if (result === 'hit') counts[cache].hit += series.value;
+        counts[cache].total += series.value;
+    }
+    for (const [cache, c] of Object.entries(counts)) g.set({ cache }, c.total ? c.hit / c.total : 0);
+});
+metricsRegistry.gauge('tm_command_cache_entries', 'Query results held by the command cache', [], (g) => g.set({}, commandCache.status().entries));
+metricsRegistry.gauge('tm_regression_jobs', 'Server-side regression jobs by state', ['state'], (g) => {
+    const counts = { queued: 0, running: 0, paused: 0, done: 0, cancelled: 0, failed: 0 };
+    for (const job of regressionQueue.jobs.values()) counts[job.state] = (counts[job.state] || 0) + 1;
+    for (const [state, n] of Object.entries(counts)) g.set({ state }, n);
+});
+metricsRegistry.gauge('tm_admission_queued', 'ADB-bound requests waiting for admission', [], (g) => {
+    g.set({}, admission ? admission.list().reduce((n, l) => n + (l.scope === 'client' ? l.queued : 0), 0) : 0);
+});
+metricsRegistry.gauge('tm_dlt_bridges', 'Active DLT bridges', [], (g) => g.set({}, dltProxies.size));
+metricsRegistry.gauge('tm_dlt_viewers', 'DLT Viewer connections across all bridges', [], (g) => {
+    let viewers = 0;
+    for (const entry of dltProxies.values()) viewers += entry.stats ? entry.stats.activeConnections : 0;
+    g.set({}, viewers);
+});
+metricsRegistry.gauge('tm_dlt_bridge_bytes', 'Bytes relayed by active DLT bridges', ['direction'], (g) => {
+    let up = 0, down = 0;
+    for (const entry of dltProxies.values()) {
+        if (!entry.stats) continue;
+        up += entry.stats.bytesUp;
+        down += entry.stats.bytesDown;
+    }
+    g.set({ direction: 'up' }, up);
+    g.set({ direction: 'down' }, down);
+});
+metricsRegistry.gauge('tm_dlt_recorders', 'Active DLT capture-to-disk recorders', [], (g) => g.set({}, dltRecorders.size));
+metricsRegistry.gauge('tm_results_records', 'Records held in the results log', [], (g) => g.set({}, resultsStore.stats().records));
+metricsRegistry.gauge('tm_results_blobs', 'Distinct command outputs held in the results blob log', [], (g) => g.set({}, resultsStore.stats().blobs));
+metricsRegistry.gauge('tm_adb_tcp_endpoints', 'Managed ADB-over-TCP endpoints by state', ['state'], (g) => {
+    const counts = { connecting: 0, connected: 0, down: 0 };
+    adbConnections.list().forEach(c => { if (c.state in counts) counts[c.state]++; });
+    Object.entries(counts).forEach(([state, n]) => g.set({ state }, n));
+});
+metricsRegistry.gauge('tm_notification_streams', 'Open notification push (SSE) connections', [], (g) => g.set({}, notificationFeed.subscribers.size));
+metricsRegistry.gauge('tm_event_loop_delay_seconds', 'Event-loop delay over the last 15 s window', ['stat'], (g) => {
+    Object.entries(loopDelayWindow).forEach(([stat, ms]) => g.set({ stat }, ms / 1000));
+});
+metricsRegistry.gauge('tm_worker_tasks', 'Report worker pool tasks by state', ['state'], (g) => {
+    const st = reportPool.status();
+    g.set({ state: 'busy' }, st.busy);
+    g.set({ state: 'queued' }, st.queued);
+    g.set({ state: 'completed' }, st.completed);
+    g.set({ state: 'failed' }, st.failed);
+});
+metricsRegistry.gauge('tm_client_sessions', 'Known client sessions (userConfigs entries)', [], (g) => g.set({}, userConfigs.size));
+metricsRegistry.gauge('tm_sessions', 'Client sessions by heartbeat state', ['state'], (g) => {
+    const { active, idle } = sessions.stats();
+    g.set({ state: 'active' }, active);
+    g.set({ state: 'idle' }, idle);
+});
+metricsRegistry.gauge('tm_dlt_ports_in_use', 'Public ports held by DLT bridges', [], (g) => g.set({}, usedDltPorts.size));
+
+app.get('/metrics', (req, res) => {
+    res.setHeader('Content-Type', Registry.CONTENT_TYPE);
+    res.send(metricsRegistry.render());
+});
+
+const PORT = parseInt(process.env.PORT) || 3000;
 app.listen(PORT, '0.0.0.0', () => {
     console.log(`\n🚀 Telephony Manager LIVE on port ${PORT}`);
     console.log(`📡 Access locally: http://localhost:${PORT}`);
     console.log(`📡 Access network: http://${os.hostname()}:${PORT}\n`);
+
+    // Runs after listen: requests are served with the default/cached binary while probing
+    discoverAdb().catch(e => console.error('[SYSTEM] ADB discovery failed:', e.message));
+
+    if (FEDERATION_ROLE === 'coordinator') console.log('[FEDERATION] Coordinator: agents register at POST /api/federation/register');
+    if (FEDERATION_ROLE === 'agent') {
+        if (!process.env.TM_COORDINATOR) return console.error('[FEDERATION] TM_ROLE=agent needs TM_COORDINATOR=http://host:port');
+        new AgentLink({
+            coordinatorUrl: process.env.TM_COORDINATOR,
+            name: process.env.TM_AGENT_NAME || `${os.hostname()}:${PORT}`,
+            url: process.env.TM_AGENT_URL || `http://${getPrimaryIp()}:${PORT}`,
+            token: FEDERATION_TOKEN,
+            listDevices: () => getCachedDevices(config.adbCommand)
+        }).start();
+    }
 });
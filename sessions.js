@@ -0,0 +1,93 @@
+/**
+ * Sessions - last-seen tracking for every client (X-Client-ID, or IP without one).
+ *
+ * Every API request and the tab's periodic heartbeat touch the session. A sweep
+ * then walks all sessions:
+ *   - idle for `idleMs`   -> onIdle(id) releases what the tab was holding
+ *                            (DLT bridge, ADB forward, listening port); it may
+ *                            return false to be asked again on the next sweep
+ *   - idle for `expireMs` -> onExpire(id) drops the per-client state and the
+ *                            session itself is forgotten
+ * so state no longer depends on the tab's unload beacon ever arriving.
+ */
+
+const DEFAULTS = {
+    idleMs: 3 * 60 * 1000,          // background tabs may throttle timers to once a minute
+    expireMs: 12 * 60 * 60 * 1000,  // keep per-client settings across a lunch break, not forever
+    sweepMs: 30 * 1000
+};
+
+class SessionTracker {
+    /**
+     * @param {Object} hooks { onIdle(id) -> bool | Promise<bool>, onExpire(id) }
+     * @param {Object} [opts] see DEFAULTS
+     */
+    constructor({ onIdle = () => true, onExpire = () => {} } = {}, opts = {}) {
+        this.onIdle = onIdle;
+        this.onExpire = onExpire;
+        this.opts = { ...DEFAULTS, ...opts };
+        this.sessions = new Map(); // id -> { id, ip, firstSeen, lastSeen, released }
+        this.timer = null;
+        this.evicted = 0;
+    }
+
+    start() {
+        if (this.timer) return;
+        this.timer = setInterval(() => {
+            this.sweep().catch(e => console.error('[SESSIONS] Sweep failed:', e.message));
+        }, this.opts.sweepMs);
+        this.timer.unref();
+    }
+
+    stop() {
+        clearInterval(this.timer);
+        this.timer = null;
+    }
+
+    touch(id, ip = '') {
+        const now = Date.now();
+        let session = this.sessions.get(id);
+        if (!session) {
+            session = { id, ip, firstSeen: now, lastSeen: now, released: false };
+            this.sessions.set(id, session);
+        }
+        session.lastSeen = now;
+        session.released = false;
+        if (ip) session.ip = ip;
+        return session;
+    }
+
+    async sweep() {
+        const now = Date.now();
+        for (const [id, session] of this.sessions) {
+            const idle = now - session.lastSeen;
+            if (idle > this.opts.expireMs) {
+                this.sessions.delete(id);
+                this.evicted++;
+                await this.onExpire(id);
+            } else if (idle > this.opts.idleMs && !session.released) {
+                session.released = (await this.onIdle(id)) !== false;
+            }
+        }
+    }
+
+    isActive(session, now = Date.now()) {
+        return now - session.lastSeen <= this.opts.idleMs;
+    }
+
+    stats() {
+        const now = Date.now();
+        let active = 0;
+        for (const session of this.sessions.values()) if (this.isActive(session, now)) active++;
+        return { total: this.sessions.size, active, idle: this.sessions.size - active, evicted: this.evicted };
+    }
+
+    list() {
+        const now = Date.now();
+        return [...this.sessions.values()]
+            .map(s => ({ ...s, active: this.isActive(s, now), idleMs: now - s.lastSeen }))
+            .sort((a, b) => b.lastSeen - a.lastSeen);
+    }
+}
+
+module.exports = { SessionTracker };
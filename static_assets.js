@@ -0,0 +1,230 @@
+/**
+ * Static Assets - fingerprinted, minified, precompressed copies of public/.
+ *
+ * build() copies every top-level file of public/ into a dist directory:
+ *   - CSS is minified; JS is minified when esbuild happens to be installed
+ *     (optional - a hand-rolled JS minifier is not worth the risk)
+ *   - every asset except HTML gets a content hash in its name
+ *     (app.js -> app.3f9c2a1b7d.js) and the HTML is rewritten to match
+ *   - text assets get .br (brotli q11) and .gz (gzip -9) siblings
+ *
+ * middleware() serves dist with content negotiation: hashed files are
+ * immutable for a year, HTML is revalidated with an ETag on every load.
+ * Anything not in dist (report.html, files added later) falls through to
+ * express.static(public/).
+ *
+ * Run `npm run build:assets` (or `node static_assets.js`) to rebuild by hand;
+ * the server also rebuilds at startup whenever public/ is newer than dist.
+ * Everything here is async (brotli q11 runs on the libuv pool), so a rebuild
+ * never holds up the server's first requests.
+ */
+
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const util = require('util');
+const zlib = require('zlib');
+
+const brotliCompress = util.promisify(zlib.brotliCompress);
+const gzip = util.promisify(zlib.gzip);
+
+const MANIFEST = 'manifest.json';
+const COMPRESSIBLE = new Set(['.html', '.js', '.css', '.svg', '.json', '.txt']);
+const TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.svg': 'image/svg+xml',
+    '.json': 'application/json; charset=utf-8',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.ico': 'image/x-icon',
+    '.txt': 'text/plain; charset=utf-8'
+};
+const IMMUTABLE = 'public, max-age=31536000, immutable';
+// Generated at runtime by report_html.py - always served live from public/
+const EXCLUDE = new Set(['report.html']);
+
+const contentHash = (buf) => crypto.createHash('sha256').update(buf).digest('hex').slice(0, 10);
+
+const minifyCss = (css) => css
+    .replace(/\/\*[\s\S]*?\*\//g, '')
+    .replace(/\s+/g, ' ')
+    .replace(/\s*([{};,])\s*/g, '$1')
+    .replace(/;}/g, '}')
+    .trim();
+
+// Indentation and comments only: the markup is otherwise left as written (pre blocks are empty placeholders)
+const minifyHtml = (html) => html
+    .replace(/<!--(?!\[if)[\s\S]*?-->/g, '')
+    .split('\n')
+    .map(line => line.trim())
+    .filter(Boolean)
+    .join('\n');
+
+const minifyJs = (js) => {
+    try {
+        const esbuild = require('esbuild');
+        return esbuild.transformSync(js, { minify: true, loader: 'js', target: 'es2019' }).code;
+    } catch (e) {
+        return js; // esbuild not installed: ship as-is, compression still applies
+    }
+};
+
+// Top-level regular files of srcDir, minus EXCLUDE, with their stats
+const listSources = async (srcDir) => {
+    const names = (await fs.promises.readdir(srcDir)).filter(f => !EXCLUDE.has(f));
+    const stats = await Promise.all(names.map(f => fs.promises.stat(path.join(srcDir, f))));
+    return names.map((name, i) => ({ name, stat: stats[i] })).filter(f => f.stat.isFile());
+};
+
+/**
+ * Build dist from srcDir. Resolves to the manifest ({ logicalName: builtName }).
+ */
+const build = async (srcDir, outDir) => {
+    const tmpDir = `${outDir}.tmp`;
+    await fs.promises.rm(tmpDir, { recursive: true, force: true });
+    await fs.promises.mkdir(tmpDir, { recursive: true });
+
+    const files = (await listSources(srcDir)).map(f => f.name);
+    const manifest = {};
+    const htmlFiles = [];
+
+    for (const name of files) {
+        const ext = path.extname(name).toLowerCase();
+        if (ext === '.html') {
+            htmlFiles.push(name);
+            continue;
+        }
+        let body = await fs.promises.readFile(path.join(srcDir, name));
+        if (ext === '.css') body = Buffer.from(minifyCss(body.toString('utf8')));
+        else if (ext === '.js') body = Buffer.from(minifyJs(body.toString('utf8')));
+        const built = `${path.basename(name, ext)}.${contentHash(body)}${ext}`;
+        await fs.promises.writeFile(path.join(tmpDir, built), body);
+        manifest[name] = built;
+    }
+
+    // Point src/href attributes at the fingerprinted names
+    for (const name of htmlFiles) {
+        let html = await fs.promises.readFile(path.join(srcDir, name), 'utf8');
+        html = html.replace(/\b(src|href)="([^"?#]+)"/g, (match, attr, ref) => {
+            const target = manifest[ref.replace(/^\.?\//, '')];
+            return target ? `${attr}="${target}"` : match;
+        });
+        await fs.promises.writeFile(path.join(tmpDir, name), minifyHtml(html));
+        manifest[name] = name;
+    }
+
+    // Compress every asset concurrently
+    await Promise.all(Object.values(manifest).map(async (built) => {
+        if (!COMPRESSIBLE.has(path.extname(built).toLowerCase())) return;
+        const body = await fs.promises.readFile(path.join(tmpDir, built));
+        const [br, gz] = await Promise.all([
+            brotliCompress(body, {
+                params: {
+                    [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+                    [zlib.constants.BROTLI_PARAM_SIZE_HINT]: body.length
+                }
+            }),
+            gzip(body, { level: 9 })
+        ]);
+        await fs.promises.writeFile(path.join(tmpDir, `${built}.br`), br);
+        await fs.promises.writeFile(path.join(tmpDir, `${built}.gz`), gz);
+    }));
+
+    await fs.promises.writeFile(path.join(tmpDir, MANIFEST), JSON.stringify({ built: Date.now(), files: manifest }, null, 2));
+    await fs.promises.rm(outDir, { recursive: true, force: true });
+    await fs.promises.rename(tmpDir, outDir);
+    return manifest;
+};
+
+/**
+ * Resolves true when dist is missing or any file in srcDir changed after the last build.
+ */
+const isStale = async (srcDir, outDir) => {
+    let built;
+    try {
+        built = JSON.parse(await fs.promises.readFile(path.join(outDir, MANIFEST), 'utf8')).built;
+    } catch (e) {
+        return true;
+    }
+    return (await listSources(srcDir)).some(f => f.stat.mtimeMs > built);
+};
+
+/**
+ * Resolves to an Express middleware serving the dist directory from memory.
+ */
+const middleware = async (outDir) => {
+    const entries = new Map(); // url path -> { body, br, gz, type, etag, cache }
+    const { files } = JSON.parse(await fs.promises.readFile(path.join(outDir, MANIFEST), 'utf8'));
+    const read = (f) => fs.promises.readFile(f).catch(() => null);
+
+    for (const [logical, built] of Object.entries(files)) {
+        const full = path.join(outDir, built);
+        const [body, br, gz] = await Promise.all([fs.promises.readFile(full), read(`${full}.br`), read(`${full}.gz`)]);
+        const isHtml = path.extname(built) === '.html';
+        const entry = {
+            body,
+            br,
+            gz,
+            type: TYPES[path.extname(built).toLowerCase()] || 'application/octet-stream',
+            etag: `W/"${contentHash(body)}"`, // weak: the same validator covers every encoding
+            cache: isHtml ? 'no-cache' : IMMUTABLE
+        };
+        entries.set(`/${built}`, entry);
+        if (isHtml) {
+            if (logical === 'index.html') entries.set('/', entry);
+        } else {
+            // Old un-hashed URLs keep working (bookmarks, cached HTML) but must revalidate
+            entries.set(`/${logical}`, { ...entry, cache: 'no-cache' });
+        }
+    }
+
+    return (req, res, next) => {
+        if (req.method !== 'GET' && req.method !== 'HEAD') return next();
+        const entry = entries.get(req.path);
+        if (!entry) return next();
+
+        res.setHeader('Content-Type', entry.type);
+        res.setHeader('Cache-Control', entry.cache);
+        res.setHeader('ETag', entry.etag);
+        res.setHeader('Vary', 'Accept-Encoding');
+        if (req.headers['if-none-match'] === entry.etag) {
+            res.statusCode = 304;
+            return res.end();
+        }
+
+        const accept = req.headers['accept-encoding'] || '';
+        let payload = entry.body;
+        if (entry.br && /\bbr\b/.test(accept)) {
+            payload = entry.br;
+            res.setHeader('Content-Encoding', 'br');
+        } else if (entry.gz && /\bgzip\b/.test(accept)) {
+            payload = entry.gz;
+            res.setHeader('Content-Encoding', 'gzip');
+        }
+        res.setHeader('Content-Length', payload.length);
+        if (req.method === 'HEAD') return res.end();
+        res.end(payload);
+    };
+};
+
+module.exports = { build, isStale, middleware, minifyCss, minifyHtml };
+
+if (require.main === module) {
+    const srcDir = path.join(__dirname, 'public');
+    const outDir = process.argv[2] || path.join(__dirname, 'public_dist');
+    const started = Date.now();
+    build(srcDir, outDir).then((manifest) => {
+        for (const [logical, built] of Object.entries(manifest)) {
+            const src = fs.statSync(path.join(srcDir, logical)).size;
+            const full = path.join(outDir, built);
+            const br = fs.existsSync(`${full}.br`) ? fs.statSync(`${full}.br`).size : fs.statSync(full).size;
+            console.log(`${logical.padEnd(16)} -> ${built.padEnd(28)} ${String(src).padStart(8)} B -> ${String(br).padStart(7)} B`);
+        }
+        console.log(`Built ${outDir} in ${Date.now() - started} ms`);
+    }).catch((e) => {
+        console.error(`Build failed: ${e.message}`);
+        process.exitCode = 1;
+    });
+}
@@ -0,0 +1,26 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { AdmissionController, AdmissionError } = require('../admission');
+
+const settle = (promises) => Promise.all(promises.map(p => p.then(() => 'ok', e => (e instanceof AdmissionError ? e.scope : e))));
+
+test('a burst queues up to the bound, the rest is rejected', async () => {
+    const admission = new AdmissionController({ client: { rate: 10, burst: 2 }, maxQueued: 2 });
+    const outcomes = await settle(Array.from({ length: 6 }, () => admission.admit({ client: 'tab' })));
+    assert.deepStrictEqual(outcomes, ['ok', 'ok', 'ok', 'ok', 'client', 'client']);
+    const [stats] = admission.list();
+    assert.deepStrictEqual([stats.admitted, stats.delayed, stats.rejected], [4, 2, 2]);
+});
+
+test('rotating client ids does not escape the per-IP limit', async () => {
+    const admission = new AdmissionController({ ip: { rate: 1, burst: 3 }, maxWaitMs: 100 });
+    const outcomes = await settle(Array.from({ length: 5 }, (_, i) => admission.admit({ client: `id${i}`, ip: '10.0.0.9' })));
+    assert.deepStrictEqual(outcomes, ['ok', 'ok', 'ok', 'ip', 'ip']);
+    assert.strictEqual(await admission.admit({ client: 'other', ip: '10.0.0.10' }), 0);
+});
+
+test('a device is shared between clients', async () => {
+    const admission = new AdmissionController({ serial: { rate: 1, burst: 1 }, maxWaitMs: 100 });
+    await admission.admit({ client: 'a', serial: 'S1' });
+    await assert.rejects(admission.admit({ client: 'b', serial: 's1' }), (e) => e.scope === 'serial');
+});
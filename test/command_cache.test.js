@@ -0,0 +1,46 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { CommandCache, classify } = require('../command_cache');
+
+const later = (value, ms) => new Promise(r => setTimeout(() => r({ success: true, stdout: value }), ms));
+
+test('concurrent identical reads share one call', async () => {
+    const cache = new CommandCache();
+    let calls = 0;
+    const run = () => { calls++; return later('v', 20); };
+    const [a, b] = await Promise.all([cache.read('d', 'cmd', run), cache.read('d', 'cmd', run)]);
+    assert.strictEqual(calls, 1);
+    assert.deepStrictEqual([a.source, b.source], ['miss', 'coalesced']);
+    assert.strictEqual((await cache.read('d', 'cmd', run)).source, 'hit');
+});
+
+test('a read started after a write does not join a read started before it', async () => {
+    const cache = new CommandCache();
+    const before = cache.read('d', 'cmd', () => later('old', 30));
+    cache.invalidate('d');
+    const after = await cache.read('d', 'cmd', () => later('new', 5));
+    assert.strictEqual(after.source, 'miss');
+    assert.strictEqual(after.result.stdout, 'new');
+    assert.strictEqual((await before).result.stdout, 'old');
+    // The pre-write read finished last but is not cached
+    assert.strictEqual((await cache.read('d', 'cmd', () => later('x', 0))).result.stdout, 'new');
+});
+
+test('classify', () => {
+    assert.strictEqual(classify('shell sldd telephony getimei'), 'read');
+    assert.strictEqual(classify('shell /usr/bin/factory/sldd telephony isRadioOn'), 'read');
+    assert.strictEqual(classify('shell sldd telephony setRadioPower 1'), 'write');
+    assert.strictEqual(classify('shell sldd telephony getimei; reboot'), 'write');
+    assert.strictEqual(classify('reboot', 'read'), 'read');
+});
+
+test('has() tells whether a read would spawn adb', async () => {
+    const cache = new CommandCache();
+    assert.strictEqual(cache.has('d', 'cmd'), false);
+    const pending = cache.read('d', 'cmd', () => later('v', 10));
+    assert.strictEqual(cache.has('d', 'cmd'), true);
+    await pending;
+    assert.strictEqual(cache.has('d', 'cmd'), true);
+    cache.invalidate('d');
+    assert.strictEqual(cache.has('d', 'cmd'), false);
+});
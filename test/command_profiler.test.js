@@ -0,0 +1,26 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { CommandProfiler } = require('../command_profiler');
+
+test('labels containing "|" keep their fields', () => {
+    const profiler = new CommandProfiler();
+    profiler.record({ model: 'toyota', commandId: 'ps |', serial: 'S1', duration: 120 });
+    const [row] = profiler.summary({ commandId: 'ps |', serial: 'S1' });
+    assert.deepStrictEqual([row.model, row.commandId, row.serial, row.samples], ['toyota', 'ps |', 'S1', 1]);
+});
+
+test('history survives save / load, merged with commands recorded meanwhile', async () => {
+    const file = path.join(fs.mkdtempSync(path.join(os.tmpdir(), 'profiler-')), 'timings.json');
+    const profiler = new CommandProfiler();
+    profiler.record({ model: 'bmw', commandId: 'a|b', serial: 'S2', duration: 50, time: 1 });
+    await profiler.save(file);
+
+    const reloaded = new CommandProfiler();
+    reloaded.record({ model: 'bmw', commandId: 'a|b', serial: 'S2', duration: 70, time: 2 });
+    await reloaded.load(file);
+    const [row] = reloaded.summary({ commandId: 'a|b' });
+    assert.deepStrictEqual([row.serial, row.samples, row.total, row.lastRun], ['S2', 2, 2, 2]);
+});
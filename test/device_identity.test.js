@@ -0,0 +1,35 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { DeviceIdentityCache, parseBootId } = require('../device_identity');
+
+test('a reboot drops the entry', () => {
+    const cache = new DeviceIdentityCache();
+    cache.set('d', 'boot1', { imei: '111', region: 'EU' });
+    assert.strictEqual(cache.get('d', 'boot1').imei, '111');
+    assert.strictEqual(cache.get('d', 'boot2'), null);
+});
+
+test('facts read before a forget are not stored', () => {
+    const cache = new DeviceIdentityCache();
+    cache.set('d', 'boot1', { swVersion: 'v1' });
+    const generation = cache.generation('d'); // status poll starts
+    cache.forget('d', ['imei']);              // factorySetimei lands meanwhile
+    assert.strictEqual(cache.set('d', 'boot1', { imei: 'old' }, generation), null);
+    assert.strictEqual(cache.get('d', 'boot1').imei, undefined);
+    cache.set('d', 'boot1', { imei: 'new' }, cache.generation('d'));
+    assert.strictEqual(cache.get('d', 'boot1').imei, 'new');
+});
+
+test('forget bumps the generation even without an entry', () => {
+    const cache = new DeviceIdentityCache();
+    const generation = cache.generation('d');
+    cache.forget('d', ['region']);
+    assert.strictEqual(cache.set('d', 'boot1', { region: 'EU' }, generation), null);
+    assert.strictEqual(cache.peek('d'), null);
+});
+
+test('only a UUID counts as a boot id', () => {
+    assert.strictEqual(parseBootId('0f7c2c9e-7c33-4b8a-9d45-3d2c1e0b9a11\n'), '0f7c2c9e-7c33-4b8a-9d45-3d2c1e0b9a11');
+    assert.strictEqual(parseBootId('/system/bin/sh: cat: /proc/sys/kernel/random/boot_id: not found'), '');
+    assert.strictEqual(parseBootId(''), '');
+});
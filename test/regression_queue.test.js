@@ -0,0 +1,40 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { RegressionQueue, JournalError } = require('../regression_queue');
+
+const tmpJournal = () => path.join(fs.mkdtempSync(path.join(os.tmpdir(), 'regq-')), 'jobs.jsonl');
+const spec = { serial: 'S1', binary: 'adb', iterations: 1, steps: [{ commandId: 'c', command: 'shell true', delay: 0 }] };
+
+test('jobs run and survive a reopen', async () => {
+    const file = tmpJournal();
+    let finished;
+    const done = new Promise(r => { finished = r; });
+    const queue = new RegressionQueue(file, { runStep: async () => ({ success: true }), onFinish: finished });
+    await queue.open();
+    const job = await queue.submit(spec);
+    await done;
+    await queue.close();
+
+    const reopened = new RegressionQueue(file, { runStep: async () => ({ success: true }) });
+    await reopened.open();
+    assert.strictEqual(reopened.get(job.id).state, 'done');
+    assert.strictEqual(reopened.get(job.id).pass, 1);
+    await reopened.close();
+});
+
+test('a failed journal write is reported, not acknowledged', async () => {
+    const queue = new RegressionQueue(tmpJournal(), { runStep: () => new Promise(() => {}) });
+    await queue.open();
+    const job = await queue.submit({ ...spec, serial: 'S2' });
+    await queue.writes; // the job's move to running
+    await queue.fh.close(); // every later write fails
+
+    await assert.rejects(queue.submit({ ...spec, serial: 'S3' }), JournalError);
+    assert.strictEqual(queue.list().length, 1);
+
+    await assert.rejects(queue.pause(job.id), JournalError);
+    assert.strictEqual(queue.get(job.id).state, 'running'); // rolled back
+});
@@ -0,0 +1,74 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { ResultsStore, readRun } = require('../results_store');
+
+const tmpDir = () => fs.mkdtempSync(path.join(os.tmpdir(), 'results-'));
+
+test('readRun returns one run with its outputs, oldest first', async () => {
+    const store = new ResultsStore({ dir: tmpDir(), compressAbove: 64 });
+    await store.open();
+    const big = 'IMEI : 1234\n'.repeat(20).trim();
+    await store.append({ kind: 'step', runId: 'r1', step: 1, iteration: 1, commandId: 'imei', output: 'short' });
+    await store.append({ kind: 'step', runId: 'r2', step: 1, iteration: 1, commandId: 'imei', output: 'other run' });
+    await store.append({ kind: 'step', runId: 'r1', step: 1, iteration: 2, commandId: 'imei', output: big });
+    await store.append({ kind: 'result', runId: 'r1', commandId: 'imei', output: 'not a step' });
+
+    const records = await readRun(await store.readPlan({}), { runId: 'r1', kind: 'step' });
+    assert.deepStrictEqual(records.map(r => [r.iteration, r.output]), [[1, 'short'], [2, big]]);
+    await store.close();
+});
+
+test('change detection carries over a restart', async () => {
+    const dir = tmpDir();
+    const store = new ResultsStore({ dir });
+    await store.open();
+    await store.append({ kind: 'step', runId: 'r1', step: 1, iteration: 1, commandId: 'imei', output: 'IMEI : 1' });
+    await store.close();
+
+    const reopened = new ResultsStore({ dir });
+    await reopened.open();
+    const same = await reopened.append({ kind: 'step', runId: 'r1', step: 1, iteration: 2, commandId: 'imei', output: 'IMEI : 1' });
+    const changed = await reopened.append({ kind: 'step', runId: 'r1', step: 1, iteration: 3, commandId: 'imei', output: 'IMEI : 2' });
+    assert.strictEqual(same.changed, false);
+    assert.strictEqual(changed.changed, true);
+    assert.strictEqual(changed.prevHash, same.outputHash);
+    await reopened.close();
+});
+
+test('imported legacy results are queried in time order', async () => {
+    const dir = tmpDir();
+    const legacyDir = tmpDir();
+    fs.writeFileSync(path.join(legacyDir, 'results_toyota_2026-01-30T11-17-13.510Z.json'),
+        JSON.stringify({ get_imei: { name: 'IMEI', command: 'x', success: true, output: 'old' } }));
+    const store = new ResultsStore({ dir });
+    await store.open();
+    await store.append({ kind: 'result', runId: 'native', model: 'toyota', commandId: 'get_imei', output: 'new' });
+    assert.strictEqual(await store.importLegacy(legacyDir), 1);
+    await store.append({ kind: 'result', runId: 'native2', model: 'toyota', commandId: 'get_imei', output: 'newest' });
+
+    const newestFirst = (await store.query({ commandId: 'get_imei' })).map(r => r.output);
+    assert.deepStrictEqual(newestFirst, ['newest', 'new', 'old']);
+    const ts = store.segments.map(s => s.minTs);
+    assert.deepStrictEqual(ts, [...ts].sort((a, b) => a - b));
+    await store.close();
+});
+
+test('a failed blob write is retried and does not count as the previous output', async () => {
+    const dir = tmpDir();
+    const store = new ResultsStore({ dir });
+    await store.open();
+    store.blobHandle = { write: async () => { throw new Error('disk full'); }, close: async () => {} };
+    await assert.rejects(store.append({ kind: 'step', runId: 'r1', step: 1, iteration: 1, commandId: 'imei', output: 'IMEI : 1' }));
+
+    const again = await store.append({ kind: 'step', runId: 'r1', step: 1, iteration: 2, commandId: 'imei', output: 'IMEI : 1' });
+    assert.strictEqual(again.changed, undefined);
+    await store.close();
+
+    const reopened = new ResultsStore({ dir });
+    await reopened.open();
+    assert.strictEqual(await reopened.blob(again.outputHash), 'IMEI : 1');
+    await reopened.close();
+});
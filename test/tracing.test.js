@@ -0,0 +1,46 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { Tracer } = require('../tracing');
+
+test('root passes a no-op end when tracing is disabled', async () => {
+    const tracer = new Tracer({ enabled: false });
+    const result = await tracer.root('job', 'step', {}, async (trace, end) => {
+        assert.strictEqual(trace, null);
+        end({ success: true });
+        return 'ran';
+    });
+    assert.strictEqual(result, 'ran');
+    assert.deepStrictEqual(tracer.list(), []);
+});
+
+test('root records the span with the args passed to end', async () => {
+    const tracer = new Tracer();
+    await tracer.root('job', 'step', { serial: 'S1' }, async (trace, end) => {
+        tracer.start('child')();
+        end({ success: true });
+    });
+    const events = tracer.export('job').traceEvents.filter(e => e.ph === 'X');
+    assert.deepStrictEqual(events.map(e => e.name).sort(), ['child', 'step']);
+    assert.deepStrictEqual(events.find(e => e.name === 'step').args, { serial: 'S1', success: true });
+});
+
+test('the span budget is global: least recently used runs are dropped first', async () => {
+    const tracer = new Tracer({ maxSpansPerRun: 5, maxSpans: 8 });
+    const request = (run) => tracer.root(run, 'req', {}, async (trace, end) => end());
+    for (let i = 0; i < 5; i++) await request('a');
+    for (let i = 0; i < 5; i++) await request('b');
+    assert.strictEqual(tracer.spanCount, 5);
+    assert.strictEqual(tracer.export('a'), null);
+    for (let i = 0; i < 3; i++) await request('c');
+    assert.strictEqual(tracer.spanCount, 8);
+    assert.deepStrictEqual(tracer.list().map(r => [r.run, r.spans]), [['c', 3], ['b', 5]]);
+});
+
+test('the middleware leaves requests without a run untraced', () => {
+    const tracer = new Tracer();
+    const middleware = tracer.middleware(req => req.headers['x-trace-run'] || null);
+    let called = 0;
+    middleware({ headers: {}, method: 'GET', baseUrl: '/api', path: '/device-status' }, {}, () => called++);
+    assert.strictEqual(called, 1);
+    assert.deepStrictEqual(tracer.list(), []);
+});
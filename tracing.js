@@ -0,0 +1,226 @@
+/**
+ * Tracing - span timelines of requests, exported in Chrome trace format.
+ *
+ * Every /api request becomes a root span; code called while serving it opens
+ * child spans (device lookup, command cache, each ADB process split into
+ * spawn and run time, output processing). The current span follows the async
+ * call chain through AsyncLocalStorage, so nothing has to be passed around.
+ *
+ * Spans are grouped by run: the X-Trace-Run header the tab sends during a
+ * Run All or regression (the regression runId) or a server job id. Requests
+ * outside a run (status polling, manual clicks) are only recorded, as
+ * "client:<X-Client-ID>", when the middleware's run function returns a key
+ * for them (TM_TRACE=all) - otherwise idle polling tabs would fill the
+ * budget and push out the runs worth looking at. The browser's X-Request-Id
+ * and X-Client-ID are recorded on the root span and the trace id is echoed
+ * back in X-Trace-Id.
+ *
+ *   GET /api/trace?run=<id>  -> JSON for chrome://tracing or ui.perfetto.dev
+ *
+ * One process per run, one thread per request. Overlapping children (parallel
+ * ADB probes) get their own lane under the request so events always nest.
+ */
+
+const { AsyncLocalStorage } = require('async_hooks');
+const { performance } = require('perf_hooks');
+
+const DEFAULTS = {
+    maxRuns: 50,           // least recently used runs are dropped
+    maxSpansPerRun: 20000, // ~4 MB of trace JSON; oldest spans are dropped first
+    maxSpans: 100000       // across all runs (~30 MB of heap); least recently used runs go first
+};
+
+const LANES_PER_TRACE = 100;
+
+class Tracer {
+    constructor(opts = {}) {
+        this.opts = { ...DEFAULTS, ...opts };
+        this.enabled = this.opts.enabled !== false;
+        this.als = new AsyncLocalStorage();
+        this.runs = new Map(); // run -> { pid, spans: [], dropped, requests }
+        this.nextPid = 1;
+        this.nextTrace = 1;
+        this.spanCount = 0;
+    }
+
+    // Microseconds on the wall clock, with sub-ms precision
+    _now() {
+        return (performance.timeOrigin + performance.now()) * 1000;
+    }
+
+    _run(key) {
+        let run = this.runs.get(key);
+        if (run) {
+            this.runs.delete(key); // re-insert: Map order doubles as LRU
+        } else {
+            run = { key, pid: this.nextPid++, spans: [], dropped: 0, requests: 0 };
+        }
+        this.runs.set(key, run);
+        if (this.runs.size > this.opts.maxRuns) this._evict(this.runs.values().next().value);
+        return run;
+    }
+
+    _evict(run) {
+        this.runs.delete(run.key);
+        this.spanCount -= run.spans.length;
+    }
+
+    _trim(run, keep) {
+        const excess = run.spans.length - keep;
+        if (excess <= 0) return;
+        run.spans.splice(0, excess);
+        run.dropped++;
+        this.spanCount -= excess;
+    }
+
+    _record(trace, span) {
+        const run = trace.run;
+        if (this.runs.get(run.key) !== run) return; // evicted while the request was still running
+        run.spans.push(span);
+        this.spanCount++;
+        this._trim(run, this.opts.maxSpansPerRun);
+        // Over the global budget: drop other runs, least recently used first, before trimming this one
+        while (this.spanCount > this.opts.maxSpans) {
+            let victim = null;
+            for (const other of this.runs.values()) {
+                if (other !== run) {
+                    victim = other;
+                    break;
+                }
+            }
+            if (!victim) {
+                this._trim(run, this.opts.maxSpans);
+                break;
+            }
+            this._evict(victim);
+        }
+    }
+
+    /**
+     * Run `fn(trace, end)` as the root span of a new trace in `runKey`.
+     * Disabled: `fn(null, end)` with a no-op `end`.
+     */
+    root(runKey, name, args, fn) {
+        if (!this.enabled) return fn(null, () => {});
+        const run = this._run(runKey);
+        run.requests++;
+        const trace = { id: `${run.pid}.${this.nextTrace}`, tid: this.nextTrace++ * LANES_PER_TRACE, run, lanes: new Map(), nextLane: 1 };
+        const span = { name, cat: 'request', ts: this._now(), args, tid: trace.tid };
+        trace.lanes.set(trace.tid, span);
+        return this.als.run({ trace, span }, () => fn(trace, (extra) => this._end(trace, span, extra)));
+    }
+
+    _open(ctx, name, args, cat) {
+        const { trace, span: parent } = ctx;
+        // Same lane as the parent unless a sibling already occupies it
+        let tid = parent.tid;
+        if (trace.lanes.get(tid) !== parent) {
+            tid = trace.tid + Math.min(trace.nextLane++, LANES_PER_TRACE - 1);
+        }
+        const span = { name, cat, ts: this._now(), args, tid, parent };
+        trace.lanes.set(tid, span);
+        return span;
+    }
+
+    /**
+     * Open a child span of the current one; returns end(extraArgs). No-op outside a trace.
+     */
+    start(name, args = {}, cat = 'server') {
+        const ctx = this.enabled && this.als.getStore();
+        if (!ctx) return () => {};
+        const span = this._open(ctx, name, args, cat);
+        return (extra) => this._end(ctx.trace, span, extra);
+    }
+
+    /**
+     * Run `fn(args)` inside a child span so spans it opens nest under it;
+     * fields `fn` sets on `args` are recorded with the span.
+     */
+    async span(name, args, fn, cat = 'server') {
+        const ctx = this.enabled && this.als.getStore();
+        if (!ctx) return fn(args);
+        const span = this._open(ctx, name, args, cat);
+        try {
+            return await this.als.run({ trace: ctx.trace, span }, () => fn(span.args));
+        } finally {
+            this._end(ctx.trace, span);
+        }
+    }
+
+    _end(trace, span, extra) {
+        if (span.dur !== undefined) return;
+        span.dur = this._now() - span.ts;
+        if (extra) span.args = { ...span.args, ...extra };
+        // Hand the lane back to the parent once this span is done
+        if (trace.lanes.get(span.tid) === span) {
+            if (span.parent && span.parent.tid === span.tid) trace.lanes.set(span.tid, span.parent);
+            else trace.lanes.delete(span.tid);
+        }
+        this._record(trace, span);
+    }
+
+    /** The current trace id (for X-Trace-Id), or '' outside a trace. */
+    currentId() {
+        const ctx = this.als.getStore();
+        return ctx ? ctx.trace.id : '';
+    }
+
+    /**
+     * Express middleware: one root span per request, grouped by run.
+     * @param {Function} runOf (req) -> run key, or null to leave the request untraced
+     */
+    middleware(runOf) {
+        return (req, res, next) => {
+            if (!this.enabled) return next();
+            const runKey = runOf(req);
+            if (!runKey) return next();
+            const name = `${req.method} ${req.baseUrl}${req.path}`;
+            const args = { requestId: req.headers['x-request-id'] || '', client: req.headers['x-client-id'] || '' };
+            this.root(runKey, name, args, (trace, end) => {
+                res.setHeader('X-Trace-Id', trace.id);
+                res.on('finish', () => end({ status: res.statusCode }));
+                res.on('close', () => end({ status: res.statusCode, aborted: !res.writableFinished }));
+                next();
+            });
+        };
+    }
+
+    list() {
+        return [...this.runs.values()].reverse().map(run => ({
+            run: run.key,
+            requests: run.requests,
+            spans: run.spans.length,
+            dropped: run.dropped,
+            first: run.spans.length ? Math.round(run.spans[0].ts / 1000) : null
+        }));
+    }
+
+    /** Chrome trace event JSON for `runKey`, or null when nothing was recorded. */
+    export(runKey) {
+        const run = this.runs.get(runKey);
+        if (!run) return null;
+        const events = [
+            { name: 'process_name', ph: 'M', pid: run.pid, tid: 0, args: { name: run.key } }
+        ];
+        const named = new Set();
+        for (const s of run.spans) {
+            if (s.cat === 'request' && !named.has(s.tid)) {
+                named.add(s.tid);
+                events.push({ name: 'thread_name', ph: 'M', pid: run.pid, tid: s.tid, args: { name: s.name } });
+            }
+            events.push({
+                name: s.name,
+                cat: s.cat,
+                ph: 'X',
+                ts: Math.round(s.ts),
+                dur: Math.max(1, Math.round(s.dur)),
+                pid: run.pid,
+                tid: s.tid,
+                args: s.args
+            });
+        }
+        return { traceEvents: events, displayTimeUnit: 'ms', otherData: { run: run.key, trimmed: run.dropped } };
+    }
+}
+
+module.exports = { Tracer };
@@ -0,0 +1,125 @@
+/**
+ * Worker Pool - runs CPU-bound tasks on worker_threads so the Express event
+ * loop keeps answering status polls while a big report is being built.
+ *
+ *   const pool = new WorkerPool(path.join(__dirname, 'report_worker.js'), { size: 2 });
+ *   const csv = await pool.run('csv', { records });
+ *
+ * The worker script answers { id, task, payload } messages with
+ * { id, result } or { id, error } (see report_worker.js). Tasks queue FIFO
+ * while every worker is busy; a worker that crashes fails its task and is
+ * replaced.
+ */
+
+const os = require('os');
+const { Worker } = require('worker_threads');
+
+class WorkerPool {
+    /**
+     * @param {string} script path of the worker module
+     * @param {Object} [opts] { size = min(4, cpus - 1) }
+     */
+    constructor(script, { size = Math.max(1, Math.min(4, os.cpus().length - 1)) } = {}) {
+        this.script = script;
+        this.size = size;
+        this.idle = [];
+        this.workers = new Set();
+        this.queue = [];
+        this.pending = new Map(); // task id -> { resolve, reject, worker, started, task }
+        this.nextId = 1;
+        this.closed = false;
+        this.stats = { completed: 0, failed: 0, busyMs: 0, maxMs: 0 };
+    }
+
+    _spawn() {
+        const worker = new Worker(this.script);
+        worker.unref(); // an idle pool never keeps the process alive
+        worker.on('message', ({ id, result, error }) => {
+            const job = this.pending.get(id);
+            if (!job) return;
+            this.pending.delete(id);
+            const ms = Date.now() - job.started;
+            this.stats.busyMs += ms;
+            this.stats.maxMs = Math.max(this.stats.maxMs, ms);
+            if (error) {
+                this.stats.failed++;
+                job.reject(new Error(error));
+            } else {
+                this.stats.completed++;
+                job.resolve(result);
+            }
+            this._release(worker);
+        });
+        worker.on('error', (err) => this._crashed(worker, err));
+        worker.on('exit', (code) => {
+            if (code !== 0) this._crashed(worker, new Error(`worker exited with code ${code}`));
+        });
+        this.workers.add(worker);
+        return worker;
+    }
+
+    _crashed(worker, err) {
+        if (!this.workers.delete(worker)) return;
+        this.idle = this.idle.filter(w => w !== worker);
+        for (const [id, job] of this.pending) {
+            if (job.worker !== worker) continue;
+            this.pending.delete(id);
+            this.stats.failed++;
+            job.reject(err);
+        }
+        console.error(`[WORKERS] ${this.script} worker died: ${err.message}`);
+        this._drain();
+    }
+
+    _release(worker) {
+        this.idle.push(worker);
+        this._drain();
+    }
+
+    _drain() {
+        while (this.queue.length && !this.closed) {
+            let worker = this.idle.pop();
+            if (!worker) {
+                if (this.workers.size >= this.size) return;
+                worker = this._spawn();
+            }
+            const job = this.queue.shift();
+            job.worker = worker;
+            job.started = Date.now();
+            this.pending.set(job.id, job);
+            worker.postMessage({ id: job.id, task: job.task, payload: job.payload }, job.transfer);
+        }
+    }
+
+    /**
+     * Run `task` with `payload` on a worker. Resolves to the task's result.
+     * @param {Array} [transfer] ArrayBuffers to move instead of copy
+     */
+    run(task, payload, transfer = []) {
+        if (this.closed) return Promise.reject(new Error('worker pool closed'));
+        return new Promise((resolve, reject) => {
+            this.queue.push({ id: this.nextId++, task, payload, transfer, resolve, reject });
+            this._drain();
+        });
+    }
+
+    status() {
+        return {
+            size: this.size,
+            workers: this.workers.size,
+            busy: this.pending.size,
+            queued: this.queue.length,
+            ...this.stats
+        };
+    }
+
+    async close() {
+        this.closed = true;
+        const workers = [...this.workers];
+        this.workers.clear(); // terminate() exits with code 1: not a crash
+        this.idle = [];
+        await Promise.all(workers.map(w => w.terminate()));
+    }
+}
+
+module.exports = { WorkerPool };